@@ -0,0 +1,69 @@
+"""Avatar URL resolution and default avatar assets (Stage 18).
+
+Rosters and chat lists render hundreds of avatars per page, so both
+pieces are memoised per process:
+
+- `avatar_url_for(user, size)` resolves through an LRU cache keyed by
+  (user id, role, uploaded avatar and its WebP variants, size, salt).
+  The seed hash runs once per key. An upload or role change produces a
+  new key, so nothing needs invalidating. Uploaded avatars are served
+  as the closest pre-generated variant (accounts/thumbnails.py);
+- `default_avatar(role)` locates and reads the role's static SVG once
+  and keeps its bytes with a strong ETag for `avatar_proxy`.
+"""
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.files.storage import default_storage
+
+from .thumbnails import variant_for
+
+AVATAR_URL_CACHE_SIZE = 8192
+
+
+def default_avatar_name(role: str | None) -> str:
+    return "avatar-teacher.svg" if role == "teacher" else "avatar-default.svg"
+
+
+@lru_cache(maxsize=AVATAR_URL_CACHE_SIZE)
+def _resolve(
+    user_id, role: str, uploaded: str, variants: tuple[tuple[str, str], ...], size: int, salt: str
+) -> str:
+    if uploaded:
+        return default_storage.url(variant_for(dict(variants), size) or uploaded)
+    seed = hashlib.sha256(f"{user_id}:{salt}:{role}".encode()).hexdigest()
+    return f"/static/img/{default_avatar_name(role)}?size={size}&seed={seed}"
+
+
+def avatar_url_for(user, size: int = 48) -> str:
+    """Uploaded avatar URL, or a deterministic role default with size and seed."""
+    profile = getattr(user, "profile", None)
+    role = getattr(profile, "role", None) or "student"
+    avatar = getattr(profile, "avatar", None)
+    uploaded = getattr(avatar, "name", "") or ""
+    variants = tuple(sorted((getattr(profile, "avatar_variants", None) or {}).items())) if uploaded else ()
+    salt = getattr(settings, "AVATAR_SEED_SALT", "courpera")
+    return _resolve(getattr(user, "pk", "0"), role, uploaded, variants, int(size), salt)
+
+
+@dataclass(frozen=True)
+class AvatarAsset:
+    content: bytes
+    etag: str
+    content_type: str = "image/svg+xml"
+
+
+@lru_cache(maxsize=None)
+def default_avatar(role: str | None) -> AvatarAsset | None:
+    """Bytes and ETag of the role's default avatar; None when the asset is missing."""
+    path = finders.find(f"img/{default_avatar_name(role)}")
+    if not path:
+        return None
+    with open(path, "rb") as fh:
+        content = fh.read()
+    return AvatarAsset(content, '"%s"' % hashlib.sha256(content).hexdigest()[:32])
@@ -0,0 +1,95 @@
+"""Authentication backend that loads the profile with the user (Stage 18).
+
+Role checks (`role_required`, the API permissions, templates) read
+`request.user.profile` on almost every request. Django's `ModelBackend`
+loads the user alone, so that costs a second query after the session
+lookup. `ProfileModelBackend.get_user` joins the profile in the same
+query.
+
+With `AUTH_USER_CACHE_TTL` > 0, the loaded (user, profile) pair is also
+kept in the shared cache for that many seconds, keyed by user id, and
+most requests then authenticate without touching the database. Saving
+or deleting a user or profile drops the entry (accounts/signals.py).
+Bulk `update()` calls bypass signals and are picked up when the TTL
+runs out.
+
+The cached user is a plain model instance, password hash included:
+Django checks every session against `get_session_auth_hash()`, which is
+computed from it, and a password change on `request.user` must be able
+to compute the new one. Anyone who can read the cache can therefore read
+Argon2 hashes. Deployments where the cache is less protected than the
+database should set `AUTH_USER_CACHE_TTL` to 0.
+
+`ModelBackend` stays listed after this backend (settings), so sessions
+created before the switch, which store its path, remain valid. A failed
+password check here raises `PermissionDenied`, so `ModelBackend` does
+not repeat the same slow hash for a wrong password.
+
+`aauthenticate` is the same check for async callers. The password is
+verified, and re-hashed when the cost settings changed, on the hashing
+pool (accounts/hashers.py) while the event loop keeps serving.
+"""
+from __future__ import annotations
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+
+from config import cache as shared_cache
+
+from .hashers import acheck_password
+
+NAMESPACE = "auth-user"
+
+
+def _load(user_id):
+    UserModel = get_user_model()
+    try:
+        return UserModel._default_manager.select_related("profile").get(pk=user_id)
+    except UserModel.DoesNotExist:
+        return None
+
+
+def forget_user(user_id) -> None:
+    shared_cache.forget(NAMESPACE, str(user_id))
+
+
+class ProfileModelBackend(ModelBackend):
+    """`ModelBackend` whose session user arrives with its profile."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username=username, password=password, **kwargs)
+        if user is None and password is not None and (username or kwargs.get(get_user_model().USERNAME_FIELD)):
+            raise PermissionDenied  # stop before ModelBackend hashes the password again
+        return user
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget(**{UserModel.USERNAME_FIELD: username})
+        except UserModel.DoesNotExist:
+            await acheck_password(password, "!")  # unusable; same hashing time as an existing user
+            raise PermissionDenied
+
+        async def setter(raw_password):
+            await sync_to_async(user.set_password, thread_sensitive=False)(raw_password)
+            user._password = None  # a re-hash is not a password change
+            await user.asave(update_fields=["password"])
+
+        if await acheck_password(password, user.password, setter) and self.user_can_authenticate(user):
+            return user
+        raise PermissionDenied
+
+    def get_user(self, user_id):
+        ttl = getattr(settings, "AUTH_USER_CACHE_TTL", 0)
+        if ttl > 0:
+            user = shared_cache.fetch(NAMESPACE, str(user_id), lambda: _load(user_id), ttl)
+        else:
+            user = _load(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
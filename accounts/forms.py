@@ -6,6 +6,7 @@ from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
 
 from .models import UserProfile, Role
+from .thumbnails import discard_replaced_variants, generate_avatar_variants
 from django.core.exceptions import ValidationError
 from io import BytesIO
 from django.core.files.base import ContentFile
@@ -118,6 +119,7 @@ class ProfileForm(forms.ModelForm):
     def save(self, commit: bool = True):
         profile: UserProfile = super().save(commit=False)
         f = self.cleaned_data.get("avatar")
+        previous_variants = dict(profile.avatar_variants or {})
         # Email change: verify current password and uniqueness
         if self.user:
             email = (self.cleaned_data.get("email") or "").strip().lower()
@@ -145,6 +147,8 @@ class ProfileForm(forms.ModelForm):
                     ContentFile(buf.getvalue()),
                     save=False,
                 )
+                # WebP thumbnails per display size, served by the avatar tag
+                generate_avatar_variants(profile)
             except ImportError:
                 # If Pillow isn't installed, store the original upload as-is
                 profile.avatar = f
@@ -152,6 +156,8 @@ class ProfileForm(forms.ModelForm):
                 raise ValidationError("Invalid image file.")
         if commit:
             profile.save()
+            # Old thumbnails go only once the profile no longer points at them
+            discard_replaced_variants(previous_variants, profile)
         return profile
 
 
@@ -0,0 +1,144 @@
+"""Argon2 password hashing with configurable cost (Stage 18).
+
+`TunedArgon2PasswordHasher` reads its cost from settings
+(`ARGON2_TIME_COST`, `ARGON2_MEMORY_COST` in KiB, `ARGON2_PARALLELISM`).
+The values to use on given hardware come from
+`python manage.py calibrate_password_hasher --target-ms 250`.
+
+When the settings change, stored hashes no longer match the configured
+parameters. `must_update` then reports them, and Django re-hashes the
+password the next time its owner logs in.
+
+Hashing and verification run in a bounded thread pool
+(`PASSWORD_HASH_WORKERS`, default: CPU count). argon2-cffi releases the
+GIL while hashing, so a login burst uses at most that many cores and
+queues behind them. Request threads keep running meanwhile instead of
+competing for every CPU.
+
+A sync caller still waits for its hash. Async code should await
+`acheck_password` (or `ProfileModelBackend.aauthenticate`,
+accounts/backends.py), which hands the whole check to the pool and
+leaves the event loop free. Django's own `acheck_password` verifies on
+the event loop itself.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, verify_password
+
+from config.metrics import PASSWORD_HASH
+
+T = TypeVar("T")
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def _executor() -> ThreadPoolExecutor:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                workers = getattr(settings, "PASSWORD_HASH_WORKERS", 0) or os.cpu_count() or 1
+                _pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    return _pool
+
+
+def _submit(op: str, fn: Callable[..., T], *args) -> Future:
+    queued = time.perf_counter()
+
+    def timed() -> T:
+        started = time.perf_counter()
+        _local.in_pool = True
+        try:
+            return fn(*args)
+        finally:
+            _local.in_pool = False
+            PASSWORD_HASH.labels(op, "queue").observe(started - queued)
+            PASSWORD_HASH.labels(op, "hash").observe(time.perf_counter() - started)
+
+    return _executor().submit(timed)
+
+
+def _offload(op: str, fn: Callable[..., T], *args) -> T:
+    if getattr(_local, "in_pool", False):  # already on a pool thread; waiting on it could deadlock
+        return fn(*args)
+    return _submit(op, fn, *args).result()
+
+
+async def acheck_password(password, encoded, setter=None, preferred="default") -> bool:
+    """Async `check_password` that awaits the hashing pool instead of blocking the event loop."""
+    is_correct, must_update = await asyncio.wrap_future(_submit("verify", verify_password, password, encoded, preferred))
+    if setter and is_correct and must_update:
+        await setter(password)
+    return is_correct
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with cost parameters from settings, hashed off the request thread."""
+
+    @property
+    def time_cost(self) -> int:
+        return getattr(settings, "ARGON2_TIME_COST", Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self) -> int:
+        return getattr(settings, "ARGON2_MEMORY_COST", Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self) -> int:
+        return getattr(settings, "ARGON2_PARALLELISM", Argon2PasswordHasher.parallelism)
+
+    def encode(self, password, salt):
+        return _offload("encode", super().encode, password, salt)
+
+    def verify(self, password, encoded):
+        return _offload("verify", super().verify, password, encoded)
+
+
+def measure_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int = 3) -> float:
+    """Median milliseconds to hash one password with the given parameters."""
+    from argon2.low_level import Type, hash_secret
+
+    timings = []
+    for _ in range(max(1, samples)):
+        started = time.perf_counter()
+        hash_secret(b"calibration-password", os.urandom(16), time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism, hash_len=32, type=Type.ID)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return sorted(timings)[len(timings) // 2]
+
+
+def calibrate(
+    target_ms: float,
+    *,
+    memory_cost: int,
+    parallelism: int,
+    max_time_cost: int = 20,
+    measure: Callable[[int, int, int], float] = measure_ms,
+) -> dict[str, float]:
+    """Find the costliest parameters that still hash within `target_ms`.
+
+    Memory is halved until a single pass fits the target (but never below
+    Argon2's minimum of 8 KiB per lane); then passes are added while
+    they still fit.
+    """
+    floor = 8 * parallelism
+    ms = measure(1, memory_cost, parallelism)
+    while ms > target_ms and memory_cost // 2 >= floor:
+        memory_cost //= 2
+        ms = measure(1, memory_cost, parallelism)
+    time_cost = 1
+    while time_cost < max_time_cost:
+        slower = measure(time_cost + 1, memory_cost, parallelism)
+        if slower > target_ms:
+            break
+        time_cost, ms = time_cost + 1, slower
+    return {"time_cost": time_cost, "memory_cost": memory_cost, "parallelism": parallelism, "ms": round(ms, 1)}
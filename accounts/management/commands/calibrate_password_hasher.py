@@ -0,0 +1,40 @@
+"""Choose Argon2 cost parameters for a target hashing latency."""
+from __future__ import annotations
+
+import json
+from functools import partial
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.hashers import calibrate, measure_ms
+
+
+class Command(BaseCommand):
+    help = "Benchmark Argon2 on this machine and print ARGON2_* settings that hash within --target-ms."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target-ms", type=float, default=250.0, help="Latency budget for one hash (default: 250)")
+        parser.add_argument("--memory-kib", type=int, default=settings.ARGON2_MEMORY_COST, help="Starting memory cost in KiB")
+        parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+        parser.add_argument("--samples", type=int, default=3, help="Hashes timed per candidate (median is used)")
+        parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    def handle(self, *args, **opts):
+        if opts["target_ms"] <= 0 or opts["parallelism"] < 1:
+            raise CommandError("--target-ms and --parallelism must be positive")
+        result = calibrate(
+            opts["target_ms"],
+            memory_cost=opts["memory_kib"],
+            parallelism=opts["parallelism"],
+            measure=partial(measure_ms, samples=opts["samples"]),
+        )
+        if opts["json"]:
+            self.stdout.write(json.dumps(result))
+            return
+        self.stdout.write(f"One hash takes about {result['ms']} ms with:")
+        self.stdout.write(f"ARGON2_TIME_COST={result['time_cost']}")
+        self.stdout.write(f"ARGON2_MEMORY_COST={result['memory_cost']}")
+        self.stdout.write(f"ARGON2_PARALLELISM={result['parallelism']}")
+        if result["ms"] > opts["target_ms"]:
+            self.stderr.write(self.style.WARNING("The minimum parameters still exceed the target on this machine."))
@@ -0,0 +1,32 @@
+"""Build WebP avatar variants for uploads made before the thumbnail pipeline."""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserProfile
+from accounts.thumbnails import discard_replaced_variants, generate_avatar_variants
+
+
+class Command(BaseCommand):
+    help = "Generate WebP avatar thumbnails for profiles that have an upload but no variants."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Regenerate variants for every uploaded avatar")
+
+    def handle(self, *args, **opts):
+        profiles = UserProfile.objects.exclude(avatar="").exclude(avatar__isnull=True)
+        if not opts["all"]:
+            profiles = profiles.filter(avatar_variants={})
+        done = failed = 0
+        for profile in profiles.iterator():
+            previous = dict(profile.avatar_variants or {})
+            try:
+                generate_avatar_variants(profile)
+            except Exception as exc:
+                failed += 1
+                self.stderr.write(f"user {profile.user_id}: {exc}")
+                continue
+            profile.save(update_fields=["avatar_variants"])
+            discard_replaced_variants(previous, profile)
+            done += 1
+        self.stdout.write(f"Generated thumbnails for {done} avatar(s); {failed} failed.")
@@ -43,6 +43,8 @@ class UserProfile(models.Model):
     # Uploaded avatar (preferred when present) and optional external URL
     avatar = models.ImageField(upload_to="avatars/", blank=True, null=True)
     avatar_url = models.URLField(blank=True)
+    # Pre-generated WebP thumbnails of `avatar`: {"48": "avatars/avatar_1_48_ab12cd34.webp", ...}
+    avatar_variants = models.JSONField(default=dict, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -2,12 +2,14 @@
 
 On user creation, create a default `UserProfile` with the student role.
 This keeps registration straightforward while still supporting a role
-selection UI that updates the profile after creation.
+selection UI that updates the profile after creation. Saving or deleting
+a user or profile also drops the cached session user (accounts/backends.py).
 """
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from .backends import forget_user
 from .models import UserProfile, Role
 
 
@@ -39,3 +41,17 @@ def ensure_instructor_id(sender, instance: UserProfile, **kwargs):  # noqa: D401
     if getattr(instance, "role", None) == Role.TEACHER and not getattr(instance, "instructor_id", None):  # type: ignore[attr-defined]
         if getattr(instance, "user_id", None):
             instance.instructor_id = f"I{instance.user_id:07d}"
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance: User, **kwargs):  # noqa: D401
+    """Drop the cached session user so the next request reloads it."""
+    forget_user(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_cached_profile_user(sender, instance: UserProfile, **kwargs):  # noqa: D401
+    """Drop the cached session user whose profile changed."""
+    forget_user(instance.user_id)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+
+from accounts import avatars
+from accounts.avatars import avatar_url_for, default_avatar
+
+
+@pytest.mark.django_db
+def test_avatar_urls_are_memoised_and_follow_role_and_upload():
+    u = User.objects.create_user(username="memo", password="pw")
+    first = avatar_url_for(u, 32)
+    hits = avatars._resolve.cache_info().hits
+    assert avatar_url_for(u, 32) == first
+    assert avatars._resolve.cache_info().hits == hits + 1
+
+    u.profile.role = "teacher"
+    teacher_url = avatar_url_for(u, 32)
+    assert teacher_url != first and "avatar-teacher.svg" in teacher_url
+
+    u.profile.avatar.name = "avatars/memo.png"
+    assert avatar_url_for(u, 32) == "/media/avatars/memo.png"
+
+
+@pytest.mark.django_db
+def test_avatar_proxy_serves_cached_bytes_with_etag(monkeypatch):
+    u = User.objects.create_user(username="proxy", password="pw")
+    default_avatar.cache_clear()
+    lookups = []
+    real_find = avatars.finders.find
+    monkeypatch.setattr(avatars.finders, "find", lambda path: lookups.append(path) or real_find(path))
+
+    c = Client()
+    r1 = c.get(f"/accounts/avatar/{u.pk}/64/")
+    r2 = c.get(f"/accounts/avatar/{u.pk}/64/")
+    assert r1.status_code == r2.status_code == 200
+    assert r1.content == r2.content and r1.content.lstrip().startswith(b"<")
+    assert r1["ETag"] == r2["ETag"]
+    assert lookups == ["img/avatar-default.svg"]
+
+    r3 = c.get(f"/accounts/avatar/{u.pk}/64/", HTTP_IF_NONE_MATCH=r1["ETag"])
+    assert r3.status_code == 304 and r3.content == b""
+    default_avatar.cache_clear()
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from io import BytesIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+
+from accounts.avatars import avatar_url_for
+from accounts.thumbnails import AVATAR_SIZES
+
+
+def _noisy_png(side: int = 600) -> bytes:
+    from PIL import Image
+
+    img = Image.effect_noise((side, side), 64).convert("RGB")
+    buf = BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_upload_generates_webp_variants_served_by_size(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    u = User.objects.create_user(username="thumbs", password="pw", email="t@example.com")
+    c = Client(); assert c.login(username="thumbs", password="pw")
+
+    upload = SimpleUploadedFile("me.png", _noisy_png(), content_type="image/png")
+    r = c.post("/accounts/profile/", {
+        "full_name": "T", "phone": "", "email": "t@example.com", "current_password": "pw", "avatar": upload,
+    })
+    assert r.status_code in (302, 303)
+
+    u.profile.refresh_from_db()
+    variants = u.profile.avatar_variants
+    assert sorted(int(s) for s in variants) == list(AVATAR_SIZES)
+    original = default_storage.size(u.profile.avatar.name)
+    for size, name in variants.items():
+        assert name.endswith(".webp") and f"_{size}_" in name
+        assert default_storage.exists(name)
+    assert default_storage.size(variants["32"]) * 10 < original
+
+    # Exact sizes map to their variant; odd sizes round up
+    assert avatar_url_for(u, 32) == default_storage.url(variants["32"])
+    assert avatar_url_for(u, 40) == default_storage.url(variants["48"])
+    assert avatar_url_for(u, 512) == default_storage.url(variants["256"])
+
+    r = c.post("/accounts/profile/", {"remove_avatar": "1"})
+    assert r.status_code in (302, 303)
+    u.profile.refresh_from_db()
+    assert u.profile.avatar_variants == {}
+    assert not any(default_storage.exists(name) for name in variants.values())
+
+
+@pytest.mark.django_db
+def test_old_variants_survive_until_the_new_ones_are_saved(monkeypatch, django_capture_on_commit_callbacks):
+    from accounts import thumbnails
+
+    u = User.objects.create_user(username="thumbs2", password="pw", email="t2@example.com")
+    c = Client(); assert c.login(username="thumbs2", password="pw")
+    post = lambda: c.post("/accounts/profile/", {  # noqa: E731
+        "full_name": "T", "phone": "", "email": "t2@example.com", "current_password": "pw",
+        "avatar": SimpleUploadedFile("me.png", _noisy_png(64), content_type="image/png"),
+    })
+    with django_capture_on_commit_callbacks(execute=True):
+        assert post().status_code in (302, 303)
+    u.profile.refresh_from_db()
+    old = u.profile.avatar_variants
+
+    # Generation fails part-way: the profile keeps its files and no new ones are left behind
+    written = []
+    real_render = thumbnails._render
+
+    def failing_render(img, size):
+        if size == 64:
+            raise OSError("disk full")
+        return real_render(img, size)
+
+    real_save = thumbnails.default_storage.save
+    monkeypatch.setattr(thumbnails, "_render", failing_render)
+    monkeypatch.setattr(thumbnails.default_storage, "save", lambda name, content: written.append(real_save(name, content)) or written[-1])
+    profile = u.profile
+    profile.avatar_variants = dict(old)
+    with pytest.raises(OSError):
+        thumbnails.generate_avatar_variants(profile)
+    assert written and not any(default_storage.exists(name) for name in written)
+    assert all(default_storage.exists(name) for name in old.values())
+    monkeypatch.undo()
+
+    # A successful re-upload removes the old files only after the save commits
+    with django_capture_on_commit_callbacks(execute=False) as callbacks:
+        assert post().status_code in (302, 303)
+    u.profile.refresh_from_db()
+    assert u.profile.avatar_variants != old
+    assert all(default_storage.exists(name) for name in old.values())
+    for callback in callbacks:
+        callback()
+    assert not any(default_storage.exists(name) for name in old.values())
+    assert all(default_storage.exists(name) for name in u.profile.avatar_variants.values())
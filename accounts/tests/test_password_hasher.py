@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from io import StringIO
+
+import pytest
+from django.contrib.auth.hashers import Argon2PasswordHasher, get_hasher, make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+
+from accounts.hashers import calibrate
+
+CHEAP = {"ARGON2_TIME_COST": 1, "ARGON2_MEMORY_COST": 1024, "ARGON2_PARALLELISM": 1}
+
+
+def test_calibrate_picks_the_costliest_parameters_within_target():
+    # Synthetic cost model: 1 ms per pass per MiB
+    fake = lambda t, m, p: t * m / 1024  # noqa: E731
+    assert calibrate(250, memory_cost=65536, parallelism=2, measure=fake) == {"time_cost": 3, "memory_cost": 65536, "parallelism": 2, "ms": 192.0}
+    # One pass at full memory is too slow, so memory is halved first
+    assert calibrate(50, memory_cost=102400, parallelism=8, measure=fake)["memory_cost"] == 51200
+    out = StringIO()
+    call_command("calibrate_password_hasher", "--target-ms", "5", "--memory-kib", "64", "--parallelism", "1", "--samples", "1", "--json", stdout=out)
+    assert json.loads(out.getvalue())["memory_cost"] <= 64
+
+
+@pytest.mark.django_db
+@pytest.mark.security
+def test_login_rehashes_when_cost_parameters_change(settings):
+    for name, value in CHEAP.items():
+        setattr(settings, name, value)
+    user = User.objects.create_user(username="rehash", password="S3cure-pass!")
+    assert "$m=1024,t=1,p=1$" in user.password
+    assert get_hasher("argon2").__class__.__name__ == "TunedArgon2PasswordHasher"
+
+    settings.ARGON2_TIME_COST = 2
+    r = Client().post("/accounts/login/", {"username": "rehash", "password": "S3cure-pass!"})
+    assert r.status_code == 302
+    user.refresh_from_db()
+    assert "$m=1024,t=2,p=1$" in user.password
+    assert user.check_password("S3cure-pass!")
+
+
+def test_hashing_runs_in_the_bounded_pool(settings, monkeypatch):
+    for name, value in CHEAP.items():
+        setattr(settings, name, value)
+    threads = []
+    original = Argon2PasswordHasher.verify
+
+    def spy(self, password, encoded):
+        threads.append(threading.current_thread().name)
+        return original(self, password, encoded)
+
+    monkeypatch.setattr(Argon2PasswordHasher, "verify", spy)
+    hasher = get_hasher("argon2")
+    encoded = hasher.encode("pw", hasher.salt())
+    assert hasher.verify("pw", encoded) and not hasher.verify("nope", encoded)
+    assert all(name.startswith("password-hash") for name in threads) and len(threads) == 2
+
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_async_login_check_leaves_the_event_loop_free(settings, monkeypatch):
+    import asyncio
+
+    from channels.db import database_sync_to_async
+    from django.core.exceptions import PermissionDenied
+
+    from accounts.backends import ProfileModelBackend
+    from accounts.hashers import acheck_password
+
+    for name, value in CHEAP.items():
+        setattr(settings, name, value)
+    user = await database_sync_to_async(User.objects.create_user)(username="async_login", password="S3cure-pass!")
+    settings.ARGON2_TIME_COST = 2
+    backend = ProfileModelBackend()
+
+    # The loop keeps running while a (slowed) hash is verified
+    original = Argon2PasswordHasher.verify
+    monkeypatch.setattr(Argon2PasswordHasher, "verify", lambda *a: time.sleep(0.05) or original(*a))
+    task = asyncio.ensure_future(acheck_password("pw", make_password("pw")))
+    ticks = 0
+    while not task.done():
+        ticks += 1
+        await asyncio.sleep(0.001)
+    assert await task and ticks > 10
+    monkeypatch.undo()
+
+    assert (await backend.aauthenticate(None, username="async_login", password="S3cure-pass!")).pk == user.pk
+    await database_sync_to_async(user.refresh_from_db)()
+    assert "$m=1024,t=2,p=1$" in user.password  # re-hashed for the new cost
+    for username, password in (("async_login", "wrong"), ("nobody", "S3cure-pass!")):
+        with pytest.raises(PermissionDenied):
+            await backend.aauthenticate(None, username=username, password=password)
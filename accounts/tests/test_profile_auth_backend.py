@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from courses.models import Course
+
+
+def _user_queries(ctx) -> list[str]:
+    return [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"] or '"accounts_userprofile"' in q["sql"]]
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_session_user_loads_with_profile_in_one_query(settings):
+    settings.AUTH_USER_CACHE_TTL = 0
+    u = User.objects.create_user(username="joined", password="pw")
+    c = Client(); c.force_login(u)
+    with CaptureQueriesContext(connection) as ctx:
+        r = c.get("/api/v1/enrolments/")
+    assert r.status_code == 200
+    queries = _user_queries(ctx)
+    assert len(queries) == 1 and "JOIN" in queries[0]
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_cached_session_user_is_dropped_when_profile_changes(settings):
+    settings.AUTH_USER_CACHE_TTL = 60
+    u = User.objects.create_user(username="cached", password="pw")
+    c = Client(); c.force_login(u)
+    c.get("/api/v1/enrolments/")
+    with CaptureQueriesContext(connection) as ctx:
+        assert c.get("/api/v1/enrolments/").status_code == 200
+    assert _user_queries(ctx) == []
+
+    # Teachers may not enrol; the role change must be visible at once
+    u.profile.role = "teacher"; u.profile.save(update_fields=["role"])
+    course = Course.objects.create(owner=User.objects.create_user(username="owner", password="pw"), title="C")
+    r = c.post("/api/v1/enrolments/", {"course": course.pk}, content_type="application/json")
+    assert r.status_code == 403
+
+    u.is_active = False; u.save(update_fields=["is_active"])
+    assert c.get("/accounts/profile/").status_code == 302  # login_required sends the now-anonymous client to log in
+
+
+@pytest.mark.django_db
+def test_cached_sessions_survive_a_password_change_and_old_backend_paths(settings):
+    from django.contrib.auth import BACKEND_SESSION_KEY
+
+    settings.AUTH_USER_CACHE_TTL = 60
+    u = User.objects.create_user(username="changer", password="Old-pass-123!")
+    c, other = Client(), Client()
+    c.force_login(u); other.force_login(u)
+    assert c.get("/accounts/profile/").status_code == 200
+    assert other.get("/accounts/profile/").status_code == 200  # both now served from the cache
+
+    # The session that changes the password stays logged in; the other one ends
+    r = c.post("/accounts/password/change/", {"old_password": "Old-pass-123!", "new_password1": "New-pass-456!", "new_password2": "New-pass-456!"})
+    assert r.status_code == 302 and r["Location"] == "/accounts/password/change/done/"
+    assert c.get("/accounts/profile/").status_code == 200
+    assert c.get("/accounts/profile/").status_code == 200  # again from the refilled cache
+    assert other.get("/accounts/profile/").status_code == 302
+
+    # A session written by ModelBackend before the switch is still accepted
+    session = c.session
+    session[BACKEND_SESSION_KEY] = "django.contrib.auth.backends.ModelBackend"
+    session.save()
+    assert c.get("/accounts/profile/").status_code == 200
+
+
+@pytest.mark.django_db
+def test_wrong_password_is_hashed_once(monkeypatch):
+    from django.contrib.auth import authenticate
+    from django.contrib.auth.hashers import check_password as real_check
+
+    User.objects.create_user(username="once", password="right-pw")
+    calls = []
+    monkeypatch.setattr("django.contrib.auth.base_user.check_password", lambda *a, **k: calls.append(1) or real_check(*a, **k))
+    assert authenticate(username="once", password="wrong") is None and len(calls) == 1
+    assert authenticate(username="once", password="right-pw") is not None
@@ -10,7 +10,6 @@ from django.http import (
     HttpResponse,
     Http404,
     HttpResponseBadRequest,
-    FileResponse,
     HttpResponseRedirect,
 )
 from django.shortcuts import redirect, render
@@ -18,13 +17,13 @@ from django.db.models import Q
 from django.contrib.auth.models import User
 from django.urls import reverse
 from django.views.decorators.http import require_GET
-from django.conf import settings
-import hashlib
 import re
 from urllib.parse import urlencode
-from django.contrib.staticfiles import finders
+from django.utils.cache import get_conditional_response
 
+from .avatars import default_avatar
 from .decorators import role_required
+from .thumbnails import delete_avatar_variants
 from .forms import (
     RegistrationForm,
     ProfileForm,
@@ -35,8 +34,14 @@ from .models import Role
 from activity.forms import StatusForm
 from activity.models import Status
 from courses.models import Enrolment, Course
-from assignments.utils import compute_course_percentage
+from assignments.utils import grades_percentage
 from assignments.models import Grade
+from config.metrics import UPLOAD_BYTES
+from config.ratelimit import Rate, client_ip, hit_all
+
+LOGIN_ACCOUNT_RATE = Rate(10, 60)
+LOGIN_IP_RATE = Rate(30, 60)
+RESET_RATE = Rate(5, 600)
 
 
 class CourperaLoginView(LoginView):
@@ -44,18 +49,12 @@ class CourperaLoginView(LoginView):
     form_class = EmailOrUsernameAuthenticationForm
 
     def post(self, request: HttpRequest, *args, **kwargs):
-        # Simple per-session login throttle: max 10 attempts/min to reduce brute force
-        try:
-            ts = request.session.get("login_ts", [])
-            now = __import__("time").time()
-            ts = [t for t in ts if now - t < 60]
-            if len(ts) >= 10:
-                messages.error(request, "Too many login attempts. Please wait a minute and try again.")
-                return self.get(request, *args, **kwargs)
-            ts.append(now)
-            request.session["login_ts"] = ts
-        except Exception:
-            pass
+        # Per-account and per-IP login throttle (cache-backed; no session writes)
+        ident = (request.POST.get("username") or "").strip()
+        decision = hit_all([("login-ip", client_ip(request), LOGIN_IP_RATE), ("login-account", ident, LOGIN_ACCOUNT_RATE)])
+        if not decision.allowed:
+            messages.error(request, "Too many login attempts. Please wait a minute and try again.")
+            return self.get(request, *args, **kwargs)
         return super().post(request, *args, **kwargs)
 
 
@@ -150,13 +149,17 @@ def profile_edit(request: HttpRequest) -> HttpResponse:
                     profile.avatar.delete(save=False)
                 except Exception:
                     pass
+                delete_avatar_variants(profile)
                 profile.avatar = None
-                profile.save(update_fields=["avatar"])
+                profile.save(update_fields=["avatar", "avatar_variants"])
                 messages.success(request, "Avatar removed.")
                 return redirect("accounts:profile")
         form = ProfileForm(request.POST, request.FILES, instance=profile, user=request.user)
         if form.is_valid():
             form.save()
+            avatar = request.FILES.get("avatar")
+            if avatar is not None:
+                UPLOAD_BYTES.labels("avatar").observe(avatar.size or 0)
             messages.success(request, "Profile updated.")
             return redirect("accounts:home")
     else:
@@ -173,15 +176,19 @@ def student_grades(request: HttpRequest) -> HttpResponse:
         .select_related("course", "course__owner")
         .order_by("course__title")
     )
+    # One query for every course's published grades, grouped in Python
+    by_course: dict[int, list[Grade]] = {}
+    grades = (
+        Grade.objects.filter(student=request.user, assignment__is_published=True)
+        .select_related("assignment")
+        .order_by("assignment__title")
+    )
+    for g in grades:
+        by_course.setdefault(g.course_id, []).append(g)
     rows = []
     for e in enrolments:
-        pct = compute_course_percentage(e.course, request.user)
-        grades = (
-            Grade.objects.filter(course=e.course, student=request.user, assignment__is_published=True)
-            .select_related("assignment")
-            .order_by("assignment__title")
-        )
-        rows.append({"course": e.course, "percent": pct, "grades": grades})
+        course_grades = by_course.get(e.course_id, [])
+        rows.append({"course": e.course, "percent": grades_percentage(course_grades), "grades": course_grades})
     return render(request, "accounts/grades.html", {"rows": rows})
 
 
@@ -197,11 +204,9 @@ def password_change_done(request: HttpRequest) -> HttpResponse:
 
 def password_forgot(request: HttpRequest) -> HttpResponse:
     if request.method == "POST":
-        # Throttle: limit to 5 attempts per 10 minutes per session
-        ts = request.session.get("pw_reset_ts", [])
-        now = __import__("time").time()
-        ts = [t for t in ts if now - t < 600]
-        if len(ts) >= 5:
+        # Throttle: 5 attempts per 10 minutes per IP and per identifier
+        ident = (request.POST.get("identifier") or "").strip()
+        if not hit_all([("pw-reset-ip", client_ip(request), RESET_RATE), ("pw-reset-account", ident, RESET_RATE)]).allowed:
             messages.error(request, "Too many reset attempts. Please wait and try again.")
             return render(request, "accounts/password_forgot.html", {"form": SecretResetForm()})
         form = SecretResetForm(request.POST)
@@ -222,11 +227,7 @@ def password_forgot(request: HttpRequest) -> HttpResponse:
                     user.set_password(form.cleaned_data["new_password1"])
                     user.save(update_fields=["password"])
                     messages.success(request, "Password has been reset. You can now sign in.")
-                    ts.append(now)
-                    request.session["pw_reset_ts"] = ts
                     return redirect("accounts:login")
-        ts.append(now)
-        request.session["pw_reset_ts"] = ts
     else:
         form = SecretResetForm()
     return render(request, "accounts/password_forgot.html", {"form": form})
@@ -234,9 +235,9 @@ def password_forgot(request: HttpRequest) -> HttpResponse:
 
 @require_GET
 def avatar_proxy(request: HttpRequest, user_id: int, size: int) -> HttpResponse:
-    """Proxy DiceBear avatar as same-origin PNG to avoid ORB issues.
+    """Serve the role's default avatar from the same origin to avoid ORB issues.
 
-    Accepts deterministic query params but recomputes seed server-side.
+    Answers `If-None-Match` with 304 using the asset's strong ETag.
     """
     try:
         size = int(size)
@@ -245,23 +246,14 @@ def avatar_proxy(request: HttpRequest, user_id: int, size: int) -> HttpResponse:
     if size < 16 or size > 256:
         return HttpResponseBadRequest("invalid size")
 
-    try:
-        user = User.objects.get(pk=user_id)
-    except User.DoesNotExist as exc:  # pragma: no cover - edge
-        raise Http404("user not found") from exc
-
-    # Compute deterministic seed; vary by profile role to produce distinct defaults
-    role = getattr(getattr(user, "profile", None), "role", "student")
-    seed_src = f"{getattr(user, 'pk', '0')}:{getattr(settings, 'AVATAR_SEED_SALT', 'courpera')}:{role}"
-    seed = hashlib.sha256(seed_src.encode()).hexdigest()
-
-    # Serve role-specific default avatar from local static to avoid network dependency
-    img_name = "avatar-default.svg" if role == "student" else "avatar-teacher.svg"
-    rel_path = f"img/{img_name}"
-    abs_path = finders.find(rel_path)
-    if not abs_path:
+    # One query for the role; the asset bytes and ETag are cached per process
+    roles = list(User.objects.filter(pk=user_id).values_list("profile__role", flat=True)[:1])
+    if not roles:  # pragma: no cover - edge
+        raise Http404("user not found")
+    asset = default_avatar(roles[0] or "student")
+    if asset is None:
         return HttpResponseBadRequest("avatar asset missing")
-    # Stream the static file for reliable decoding and caching
-    resp = FileResponse(open(abs_path, "rb"), content_type="image/svg+xml")
+    resp = get_conditional_response(request, etag=asset.etag) or HttpResponse(asset.content, content_type=asset.content_type)
+    resp["ETag"] = asset.etag
     resp["Cache-Control"] = "public, max-age=86400"
     return resp
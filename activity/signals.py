@@ -3,6 +3,7 @@ from __future__ import annotations
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 
+from config.metrics import NOTIFICATION_FANOUT
 from courses.models import Enrolment
 from materials.models import Material
 from .models import Notification
@@ -23,6 +24,7 @@ def notify_enrolment(sender, instance: Enrolment, created: bool, **kwargs):
         course=course,
         message=f"New enrolment: {student.username} in {course.title}",
     )
+    NOTIFICATION_FANOUT.labels(Notification.TYPE_ENROLMENT).observe(1)
 
 
 @receiver(post_save, sender=Material)
@@ -48,4 +50,5 @@ def notify_material(sender, instance: Material, created: bool, **kwargs):
             )
         )
     Notification.objects.bulk_create(to_create)
+    NOTIFICATION_FANOUT.labels(Notification.TYPE_MATERIAL).observe(len(to_create))
 
@@ -5,6 +5,7 @@ from django.contrib.auth.decorators import login_required
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 
+from config.routers import read_replica
 from accounts.decorators import role_required
 from accounts.models import Role
 from .forms import StatusForm
@@ -27,6 +28,7 @@ def post_status(request: HttpRequest) -> HttpResponse:
 
 
 @login_required
+@read_replica
 def notifications_recent(request: HttpRequest) -> JsonResponse:
     """Return recent notifications and unread count for the current user."""
     limit = 10
@@ -51,6 +53,7 @@ def notifications_recent(request: HttpRequest) -> JsonResponse:
 
 
 @login_required
+@read_replica
 def notifications_page(request: HttpRequest) -> HttpResponse:
     qs = Notification.objects.filter(user=request.user).order_by("-created_at")[:100]
     return render(request, "activity/notifications.html", {"notifications": qs})
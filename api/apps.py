@@ -7,3 +7,8 @@ class ApiConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
 
+
+    def ready(self) -> None:  # pragma: no cover (import-time hook)
+        # Version counters behind the API's ETags
+        from . import checks, signals  # noqa: F401
+        return super().ready()
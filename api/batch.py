@@ -0,0 +1,118 @@
+"""Batched read requests for the API (Stage 18).
+
+`POST /api/v1/batch` takes up to `MAX_REQUESTS` GET sub-requests, for
+example `{"requests": [{"path": "/api/v1/courses/?page=2"}, ...]}`, and
+answers them in one round trip:
+`{"responses": [{"path", "status", "headers", "body"}, ...]}`, in the
+same order as the requests.
+
+The outer request passes through the middleware and authentication once.
+Each sub-request is dispatched straight to the resolved view with the
+parent's user forced onto it (so Basic auth does not hash the password
+again) and the parent's `CourseAccess` memo (courses/access.py). The
+views run their own permission checks and throttles as usual, so a
+batch counts against the rate limit like the separate calls would.
+Sub-requests can send `If-None-Match` and get a 304 item back. The API
+does not use Last-Modified (api/conditional.py), so `If-Modified-Since`
+is not forwarded.
+
+When `API_BATCH_WORKERS` is above 1, sub-requests run on a thread pool.
+This only happens where it is safe: each thread uses its own database
+connection, so SQLite and requests already inside a transaction, where
+other connections would not see the same data, stay sequential.
+"""
+from __future__ import annotations
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+from courses.access import share
+
+MAX_REQUESTS = 20
+PREFIX = "/api/v1/"
+# Conditional headers a sub-request may carry, and response headers passed back
+FORWARDED_HEADERS = {"if-none-match": "HTTP_IF_NONE_MATCH"}
+RETURNED_HEADERS = ("ETag", "X-Estimated-Count")
+
+
+@lru_cache(maxsize=1)
+def _executor(workers: int) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="api-batch")
+
+
+def _item(path: str, status: int, body, response=None) -> dict:
+    headers = {h: response[h] for h in RETURNED_HEADERS if response is not None and response.has_header(h)}
+    return {"path": path, "status": status, "headers": headers, "body": body}
+
+
+def _sub_request(parent, path: str, query: str, headers: dict) -> HttpRequest:
+    outer = parent._request
+    sub = HttpRequest()
+    sub.method = "GET"
+    sub.path = sub.path_info = path
+    sub.META = {k: v for k, v in outer.META.items() if not k.startswith("HTTP_IF_") and k != "HTTP_AUTHORIZATION"}
+    sub.META.update(REQUEST_METHOD="GET", PATH_INFO=path, QUERY_STRING=query)
+    for name, value in headers.items():
+        if name.lower() in FORWARDED_HEADERS:
+            sub.META[FORWARDED_HEADERS[name.lower()]] = value
+    sub.GET = QueryDict(query)
+    sub.COOKIES = outer.COOKIES
+    sub.user = parent.user
+    if hasattr(outer, "session"):
+        sub.session = outer.session
+    # DRF skips its authenticators for a forced user
+    sub._force_auth_user, sub._force_auth_token = parent.user, parent.auth
+    share(parent, sub)
+    return sub
+
+
+def _dispatch(parent, spec: dict) -> dict:
+    raw = spec["path"]
+    parts = urlsplit(raw)
+    path = parts.path
+    if parts.scheme or parts.netloc or not path.startswith(PREFIX):
+        return _item(raw, 400, {"detail": f"Only {PREFIX} paths can be batched."})
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _item(raw, 404, {"detail": "Not found."})
+    if match.url_name == "batch":
+        return _item(raw, 400, {"detail": "Batches cannot be nested."})
+    sub = _sub_request(parent, path, parts.query, spec.get("headers") or {})
+    sub.resolver_match = match
+    response = match.func(sub, *match.args, **match.kwargs)
+    if hasattr(response, "data"):
+        body = response.data
+    elif not response.content:  # e.g. 304 Not Modified
+        body = None
+    else:
+        content = response.content.decode(response.charset or "utf-8")
+        body = json.loads(content) if response.get("Content-Type", "").startswith("application/json") else content
+    return _item(raw, response.status_code, body, response)
+
+
+def _threaded(parent, spec: dict) -> dict:
+    close_old_connections()
+    try:
+        return _dispatch(parent, spec)
+    finally:
+        close_old_connections()
+
+
+def parallel_safe() -> bool:
+    return connection.vendor != "sqlite" and not connection.in_atomic_block
+
+
+def run_batch(parent, specs: list[dict]) -> list[dict]:
+    """Responses for `specs`, in order."""
+    workers = min(int(getattr(settings, "API_BATCH_WORKERS", 1)), len(specs))
+    if workers > 1 and parallel_safe():
+        return list(_executor(int(settings.API_BATCH_WORKERS)).map(lambda spec: _threaded(parent, spec), specs))
+    return [_dispatch(parent, spec) for spec in specs]
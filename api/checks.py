@@ -0,0 +1,34 @@
+"""System checks for the API (Stage 18)."""
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries are private to one process
+PROCESS_LOCAL_CACHES = {
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+}
+
+
+@register(Tags.caches)
+def etag_versions_are_shared(app_configs, **kwargs):
+    """API ETags need one cache for all workers (api/conditional.py).
+
+    The per-model version counters are bumped in the process that saved
+    the row. With a process-local cache, other workers keep the old
+    version and answer 304 for a stale body. DEBUG runs (a single
+    runserver process) are exempt.
+    """
+    if settings.DEBUG or not getattr(settings, "API_ETAGS", True):
+        return []
+    if settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Error(
+            "API ETags need a cache shared by every worker process.",
+            hint="Set REDIS_URL (or CACHE_DIR on a single host), or API_ETAGS=0 to turn API ETags off.",
+            obj="api.conditional.ConditionalGetMixin",
+            id="api.E001",
+        )
+    ]
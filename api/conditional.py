@@ -0,0 +1,127 @@
+"""Conditional GET for API viewsets (Stage 18).
+
+`ConditionalGetMixin` gives list and retrieve responses an `ETag`. A
+request whose `If-None-Match` still matches gets a 304 before any page
+is fetched or serialized.
+
+There is no `Last-Modified`, and `If-Modified-Since` is not honoured.
+The newest `updated_at` of the rows cannot see a deleted row or an edit
+to an embedded relation (a course owner's name), so a date check would
+answer 304 for a stale body. Only the ETag covers those changes.
+
+Validators are built from cheap inputs rather than a hash of the body:
+
+- a version counter per model (`config.cache` namespaces), bumped by
+  api/signals.py whenever a row of a model in `etag_models` is saved or
+  deleted; this catches edits, including to related rows such as the
+  embedded owner or student. Models embedded by `?expand=` are added
+  from the serializer (`SparseFieldsMixin.source_models`);
+- for lists, one aggregate over the filtered queryset: the highest
+  primary key and newest `updated_at`/`created_at`, which catch bulk
+  inserts that send no signals. With page numbers it also counts the
+  rows and hands the count to the paginator, so a 200 response costs
+  no extra query; cursor pages stay count-free;
+- the absolute URL (page, ordering, filters), the user and the renderer.
+
+The version counters are only as fresh as the cache they live in. Every
+worker must share it (Redis, or a file cache on one host); otherwise a
+worker that missed a bump answers 304 for a stale body. The system
+check in api/checks.py enforces this outside DEBUG. `API_ETAGS = False`
+turns the validators off and every request gets a full 200.
+"""
+from __future__ import annotations
+
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from config import cache as shared_cache
+
+from .sparse import sparse_params
+
+
+def namespace_for(model) -> str:
+    return f"api-etag:{model._meta.label_lower}"
+
+
+def _timestamp_field(model) -> str | None:
+    names = {f.name for f in model._meta.concrete_fields}
+    return next((n for n in ("updated_at", "created_at") if n in names), None)
+
+
+class ConditionalGetMixin:
+    """ETag validators and 304 short-circuit for list and retrieve."""
+
+    # Models whose changes alter the representation (default: the queryset model)
+    etag_models: tuple = ()
+
+    def _etag_models(self, request) -> list:
+        models = set(self.etag_models or (self.get_queryset().model,))
+        # ?expand= embeds more models; their edits must change the ETag too
+        serializer_class = self.get_serializer_class()
+        if hasattr(serializer_class, "source_models"):
+            models |= serializer_class.source_models(*sparse_params(request))
+        return sorted(models, key=lambda m: m._meta.label_lower)
+
+    def _validators(self, request, *parts) -> str:
+        models = self._etag_models(request)
+        seed = [
+            request.build_absolute_uri(),
+            str(getattr(request.user, "pk", None)),
+            getattr(getattr(request, "accepted_renderer", None), "format", ""),
+            *(f"{namespace_for(m)}={shared_cache.version(namespace_for(m))}" for m in models),
+            *(str(p) for p in parts),
+        ]
+        etag = '"%s"' % hashlib.blake2s("|".join(seed).encode(), digest_size=16).hexdigest()
+        return etag
+
+    def _conditional(self, request, etag: str):
+        return get_conditional_response(getattr(request, "_request", request), etag=etag)
+
+    def _finish(self, response, etag: str):
+        response["ETag"] = etag
+        # Clients keep the body but must revalidate it
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def get_object(self):
+        # retrieve() needs the object for its validators; fetch it once
+        if not hasattr(self, "_conditional_object"):
+            self._conditional_object = super().get_object()
+        return self._conditional_object
+
+    def list(self, request, *args, **kwargs):
+        if not settings.API_ETAGS:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        field = _timestamp_field(queryset.model)
+        aggregates = {"last_pk": Max("pk")}
+        if field:
+            aggregates["newest"] = Max(field)
+        # Page numbers need the row count anyway; compute it here once
+        paginator = self.paginator
+        counted = bool(getattr(paginator, "counts_rows", lambda *a: False)(request, self))
+        if counted:
+            aggregates["n"] = Count("pk")
+        stats = queryset.order_by().aggregate(**aggregates)
+        if counted:
+            paginator.known_count = stats["n"]
+        newest = stats.get("newest")
+        etag = self._validators(request, stats["last_pk"], stats.get("n"), newest.isoformat() if newest else "")
+        not_modified = self._conditional(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return self._finish(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not settings.API_ETAGS:
+            return super().retrieve(request, *args, **kwargs)
+        instance = self.get_object()
+        modified = getattr(instance, "updated_at", None)
+        etag = self._validators(request, instance.pk, modified.isoformat() if modified else "")
+        not_modified = self._conditional(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return self._finish(super().retrieve(request, *args, **kwargs), etag)
@@ -0,0 +1,22 @@
+"""Delete sync tombstones older than API_SYNC_RETENTION_DAYS."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.models import Tombstone
+
+
+class Command(BaseCommand):
+    help = "Delete deletion records the sync endpoint no longer needs; tokens that old already get a 410."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.API_SYNC_RETENTION_DAYS, help="Keep this many days")
+
+    def handle(self, *args, **opts):
+        cutoff = timezone.now() - timedelta(days=opts["days"])
+        deleted, _ = Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(f"Deleted {deleted} tombstone(s) older than {opts['days']} day(s).")
@@ -0,0 +1,26 @@
+"""Deletion records for the sync endpoint (Stage 18)."""
+from __future__ import annotations
+
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """A deleted course, enrolment, material or feedback row.
+
+    Plain integer columns rather than foreign keys: the rows they point at
+    are gone. `course_id` and `user_id` decide who is told about the
+    deletion (see api/sync.py).
+    """
+
+    resource = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    course_id = models.BigIntegerField(null=True, db_index=True)
+    user_id = models.BigIntegerField(null=True, db_index=True)
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=["deleted_at", "id"], name="api_tombstone_deleted")]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.resource}:{self.object_id}"
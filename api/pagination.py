@@ -1,6 +1,63 @@
 from __future__ import annotations
 
-from rest_framework.pagination import PageNumberPagination
+import json
+
+from django.core.paginator import Paginator as DjangoPaginator
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+# Upper bound for the counted fallback of `estimated_count`
+ESTIMATE_CAP = 10_000
+
+
+def estimated_count(queryset) -> int:
+    """Approximate row count of `queryset` without a full COUNT(*).
+
+    PostgreSQL reads the planner's row estimate from EXPLAIN. Other
+    backends count at most `ESTIMATE_CAP` rows, so the answer is exact
+    below the cap and the cap above it.
+    """
+    queryset = queryset.order_by()
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    return queryset[:ESTIMATE_CAP].count()
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination over an indexed, unique ordering.
+
+    Pages are fetched with `WHERE key < last_seen LIMIT n`, so no COUNT
+    runs and a deep page costs the same as the first. The order is the
+    view's `?ordering=` when given, else the primary key (newest first),
+    and always ends with the primary key to break ties.
+    """
+
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = "-pk"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = None
+        for backend in getattr(view, "filter_backends", []):
+            if hasattr(backend, "get_ordering"):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering:
+            ordering = (self.ordering,)
+        elif isinstance(ordering, str):
+            ordering = (ordering,)
+        ordering = tuple(ordering)
+        if ordering[-1].lstrip("-") not in ("pk", "id"):
+            ordering += ("-pk" if ordering[0].startswith("-") else "pk",)
+        return ordering
 
 
 class DefaultPagination(PageNumberPagination):
@@ -9,9 +66,54 @@ class DefaultPagination(PageNumberPagination):
     - Default page_size: 20 (matches settings)
     - Client may request `?page_size=N` up to `max_page_size`
     - Cap prevents excessive payloads during testing and demos
+
+    Page numbers need a COUNT(*) on every call. Clients can switch to
+    keyset pages (`KeysetPagination`) with `?pagination=cursor` and then
+    follow the `next`/`previous` links. A viewset can make that the
+    default by setting `pagination_mode = "cursor"`; `?pagination=page`
+    switches back. In cursor mode, `?estimate=1` adds an
+    `X-Estimated-Count` header computed by `estimated_count`.
     """
 
     page_size = 20
     page_size_query_param = "page_size"
     max_page_size = 100
+    mode_query_param = "pagination"
+
+    keyset: KeysetPagination | None = None
+    # Row count already computed by the view (see api/conditional.py)
+    known_count: int | None = None
+
+    def counts_rows(self, request, view) -> bool:
+        return self._mode(request, view) != "cursor"
+
+    def django_paginator_class(self, queryset, page_size):
+        paginator = DjangoPaginator(queryset, page_size)
+        if self.known_count is not None:
+            paginator.count = self.known_count
+        return paginator
+
+    def _mode(self, request, view) -> str:
+        requested = request.query_params.get(self.mode_query_param)
+        if requested in ("page", "cursor"):
+            return requested
+        if KeysetPagination.cursor_query_param in request.query_params:
+            return "cursor"
+        return getattr(view, "pagination_mode", "page")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self._mode(request, view) != "cursor":
+            return super().paginate_queryset(queryset, request, view)
+        self.keyset = KeysetPagination()
+        page = self.keyset.paginate_queryset(queryset, request, view)
+        self.estimate = estimated_count(queryset) if request.query_params.get("estimate") in ("1", "true") else None
+        return page
 
+    def get_paginated_response(self, data):
+        if self.keyset is None:
+            return super().get_paginated_response(data)
+        response = self.keyset.get_paginated_response(data)
+        if self.estimate is not None:
+            response["X-Estimated-Count"] = str(self.estimate)
+        return response
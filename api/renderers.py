@@ -0,0 +1,36 @@
+"""JSON renderer with an optional fast encoder (Stage 18).
+
+`FastJSONRenderer` encodes with orjson when it is installed, which is
+several times faster than the stdlib encoder on large list responses.
+Output matches DRF's `JSONRenderer`: compact, UTF-8, with U+2028/U+2029
+escaped. Types orjson does not know (Decimal, lazy strings and so on)
+go through DRF's encoder. Indented output (`; indent=N`), orjson
+errors, or a missing orjson all fall back to the stdlib path.
+"""
+from __future__ import annotations
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:  # optional dependency
+    import orjson
+except ImportError:  # pragma: no cover - exercised where orjson is absent
+    orjson = None
+
+_drf_default = JSONEncoder().default
+# Dates and times go through DRF's encoder so they format identically
+_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or orjson is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_drf_default, option=_OPTIONS)
+        except (orjson.JSONEncodeError, TypeError):
+            return super().render(data, accepted_media_type, renderer_context)
+        # Same strict-javascript-subset escaping as DRF
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
@@ -2,6 +2,7 @@
 
 Keep responses modest and role-aware. File uploads occur via HTML forms;
 the API exposes metadata for materials and download URLs where allowed.
+Model serializers accept `?fields=` and `?expand=` (api/sparse.py).
 """
 from __future__ import annotations
 
@@ -9,16 +10,24 @@ from django.contrib.auth import get_user_model
 from rest_framework import serializers
 
 from accounts.models import UserProfile
+from assignments.models import Assignment, Attempt, Grade
 from courses.models import Course, Enrolment
+from courses.enrolment import MAX_IDENTIFIERS
 from courses.models_feedback import Feedback
 from materials.models import Material
 from activity.models import Status
+from .batch import MAX_REQUESTS as MAX_BATCH_REQUESTS
+from .sparse import SparseFieldsMixin
 
 User = get_user_model()
 
+MAX_BULK_GRADES = 500
 
-class UserSerializer(serializers.ModelSerializer):
+
+class UserSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     role = serializers.SerializerMethodField()
+    sparse_sources = {"role": ("profile__role",)}
+    sparse_models = (UserProfile,)
 
     class Meta:
         model = User
@@ -29,8 +38,9 @@ class UserSerializer(serializers.ModelSerializer):
         return getattr(profile, "role", None)
 
 
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     owner = UserSerializer(read_only=True)
+    expandable_fields = {"owner": UserSerializer}
 
     class Meta:
         model = Course
@@ -38,9 +48,10 @@ class CourseSerializer(serializers.ModelSerializer):
         read_only_fields = ("owner", "created_at", "updated_at")
 
 
-class EnrolmentSerializer(serializers.ModelSerializer):
+class EnrolmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all())
     student = UserSerializer(read_only=True)
+    expandable_fields = {"course": CourseSerializer, "student": UserSerializer}
 
     class Meta:
         model = Enrolment
@@ -48,8 +59,40 @@ class EnrolmentSerializer(serializers.ModelSerializer):
         read_only_fields = ("student", "created_at")
 
 
-class MaterialSerializer(serializers.ModelSerializer):
+class BulkEnrolmentSerializer(serializers.Serializer):
+    """Bulk enrolment input: a JSON list of identifiers and/or a CSV file."""
+
+    identifiers = serializers.ListField(
+        child=serializers.CharField(max_length=254, allow_blank=True),
+        required=False,
+        max_length=MAX_IDENTIFIERS,
+    )
+    file = serializers.FileField(required=False)
+
+    def validate(self, attrs):
+        if not attrs.get("identifiers") and not attrs.get("file"):
+            raise serializers.ValidationError("Provide `identifiers` or a CSV `file`.")
+        return attrs
+
+
+class BulkEnrolmentRowSerializer(serializers.Serializer):
+    row = serializers.IntegerField()
+    identifier = serializers.CharField()
+    status = serializers.CharField()
+    user_id = serializers.IntegerField(allow_null=True)
+    username = serializers.CharField(allow_null=True)
+
+
+class BulkEnrolmentResultSerializer(serializers.Serializer):
+    course = serializers.IntegerField()
+    summary = serializers.DictField(child=serializers.IntegerField())
+    results = BulkEnrolmentRowSerializer(many=True)
+
+
+class MaterialSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     file_url = serializers.SerializerMethodField()
+    expandable_fields = {"course": CourseSerializer}
+    sparse_sources = {"file_url": ("file",)}
 
     class Meta:
         model = Material
@@ -64,16 +107,146 @@ class MaterialSerializer(serializers.ModelSerializer):
             return ""
 
 
-class FeedbackSerializer(serializers.ModelSerializer):
+class FeedbackSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # `student` is not expandable: anonymous feedback must not reveal names
+    expandable_fields = {"course": CourseSerializer}
     class Meta:
         model = Feedback
         fields = ("id", "course", "student", "rating", "comment", "anonymous", "created_at")
         read_only_fields = ("student", "created_at")
 
 
-class StatusSerializer(serializers.ModelSerializer):
+class StatusSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Status
         fields = ("id", "text", "created_at")
         read_only_fields = ("created_at",)
 
+
+
+class AssignmentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"course": CourseSerializer}
+
+    class Meta:
+        model = Assignment
+        fields = (
+            "id",
+            "course",
+            "type",
+            "title",
+            "instructions",
+            "available_from",
+            "deadline",
+            "max_marks",
+            "attempts_allowed",
+            "is_published",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+
+class AttemptSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"assignment": AssignmentSerializer}
+    # Marks a student may not see until the attempt is released
+    unreleased_fields = ("score", "marks_awarded", "feedback_text", "graded_at")
+    # Read by to_representation to hide unreleased marks
+    sparse_required = ("released", "student")
+
+    class Meta:
+        model = Attempt
+        fields = (
+            "id",
+            "assignment",
+            "student",
+            "attempt_no",
+            "submitted_at",
+            "score",
+            "marks_awarded",
+            "feedback_text",
+            "graded_at",
+            "released",
+            "released_at",
+        )
+        read_only_fields = fields
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        request = self.context.get("request")
+        if not instance.released and request is not None and request.user.pk == instance.student_id:
+            for name in self.unreleased_fields:
+                if name in data:
+                    data[name] = "" if name == "feedback_text" else None
+        return data
+
+
+class GradeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    expandable_fields = {"assignment": AssignmentSerializer, "course": CourseSerializer}
+
+    class Meta:
+        model = Grade
+        fields = ("id", "assignment", "course", "student", "attempt", "achieved_marks", "max_marks", "released_at", "updated_at")
+        read_only_fields = fields
+
+
+class BulkGradeRowSerializer(serializers.Serializer):
+    attempt = serializers.IntegerField()
+    marks_awarded = serializers.FloatField(min_value=0.0)
+    feedback_text = serializers.CharField(required=False, allow_blank=True, default="")
+    override_reason = serializers.CharField(required=False, allow_blank=True, default="")
+
+
+class BulkGradeSerializer(serializers.Serializer):
+    """Bulk grade input: marks for many attempts, applied all or nothing."""
+
+    grades = BulkGradeRowSerializer(many=True, allow_empty=False, max_length=MAX_BULK_GRADES)
+
+
+class GradebookAssignmentSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField()
+    type = serializers.CharField()
+    max_marks = serializers.FloatField()
+
+
+class GradebookCellSerializer(serializers.Serializer):
+    achieved_marks = serializers.FloatField()
+    max_marks = serializers.FloatField()
+    released_at = serializers.DateTimeField(allow_null=True)
+
+
+class GradebookRowSerializer(serializers.Serializer):
+    student = serializers.IntegerField()
+    username = serializers.CharField()
+    student_number = serializers.CharField(allow_null=True)
+    # One cell per assignment, in `assignments` order; null when ungraded
+    grades = serializers.ListField(child=GradebookCellSerializer(allow_null=True))
+    percentage = serializers.FloatField()
+
+
+class GradebookSerializer(serializers.Serializer):
+    course = serializers.IntegerField()
+    assignments = GradebookAssignmentSerializer(many=True)
+    students = GradebookRowSerializer(many=True)
+
+
+class BatchItemSerializer(serializers.Serializer):
+    path = serializers.CharField(max_length=2000)
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Batch input: GET sub-requests answered in one response."""
+
+    requests = BatchItemSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_REQUESTS)
+
+
+class BatchResponseItemSerializer(serializers.Serializer):
+    path = serializers.CharField()
+    status = serializers.IntegerField()
+    headers = serializers.DictField(child=serializers.CharField())
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResultSerializer(serializers.Serializer):
+    responses = BatchResponseItemSerializer(many=True)
@@ -0,0 +1,42 @@
+"""Bump API ETag versions when the models behind API responses change.
+
+See api/conditional.py. Saves that only touch `last_login` are ignored,
+so logging in does not invalidate every user and course listing.
+Deleting a synced row also leaves a tombstone for api/sync.py.
+"""
+from __future__ import annotations
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+
+from accounts.models import UserProfile
+from activity.models import Status
+from assignments.models import Assignment, Attempt, Grade
+from config import cache as shared_cache
+from courses.models import Course, Enrolment
+from courses.models_feedback import Feedback
+from materials.models import Material
+
+from .conditional import namespace_for
+from .sync import RESOURCE_FOR_MODEL, record_deletion
+
+WATCHED = (get_user_model(), UserProfile, Course, Enrolment, Material, Feedback, Status, Assignment, Attempt, Grade)
+
+
+def _changed(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    shared_cache.bump(namespace_for(sender))
+
+
+for _model in WATCHED:
+    post_save.connect(_changed, sender=_model, dispatch_uid=f"api-etag-save:{_model._meta.label_lower}")
+    post_delete.connect(_changed, sender=_model, dispatch_uid=f"api-etag-delete:{_model._meta.label_lower}")
+
+
+def _deleted(sender, instance, **kwargs):
+    record_deletion(instance)
+
+
+for _model in RESOURCE_FOR_MODEL:
+    post_delete.connect(_deleted, sender=_model, dispatch_uid=f"api-sync-tombstone:{_model._meta.label_lower}")
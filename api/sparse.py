@@ -0,0 +1,165 @@
+"""Sparse fieldsets and expandable relations for the API (Stage 18).
+
+Two query parameters shape read responses (GET/HEAD only):
+
+- `?fields=id,title,owner` keeps just those fields. Relations that are
+  not expanded are then rendered as ids.
+- `?expand=owner,course` renders those relations as nested objects.
+  Without `fields`, this adds nesting to the default representation.
+
+Serializers opt in with `SparseFieldsMixin` and list their nestable
+relations in `expandable_fields`. `SparseFieldsFilter`, a filter
+backend, narrows the queryset to match. It loads only the columns the
+chosen fields read (`only()`, with `sparse_sources` naming the columns
+behind computed fields and `sparse_required` those the serializer reads
+for every row) and joins only the expanded relations
+(`select_related`). A request for ids and titles then becomes one narrow
+single-table query.
+"""
+from __future__ import annotations
+
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+
+def _names(raw: str | None) -> list[str]:
+    return [n.strip() for n in (raw or "").split(",") if n.strip()]
+
+
+def sparse_params(request) -> tuple[list[str] | None, set[str]]:
+    """(requested fields or None for all, relations to expand) for a read request."""
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None, set()
+    params = request.query_params if hasattr(request, "query_params") else request.GET
+    fields = _names(params.get(FIELDS_PARAM)) if FIELDS_PARAM in params else None
+    return fields, set(_names(params.get(EXPAND_PARAM)))
+
+
+class SparseFieldsMixin:
+    """Serializer side: drop unrequested fields and collapse or expand relations."""
+
+    # Relation field -> serializer used when it is expanded
+    expandable_fields: dict = {}
+    # Output field -> model lookups it reads, for fields that are not model fields
+    sparse_sources: dict[str, tuple[str, ...]] = {}
+    # Models read besides Meta.model (e.g. the profile behind a user's role)
+    sparse_models: tuple = ()
+    # Lookups read whatever the requested fields (e.g. by to_representation)
+    sparse_required: tuple[str, ...] = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields, expand = sparse_params(self.context.get("request"))
+        if fields is None and not expand:
+            return
+        self.shape_fields(fields, expand)
+
+    @classmethod
+    def expanded(cls, fields: list[str] | None, expand: set[str]) -> dict[str, bool]:
+        """Output field -> whether it is a nested object, after applying the parameters."""
+        declared = cls.Meta.fields
+        names = [n for n in declared if fields is None or n in fields]
+        nested = {n for n, f in cls._declared_fields.items() if isinstance(f, BaseSerializer)}
+        result = {}
+        for name in names:
+            if name in cls.expandable_fields:
+                result[name] = name in expand or (fields is None and name in nested)
+            else:
+                result[name] = False
+        return result
+
+    def shape_fields(self, fields: list[str] | None, expand: set[str]) -> None:
+        shape = self.expanded(fields, expand)
+        for name in list(self.fields):
+            if name not in shape:
+                self.fields.pop(name)
+        for name in self.expandable_fields:
+            if name not in shape:
+                continue
+            if shape[name]:
+                if not isinstance(self.fields[name], BaseSerializer):
+                    self.fields[name] = self.expandable_fields[name](read_only=True)
+            elif not isinstance(self.fields[name], PrimaryKeyRelatedField):
+                self.fields[name] = PrimaryKeyRelatedField(read_only=True)
+
+    @classmethod
+    def sparse_lookups(cls, fields: list[str] | None, expand: set[str], prefix: str = "") -> set[str]:
+        """Model lookups (for `only()`) the shaped representation reads."""
+        lookups: set[str] = {prefix + lookup for lookup in cls.sparse_required}
+        for name, nested in cls.expanded(fields, expand).items():
+            if nested:
+                child = cls.expandable_fields[name]
+                # Nested objects render in full (their own defaults)
+                lookups |= child.sparse_lookups(None, set(), prefix=f"{prefix}{name}{LOOKUP_SEP}")
+            else:
+                for source in cls.sparse_sources.get(name, (name,)):
+                    lookups.add(prefix + source)
+        return lookups
+
+
+    @classmethod
+    def source_models(cls, fields: list[str] | None, expand: set[str]) -> set:
+        """Models whose rows the shaped representation reads (for ETags)."""
+        models = {cls.Meta.model, *cls.sparse_models}
+        for name, nested in cls.expanded(fields, expand).items():
+            if nested:
+                models |= cls.expandable_fields[name].source_models(None, set())
+        return models
+
+
+def _relations(lookups: set[str]) -> set[str]:
+    paths = set()
+    for lookup in lookups:
+        parts = lookup.split(LOOKUP_SEP)[:-1]
+        for i in range(1, len(parts) + 1):
+            paths.add(LOOKUP_SEP.join(parts[:i]))
+    return paths
+
+
+class SparseFieldsFilter(BaseFilterBackend):
+    """Narrow the queryset to the columns and joins of a sparse or expanded response."""
+
+    def filter_queryset(self, request, queryset, view):
+        fields, expand = sparse_params(request)
+        if fields is None and not expand:
+            return queryset
+        serializer_class = view.get_serializer_class()
+        if not hasattr(serializer_class, "sparse_lookups"):
+            return queryset
+        lookups = serializer_class.sparse_lookups(fields, expand)
+        # Keep ordering columns loaded; cursor pagination reads them
+        for term in list(queryset.query.order_by) or list(queryset.model._meta.ordering):
+            if isinstance(term, str) and LOOKUP_SEP not in term:
+                lookups.add(term.lstrip("-"))
+        lookups.add(queryset.model._meta.pk.name)
+        model_fields = {f.name for f in queryset.model._meta.get_fields()}
+        lookups = {lookup for lookup in lookups if lookup.split(LOOKUP_SEP)[0] in model_fields}
+        queryset = queryset.select_related(None)
+        relations = _relations(lookups)
+        if relations:
+            # select_related() without arguments would follow every foreign key
+            queryset = queryset.select_related(*sorted(relations))
+        return queryset.only(*sorted(lookups))
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": FIELDS_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "Comma-separated fields to return; unexpanded relations become ids.",
+                "schema": {"type": "string"},
+            },
+            {
+                "name": EXPAND_PARAM,
+                "required": False,
+                "in": "query",
+                "description": "Comma-separated relations to return as nested objects.",
+                "schema": {"type": "string"},
+            },
+        ]
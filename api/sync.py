@@ -0,0 +1,194 @@
+"""Delta sync for API clients (Stage 18).
+
+`GET /api/v1/sync?since=<token>` returns the courses, enrolments,
+materials and feedback the current user can see that were created,
+updated or deleted after `token`, plus the token for the next call.
+Without `since` it returns everything visible (the initial sync).
+
+Changed rows are found through the indexed `updated_at` columns, and
+deletions through `Tombstone` rows (api/models.py) written by
+post_delete signals (api/signals.py). The work done is proportional to
+what changed, not to how much data the user can see.
+
+The token is signed and opaque to clients. Inside, it holds a keyset
+position `(updated_at, pk)` per resource and `(deleted_at, id)` for
+tombstones. Each call returns at most `PAGE_SIZE` rows per resource.
+`"more": true` means the client should call again straight away with
+the new token. Rows changed in the last `API_SYNC_SETTLE_SECONDS` are
+held back until the next call, so a transaction that commits slightly
+after a later one is not skipped. Tokens older than
+`API_SYNC_RETENTION_DAYS`, the tombstone retention period, get a 410,
+and the client starts again with a full sync.
+
+A deleted enrolment or course means that course's rows are no longer
+visible. Clients drop them locally; no tombstone is sent for each of
+them. When a student gains a course, the course, its materials and its
+feedback come with the new enrolment, whatever their `updated_at`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Callable
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+from courses.access import visible_courses, visible_to
+from courses.models import Course, Enrolment
+from courses.models_feedback import Feedback
+from materials.models import Material
+
+from .models import Tombstone
+from .serializers import CourseSerializer, EnrolmentSerializer, FeedbackSerializer, MaterialSerializer
+
+PAGE_SIZE = 200
+_SALT = "api.sync"
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_START = [0, 0]
+
+
+class SyncTokenExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "Sync token has expired; start again without `since`."
+    default_code = "sync_token_expired"
+
+
+@dataclass(frozen=True)
+class Resource:
+    model: type
+    serializer: type
+    # user -> rows the user can see
+    scope: Callable[[object], QuerySet]
+    # deleted instance -> (course_id, user_id) recorded on its tombstone
+    audience: Callable[[object], tuple[int | None, int | None]]
+
+
+def _enrolments(user) -> QuerySet:
+    owned = Course.objects.filter(owner_id=user.pk).order_by().values("pk")
+    return Enrolment.objects.filter(Q(student_id=user.pk) | Q(course__in=owned)).select_related(
+        "student", "student__profile"
+    )
+
+
+RESOURCES: dict[str, Resource] = {
+    "courses": Resource(
+        Course,
+        CourseSerializer,
+        lambda user: visible_courses(user).select_related("owner", "owner__profile"),
+        lambda c: (c.pk, c.owner_id),
+    ),
+    "enrolments": Resource(Enrolment, EnrolmentSerializer, _enrolments, lambda e: (e.course_id, e.student_id)),
+    "materials": Resource(
+        Material, MaterialSerializer, lambda user: visible_to(Material.objects.all(), user), lambda m: (m.course_id, None)
+    ),
+    "feedback": Resource(
+        Feedback, FeedbackSerializer, lambda user: visible_to(Feedback.objects.all(), user), lambda f: (f.course_id, f.student_id)
+    ),
+}
+RESOURCE_FOR_MODEL = {r.model: name for name, r in RESOURCES.items()}
+
+
+def record_deletion(instance) -> Tombstone:
+    """Write the tombstone for a deleted row of a synced model."""
+    name = RESOURCE_FOR_MODEL[type(instance)]
+    course_id, user_id = RESOURCES[name].audience(instance)
+    return Tombstone.objects.create(resource=name, object_id=instance.pk, course_id=course_id, user_id=user_id)
+
+
+def _micros(value: datetime) -> int:
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(micros: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=micros)
+
+
+def _settings(name: str, default: int) -> int:
+    return int(getattr(settings, name, default))
+
+
+def encode_token(positions: dict[str, list[int]], issued: datetime) -> str:
+    return signing.dumps({"p": positions, "i": _micros(issued)}, salt=_SALT, compress=True)
+
+
+def decode_token(token: str) -> dict[str, list[int]]:
+    """Keyset positions from a client token, or 400/410 for a bad or stale one."""
+    try:
+        payload = signing.loads(token, salt=_SALT)
+        positions = {key: [int(ts), int(pk)] for key, (ts, pk) in payload["p"].items()}
+        issued = _datetime(int(payload["i"]))
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise ValidationError({"since": "Invalid sync token."})
+    if issued < timezone.now() - timedelta(days=_settings("API_SYNC_RETENTION_DAYS", 30)):
+        raise SyncTokenExpired()
+    return positions
+
+
+def _page(queryset: QuerySet, field: str, position: list[int], horizon: datetime) -> tuple[list, list[int], bool]:
+    """Up to PAGE_SIZE rows after `position` in (`field`, pk) order."""
+    at, pk = _datetime(position[0]), position[1]
+    queryset = queryset.filter(**{f"{field}__lte": horizon}).filter(
+        Q(**{f"{field}__gt": at}) | Q(**{field: at, "pk__gt": pk})
+    )
+    rows = list(queryset.order_by(field, "pk")[: PAGE_SIZE + 1])
+    more = len(rows) > PAGE_SIZE
+    rows = rows[:PAGE_SIZE]
+    if rows:
+        position = [_micros(getattr(rows[-1], field)), rows[-1].pk]
+    return rows, position, more
+
+
+def _tombstones(user) -> QuerySet:
+    owned = Course.objects.filter(owner_id=user.pk).order_by().values("pk")
+    enrolled = Enrolment.objects.filter(student_id=user.pk).order_by().values("course_id")
+    # Students whose enrolment was deleted still hear about the course going
+    unenrolled = Tombstone.objects.filter(resource="enrolments", user_id=user.pk).order_by().values("course_id")
+    return Tombstone.objects.filter(
+        Q(user_id=user.pk)
+        | Q(course_id__in=owned)
+        | Q(course_id__in=enrolled)
+        | Q(resource="courses", course_id__in=unenrolled)
+    )
+
+
+def changes_since(request, token: str | None) -> dict:
+    """The sync response body for `request.user` after `token`."""
+    user = request.user
+    positions = decode_token(token) if token else {}
+    now = timezone.now()
+    horizon = now - timedelta(seconds=_settings("API_SYNC_SETTLE_SECONDS", 1))
+    body: dict = {}
+    more = False
+
+    previous = dict(positions)
+    pages = {}
+    for name, resource in RESOURCES.items():
+        rows, positions[name], truncated = _page(resource.scope(user), "updated_at", previous.get(name, _START), horizon)
+        pages[name] = rows
+        more = more or truncated
+
+    # Courses a student joined since the last call arrive in full
+    after = previous.get("enrolments", _START)[0]
+    joined = {e.course_id for e in pages["enrolments"] if e.student_id == user.pk and _micros(e.created_at) > after}
+    if token and joined:
+        for name in ("courses", "materials", "feedback"):
+            seen = {row.pk for row in pages[name]}
+            field = "pk" if name == "courses" else "course_id"
+            pages[name] += list(RESOURCES[name].scope(user).filter(**{f"{field}__in": joined}).exclude(pk__in=seen))
+
+    deleted, positions["tombstones"], truncated = _page(
+        _tombstones(user), "deleted_at", previous.get("tombstones", _START), horizon
+    )
+    more = more or truncated
+    context = {"request": request}
+    for name, resource in RESOURCES.items():
+        body[name] = {
+            "changed": resource.serializer(pages[name], many=True, context=context).data,
+            "deleted": [t.object_id for t in deleted if t.resource == name],
+        }
+    return {"token": encode_token(positions, now), "more": more, **body}
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from activity.models import Notification
+from assignments.models import Assignment, AssignmentType, Attempt, Grade
+from courses.models import Course, Enrolment
+
+
+def _user(name, role):
+    u = User.objects.create_user(username=name, password="pw")
+    u.profile.role = role; u.profile.save(update_fields=["role"])
+    return u
+
+
+@pytest.fixture
+def course():
+    t = _user("ga_t", "teacher")
+    c = Course.objects.create(owner=t, title="Graded")
+    past = timezone.now() - timedelta(hours=1)
+    paper = Assignment.objects.create(course=c, type=AssignmentType.PAPER, title="Paper", deadline=past, is_published=True, max_marks=20)
+    quiz = Assignment.objects.create(course=c, type=AssignmentType.QUIZ, title="Quiz", is_published=True)
+    Assignment.objects.create(course=c, type=AssignmentType.PAPER, title="Draft")
+    students = [_user(f"ga_s{i}", "student") for i in range(3)]
+    for s in students:
+        Enrolment.objects.create(course=c, student=s)
+    attempts = [Attempt.objects.create(assignment=paper, student=s) for s in students]
+    return {"t": t, "c": c, "paper": paper, "quiz": quiz, "students": students, "attempts": attempts}
+
+
+@pytest.mark.django_db
+def test_role_aware_assignment_attempt_and_grade_lists(course):
+    s = course["students"][0]
+    student, teacher, outsider = Client(), Client(), Client()
+    student.force_login(s); teacher.force_login(course["t"]); outsider.force_login(_user("ga_o", "student"))
+
+    titles = lambda client: sorted(a["title"] for a in client.get("/api/v1/assignments/").json()["results"])
+    assert titles(teacher) == ["Draft", "Paper", "Quiz"]
+    assert titles(student) == ["Paper", "Quiz"]
+    assert titles(outsider) == []
+
+    assert len(teacher.get("/api/v1/attempts/").json()["results"]) == 3
+    own = student.get("/api/v1/attempts/").json()["results"]
+    assert [a["id"] for a in own] == [course["attempts"][0].pk]
+
+    # Unreleased marks stay hidden from the student, and ungraded grades are absent
+    Attempt.objects.filter(pk=course["attempts"][0].pk).update(marks_awarded=7.0)
+    assert student.get(f"/api/v1/attempts/{own[0]['id']}/").json()["marks_awarded"] is None
+    assert teacher.get(f"/api/v1/attempts/{own[0]['id']}/").json()["marks_awarded"] == 7.0
+    Grade.objects.create(assignment=course["paper"], course=course["c"], student=s, achieved_marks=7.0, max_marks=20)
+    assert student.get("/api/v1/grades/").json()["results"] == []
+    assert len(teacher.get("/api/v1/grades/").json()["results"]) == 1
+
+
+@pytest.mark.django_db
+def test_bulk_grades_apply_in_one_transaction(course):
+    teacher = Client(); teacher.force_login(course["t"])
+    a1, a2, a3 = course["attempts"]
+    payload = {"grades": [{"attempt": a1.pk, "marks_awarded": 15}, {"attempt": a2.pk, "marks_awarded": 25}]}
+    r = teacher.post("/api/v1/grades/bulk/", payload, content_type="application/json")
+    assert r.status_code == 400 and r.json()["errors"] == [{"row": 1, "attempt": a2.pk, "detail": "Marks must be between 0 and 20.0."}]
+    assert not Grade.objects.exists()
+
+    payload = {"grades": [{"attempt": a.pk, "marks_awarded": 10 + i, "feedback_text": "ok"} for i, a in enumerate((a1, a2, a3))]}
+    r = teacher.post("/api/v1/grades/bulk/", payload, content_type="application/json")
+    assert r.status_code == 200
+    assert sorted(g["achieved_marks"] for g in r.json()) == [10.0, 11.0, 12.0]
+    assert all(g["released_at"] for g in r.json())
+    assert Attempt.objects.filter(released=True, graded_by=course["t"]).count() == 3
+    assert Notification.objects.filter(type=Notification.TYPE_GRADE).count() == 3
+
+    # Students and other teachers cannot grade
+    other = Client(); other.force_login(_user("ga_t2", "teacher"))
+    r = other.post("/api/v1/grades/bulk/", payload, content_type="application/json")
+    assert r.status_code == 400 and {e["detail"] for e in r.json()["errors"]} == {"Attempt not found."}
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_gradebook_matrix_uses_fixed_queries(course):
+    teacher = Client(); teacher.force_login(course["t"])
+    url = f"/api/v1/courses/{course['c'].pk}/gradebook/"
+
+    def fetch():
+        with CaptureQueriesContext(connection) as ctx:
+            r = teacher.get(url)
+        assert r.status_code == 200
+        return r.json(), len(ctx)
+
+    for s in course["students"]:
+        Grade.objects.create(assignment=course["paper"], course=course["c"], student=s, achieved_marks=10, max_marks=20)
+    fetch()  # warm the session and user caches
+    small, queries = fetch()
+    assert [a["title"] for a in small["assignments"]] == ["Paper", "Quiz"]
+    assert small["students"][0]["grades"][0]["achieved_marks"] == 10.0 and small["students"][0]["grades"][1] is None
+    assert small["students"][0]["percentage"] == 50.0
+
+    for i in range(20):
+        s = _user(f"ga_x{i}", "student")
+        Enrolment.objects.create(course=course["c"], student=s)
+        Grade.objects.create(assignment=course["quiz"], course=course["c"], student=s, achieved_marks=50, max_marks=100)
+    large, more_queries = fetch()
+    assert len(large["students"]) == 23 and more_queries == queries
+
+    student = Client(); student.force_login(course["students"][0])
+    assert student.get(url).status_code == 403
+
+
+@pytest.mark.django_db
+def test_expanded_assignment_and_course_change_the_etag(course):
+    teacher = Client(); teacher.force_login(course["t"])
+    Grade.objects.create(assignment=course["paper"], course=course["c"], student=course["students"][0], achieved_marks=5, max_marks=20)
+    urls = ["/api/v1/attempts/?expand=assignment", "/api/v1/grades/?expand=assignment,course"]
+    etags = {url: teacher.get(url)["ETag"] for url in urls}
+    course["paper"].title = "Essay"; course["paper"].save()
+    for url in urls:
+        r = teacher.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert r.status_code == 200 and r.json()["results"][0]["assignment"]["title"] == "Essay"
+
+    etag = teacher.get(urls[1])["ETag"]
+    course["c"].title = "Regraded"; course["c"].save()
+    r = teacher.get(urls[1], HTTP_IF_NONE_MATCH=etag)
+    assert r.status_code == 200 and r.json()["results"][0]["course"]["title"] == "Regraded"
+
+
+@pytest.mark.django_db
+def test_gradebook_form_enforces_the_deadline_through_grading_error(course):
+    course["paper"].deadline = timezone.now() + timedelta(days=1); course["paper"].save()
+    teacher = Client(); teacher.force_login(course["t"])
+    r = teacher.post(f"/assignments/attempt/{course['attempts'][0].pk}/grade/", {"marks_awarded": 5}, follow=True)
+    assert "Cannot grade before the deadline." in r.content.decode()
+    assert not Grade.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_sparse_attempt_list_loads_release_columns_up_front(course):
+    teacher, student = Client(), Client()
+    teacher.force_login(course["t"]); student.force_login(course["students"][0])
+    url = "/api/v1/attempts/?fields=id,score"
+
+    def queries(client):
+        client.get(url)  # warm the session and user caches
+        with CaptureQueriesContext(connection) as ctx:
+            r = client.get(url)
+        assert r.status_code == 200
+        return r.json()["results"], len(ctx)
+
+    few = queries(teacher)[1]
+    for i in range(9):
+        s = _user(f"ga_y{i}", "student")
+        Attempt.objects.create(assignment=course["paper"], student=s, score=1.0)
+    rows, many = queries(teacher)
+    assert len(rows) == 12 and many == few
+
+    # Still hidden from the student while unreleased
+    Attempt.objects.filter(pk=course["attempts"][0].pk).update(score=3.0)
+    assert queries(student)[0] == [{"id": course["attempts"][0].pk, "score": None}]
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from api import batch as batch_module
+from courses.models import Course, Enrolment
+
+
+@pytest.fixture
+def student():
+    t = User.objects.create_user(username="batch_t", password="pw")
+    t.profile.role = "teacher"; t.profile.save(update_fields=["role"])
+    s = User.objects.create_user(username="batch_s", password="pw")
+    for i in range(3):
+        c = Course.objects.create(owner=t, title=f"B{i}")
+        Enrolment.objects.create(course=c, student=s)
+    return s
+
+
+def _batch(client, *paths, **kwargs):
+    body = {"requests": [p if isinstance(p, dict) else {"path": p} for p in paths]}
+    return client.post("/api/v1/batch", body, content_type="application/json", **kwargs)
+
+
+@pytest.mark.django_db
+def test_batch_matches_separate_requests(student):
+    c = Client(); c.force_login(student)
+    courses = list(Course.objects.order_by("pk"))
+    paths = ["/api/v1/courses/", "/api/v1/enrolments/", f"/api/v1/courses/{courses[0].pk}/", "/api/v1/courses/?fields=id&page_size=2"]
+    r = _batch(c, *paths)
+    assert r.status_code == 200
+    items = r.json()["responses"]
+    assert [i["path"] for i in items] == paths
+    for item in items:
+        direct = c.get(item["path"])
+        assert item["status"] == direct.status_code == 200
+        assert item["body"] == direct.json() and item["headers"]["ETag"] == direct["ETag"]
+
+    # Conditional sub-requests revalidate
+    again = _batch(c, {"path": "/api/v1/courses/", "headers": {"If-None-Match": items[0]["headers"]["ETag"]}})
+    assert again.json()["responses"][0]["status"] == 304 and again.json()["responses"][0]["body"] is None
+    # If-Modified-Since is not forwarded: it cannot see deletions
+    ims = _batch(c, {"path": "/api/v1/courses/", "headers": {"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"}})
+    assert ims.json()["responses"][0]["status"] == 200 and "Last-Modified" not in ims.json()["responses"][0]["headers"]
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_batch_resolves_user_and_access_once(student):
+    c = Client(); c.force_login(student)
+    paths = [f"/api/v1/courses/{pk}/" for pk in Course.objects.values_list("pk", flat=True)]
+    _batch(c, paths[0])  # warm the session and user caches
+    separate = 0
+    for p in paths:
+        with CaptureQueriesContext(connection) as ctx:
+            assert c.get(p).status_code == 200
+        separate += len(ctx)
+    with CaptureQueriesContext(connection) as ctx:
+        r = _batch(c, *paths)
+    assert [i["status"] for i in r.json()["responses"]] == [200, 200, 200]
+    # One access load (courses/access.py) serves every retrieve
+    assert sum("UNION" in q["sql"] for q in ctx.captured_queries) == 1
+    assert len(ctx) < separate
+
+
+@pytest.mark.django_db
+def test_batch_rejects_bad_items(student):
+    c = Client()
+    items = _batch(c, "/accounts/profile/", "/api/v1/nope/", "/api/v1/batch", "https://evil.example/api/v1/courses/", "/api/v1/enrolments/").json()["responses"]
+    assert [i["status"] for i in items] == [400, 404, 400, 400, 200]
+    assert items[-1]["body"]["results"] == []  # anonymous: no enrolments
+    assert _batch(c, *["/api/v1/courses/"] * (batch_module.MAX_REQUESTS + 1)).status_code == 400
+    assert c.post("/api/v1/batch", {"requests": []}, content_type="application/json").status_code == 400
+
+
+def test_batch_runs_in_parallel_where_safe(settings, monkeypatch):
+    settings.API_BATCH_WORKERS = 3
+    threads = set()
+
+    def fake_dispatch(parent, spec):
+        threads.add(threading.current_thread().name)
+        time.sleep(0.05)
+        return {"path": spec["path"]}
+
+    monkeypatch.setattr(batch_module, "_dispatch", fake_dispatch)
+    monkeypatch.setattr(batch_module, "close_old_connections", lambda: None)
+    monkeypatch.setattr(batch_module, "parallel_safe", lambda: True)
+    specs = [{"path": str(i)} for i in range(6)]
+    assert [r["path"] for r in batch_module.run_batch(None, specs)] == [str(i) for i in range(6)]
+    assert len(threads) > 1 and all(t.startswith("api-batch") for t in threads)
+
+    threads.clear()
+    monkeypatch.setattr(batch_module, "parallel_safe", lambda: False)
+    batch_module.run_batch(None, specs)
+    assert threads == {threading.current_thread().name}
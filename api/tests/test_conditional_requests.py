@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+
+from courses.models import Course, Enrolment
+
+
+@pytest.fixture
+def teacher():
+    t = User.objects.create_user(username="etag_t", password="pw")
+    t.profile.role = "teacher"; t.profile.save(update_fields=["role"])
+    return t
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_course_list_revalidates_with_304_before_serialization(teacher):
+    for i in range(5):
+        Course.objects.create(owner=teacher, title=f"E{i}")
+    c = Client()
+    r1 = c.get("/api/v1/courses/")
+    etag = r1["ETag"]
+    assert r1.status_code == 200 and "no-cache" in r1["Cache-Control"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        r2 = c.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=etag)
+    assert r2.status_code == 304 and r2.content == b""
+    # Only the validator aggregate ran: no page fetch, no separate COUNT
+    assert len(ctx.captured_queries) == 1 and "MAX(" in ctx.captured_queries[0]["sql"]
+
+    # Query parameters are part of the validator
+    assert c.get("/api/v1/courses/?ordering=title", HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    # Edits (signals) and bulk inserts (aggregate) both change the ETag
+    course = Course.objects.first()
+    course.title = "Renamed"; course.save()
+    r3 = c.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=etag)
+    assert r3.status_code == 200 and r3["ETag"] != etag
+    Course.objects.bulk_create([Course(owner=teacher, title="Bulk")])
+    r4 = c.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=r3["ETag"])
+    assert r4.status_code == 200 and r4["ETag"] != r3["ETag"]
+
+    # Owner details are embedded, so a profile change invalidates too
+    teacher.profile.full_name = "Dr T"; teacher.profile.save()
+    assert c.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=r4["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_retrieve_honours_etag(teacher):
+    course = Course.objects.create(owner=teacher, title="Detail")
+    c = Client(); c.force_login(teacher)
+    r1 = c.get(f"/api/v1/courses/{course.pk}/")
+    assert r1.status_code == 200 and not r1.has_header("Last-Modified")
+    assert c.get(f"/api/v1/courses/{course.pk}/", HTTP_IF_NONE_MATCH=r1["ETag"]).status_code == 304
+    # A nested owner edit leaves the course's updated_at alone
+    teacher.username = "etag_t2"; teacher.save()
+    assert c.get(f"/api/v1/courses/{course.pk}/", HTTP_IF_NONE_MATCH=r1["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_if_modified_since_never_hides_a_delete(teacher):
+    Course.objects.create(owner=teacher, title="Keep")
+    gone = Course.objects.create(owner=teacher, title="Gone")
+    c = Client()
+    r1 = c.get("/api/v1/courses/")
+    since = http_date(time.time() + 60)
+    gone.delete()
+    r2 = c.get("/api/v1/courses/", HTTP_IF_MODIFIED_SINCE=since)
+    assert r2.status_code == 200 and [x["title"] for x in r2.json()["results"]] == ["Keep"]
+    assert c.get("/api/v1/courses/", HTTP_IF_NONE_MATCH=r1["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_validators_are_per_user_and_follow_visibility(teacher):
+    student = User.objects.create_user(username="etag_s", password="pw")
+    course = Course.objects.create(owner=teacher, title="Vis")
+    c = Client(); c.force_login(student)
+    r1 = c.get("/api/v1/materials/")
+    Enrolment.objects.create(course=course, student=student)
+    assert c.get("/api/v1/materials/", HTTP_IF_NONE_MATCH=r1["ETag"]).status_code == 200
+
+    other = Client(); other.force_login(teacher)
+    assert other.get("/api/v1/materials/", HTTP_IF_NONE_MATCH=r1["ETag"]).status_code == 200
+
+
+@pytest.mark.django_db
+def test_etags_require_a_shared_cache_outside_debug(settings, teacher):
+    from api.checks import etag_versions_are_shared
+
+    settings.DEBUG = False
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    assert [e.id for e in etag_versions_are_shared(None)] == ["api.E001"]
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://cache"}}
+    assert etag_versions_are_shared(None) == []
+
+    # Turned off, the API answers every request in full and the check passes
+    settings.CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    settings.API_ETAGS = False
+    assert etag_versions_are_shared(None) == []
+    Course.objects.create(owner=teacher, title="No ETag")
+    c = Client(); c.force_login(teacher)
+    for url in ("/api/v1/courses/", f"/api/v1/courses/{Course.objects.get().pk}/"):
+        r = c.get(url, HTTP_IF_NONE_MATCH="*")
+        assert r.status_code == 200 and not r.has_header("ETag")
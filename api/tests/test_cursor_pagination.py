@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+
+def _walk(client: Client, url: str) -> tuple[list[dict], list[str]]:
+    rows, sql = [], []
+    while url:
+        with CaptureQueriesContext(connection) as ctx:
+            r = client.get(url)
+        assert r.status_code == 200
+        data = r.json()
+        assert "count" not in data
+        rows += data["results"]
+        sql += [q["sql"] for q in ctx.captured_queries]
+        url = data["next"]
+    return rows, sql
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_cursor_mode_walks_every_row_once_without_count():
+    User.objects.bulk_create([User(username=f"cur{i:03d}") for i in range(45)])
+    c = Client()
+    rows, sql = _walk(c, "/api/v1/users/?pagination=cursor&page_size=20")
+    ids = [row["id"] for row in rows]
+    assert len(ids) == len(set(ids)) == User.objects.count()
+    assert ids == sorted(ids, reverse=True)  # primary key, newest first
+    assert not any("COUNT(" in q.upper() for q in sql)
+
+    # A client ordering is honoured and stays stable across pages
+    rows, _ = _walk(c, "/api/v1/users/?pagination=cursor&page_size=7&ordering=username")
+    names = [row["username"] for row in rows]
+    assert names == sorted(names) and len(names) == User.objects.count()
+
+
+@pytest.mark.django_db
+def test_page_mode_stays_default_and_estimate_is_opt_in():
+    User.objects.bulk_create([User(username=f"est{i:03d}") for i in range(12)])
+    c = Client()
+    assert "count" in c.get("/api/v1/users/").json()
+
+    r = c.get("/api/v1/users/?pagination=cursor&page_size=5")
+    assert "X-Estimated-Count" not in r
+    r = c.get("/api/v1/users/?pagination=cursor&page_size=5&estimate=1")
+    assert int(r["X-Estimated-Count"]) == User.objects.count()
+    # Following a cursor link keeps cursor mode
+    assert "results" in c.get(r.json()["next"]).json()
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import json
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import Client
+
+from api.renderers import FastJSONRenderer
+from courses.models import Course
+
+
+@pytest.fixture
+def courses():
+    t = User.objects.create_user(username="fast_t", password="pw")
+    t.profile.role = "teacher"; t.profile.save(update_fields=["role"])
+    Course.objects.bulk_create([Course(owner=t, title=f"F{i:02d}", description="d é") for i in range(25)])
+    return t
+
+
+@pytest.mark.django_db
+def test_fast_lists_match_serializer_output(courses):
+    User.objects.create_user(username="fast_s", password="pw")
+    c = Client()
+    # ?expand=owner / ?fields=... take the serializer path with the same shape
+    pairs = [
+        ("/api/v1/courses/", "/api/v1/courses/?expand=owner"),
+        ("/api/v1/courses/?ordering=-title&page=2", "/api/v1/courses/?ordering=-title&page=2&expand=owner"),
+        ("/api/v1/users/", "/api/v1/users/?fields=id,username,role"),
+    ]
+    for fast, slow in pairs:
+        a, b = c.get(fast), c.get(slow)
+        assert a.status_code == b.status_code == 200
+        assert a.json()["results"] == b.json()["results"] and a.json()["count"] == b.json()["count"]
+
+    # Cursor pages work on values() rows too
+    titles, url = [], "/api/v1/courses/?pagination=cursor&ordering=title&page_size=10"
+    while url:
+        data = c.get(url).json()
+        titles += [row["title"] for row in data["results"]]
+        url = data["next"]
+    assert titles == sorted(titles) and len(titles) == 25
+
+
+def test_fast_renderer_matches_drf_bytes():
+    from rest_framework.renderers import JSONRenderer
+
+    data = {"a": "x y", "b": [1, 2.5, None, True], "c": {"d": "é"}}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+    indented = FastJSONRenderer().render(data, "application/json; indent=2")
+    assert indented == JSONRenderer().render(data, "application/json; indent=2")
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_serializer_throughput_benchmark(courses):
+    out = StringIO()
+    call_command("benchmark_serializers", "--rows", "25", "--iterations", "2", "--json", stdout=out)
+    rows = json.loads(out.getvalue())
+    assert {r["name"] for r in rows} == {"courses", "users"}
+    courses_rows = [r for r in rows if r["name"] == "courses"]
+    assert courses_rows[0]["variant"] == "serializer" and courses_rows[0]["rows"] == 25
+    assert all(r["rows_per_s"] > 0 for r in rows)
@@ -35,6 +35,6 @@ class TestQueryCounts(TestCase):
         # Enrol student into one course
         Enrolment.objects.create(course=Course.objects.first(), student=student)
         c = Client(); assert c.login(username='sqc', password='pw')
-        with self.assertNumQueries(5):  # allow a few for auth/session/select_related
+        with self.assertNumQueries(3):  # auth user with profile, count, page (session comes from the cache)
             r = c.get('/api/v1/enrolments/')
             assert r.status_code == 200
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from courses.models import Course, Enrolment
+
+
+@pytest.fixture
+def course():
+    t = User.objects.create_user(username="sparse_t", password="pw")
+    t.profile.role = "teacher"; t.profile.save(update_fields=["role"])
+    for i in range(3):
+        Course.objects.create(owner=t, title=f"S{i}", description="long text " * 50)
+    return Course.objects.order_by("title").first()
+
+
+def _page_sql(ctx) -> str:
+    return next(q["sql"] for q in ctx.captured_queries if "LIMIT" in q["sql"])
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_fields_narrow_payload_and_query(course):
+    c = Client()
+    with CaptureQueriesContext(connection) as ctx:
+        rows = c.get("/api/v1/courses/?fields=id,title").json()["results"]
+    assert rows[0] == {"id": course.pk, "title": "S0"}
+    sql = _page_sql(ctx)
+    assert "JOIN" not in sql and '"description"' not in sql and '"auth_user"' not in sql
+
+    # Unexpanded relations become ids
+    rows = c.get("/api/v1/courses/?fields=id,owner").json()["results"]
+    assert rows[0] == {"id": course.pk, "owner": course.owner_id}
+
+    # Expanded relations join only what the nested serializer reads
+    with CaptureQueriesContext(connection) as ctx:
+        rows = c.get("/api/v1/courses/?fields=id,owner&expand=owner").json()["results"]
+    assert rows[0]["owner"] == {"id": course.owner_id, "username": "sparse_t", "role": "teacher"}
+    sql = _page_sql(ctx)
+    assert '"accounts_userprofile"."role"' in sql and '"auth_user"."password"' not in sql
+
+    # Default representation is unchanged
+    row = c.get("/api/v1/courses/").json()["results"][0]
+    assert set(row) == {"id", "title", "description", "owner", "created_at", "updated_at"}
+    assert isinstance(row["owner"], dict)
+
+
+@pytest.mark.django_db
+def test_expand_adds_nesting_and_writes_ignore_parameters(course):
+    student = User.objects.create_user(username="sparse_s", password="pw")
+    Enrolment.objects.create(course=course, student=student)
+    c = Client(); c.force_login(student)
+
+    row = c.get("/api/v1/enrolments/?expand=course").json()["results"][0]
+    assert row["course"]["title"] == "S0" and row["course"]["owner"]["username"] == "sparse_t"
+    assert row["student"]["username"] == "sparse_s"
+
+    row = c.get("/api/v1/enrolments/?fields=id,course,student").json()["results"][0]
+    assert row == {"id": row["id"], "course": course.pk, "student": student.pk}
+
+    # Cursor pages keep working on a narrowed queryset
+    r = c.get("/api/v1/courses/?pagination=cursor&ordering=title&page_size=2&fields=id,title")
+    assert [x["title"] for x in r.json()["results"]] == ["S0", "S1"]
+
+    other = Course.objects.exclude(pk=course.pk).first()
+    r = c.post("/api/v1/enrolments/?fields=id", {"course": other.pk}, content_type="application/json")
+    assert r.status_code == 201 and r.json()["student"]["username"] == "sparse_s"
+
+
+@pytest.mark.django_db
+def test_expanded_relations_are_part_of_the_etag(course):
+    from courses.models_feedback import Feedback
+
+    s = User.objects.create_user(username="sparse_s", password="pw")
+    s.profile.role = "student"; s.profile.save(update_fields=["role"])
+    Enrolment.objects.create(course=course, student=s)
+    Feedback.objects.create(course=course, student=s, rating=4)
+    c = Client(); c.force_login(s)
+    urls = ["/api/v1/enrolments/?expand=course", "/api/v1/feedback/?expand=course"]
+    etags = {url: c.get(url)["ETag"] for url in urls}
+    course.title = "Renamed"; course.save()
+    for url in urls:
+        r = c.get(url, HTTP_IF_NONE_MATCH=etags[url])
+        assert r.status_code == 200 and r.json()["results"][0]["course"]["title"] == "Renamed"
+
+    # The course's nested owner (User and UserProfile) counts as well
+    etag = c.get(urls[1])["ETag"]
+    course.owner.profile.full_name = "Dr S"; course.owner.profile.save()
+    assert c.get(urls[1], HTTP_IF_NONE_MATCH=etag).status_code == 200
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+from django.utils import timezone
+
+from api import sync as sync_module
+from api.models import Tombstone
+from courses.models import Course, Enrolment
+from courses.models_feedback import Feedback
+from materials.models import Material
+
+
+@pytest.fixture
+def world(settings):
+    settings.API_SYNC_SETTLE_SECONDS = 0
+    t = User.objects.create_user(username="sync_t", password="pw")
+    t.profile.role = "teacher"; t.profile.save(update_fields=["role"])
+    s = User.objects.create_user(username="sync_s", password="pw")
+    c1 = Course.objects.create(owner=t, title="C1")
+    c2 = Course.objects.create(owner=t, title="C2")
+    Course.objects.create(owner=User.objects.create_user(username="sync_o", password="pw"), title="Other")
+    m1 = Material.objects.create(course=c1, uploaded_by=t, title="M1", file="m1.pdf")
+    m2 = Material.objects.create(course=c2, uploaded_by=t, title="M2", file="m2.pdf")
+    Enrolment.objects.create(course=c1, student=s)
+    return {"t": t, "s": s, "c1": c1, "c2": c2, "m1": m1, "m2": m2}
+
+
+def _sync(client, token=""):
+    r = client.get("/api/v1/sync", {"since": token} if token else {})
+    assert r.status_code == 200, r.content
+    return r.json()
+
+
+def _ids(body, name, key="changed"):
+    rows = body[name][key]
+    return sorted(r["id"] for r in rows) if key == "changed" else sorted(rows)
+
+
+@pytest.mark.django_db
+def test_sync_returns_only_changes_since_token(world):
+    c = Client(); c.force_login(world["s"])
+    full = _sync(c)
+    assert _ids(full, "courses") == [world["c1"].pk]
+    assert _ids(full, "materials") == [world["m1"].pk] and len(full["enrolments"]["changed"]) == 1
+    assert full["more"] is False
+
+    quiet = _sync(c, full["token"])
+    assert all(not quiet[n]["changed"] and not quiet[n]["deleted"] for n in sync_module.RESOURCES)
+
+    world["c1"].title = "C1 renamed"; world["c1"].save()
+    fb = Feedback.objects.create(course=world["c1"], student=world["s"], rating=5)
+    mid = world["m1"].pk
+    world["m1"].delete()
+    delta = _sync(c, quiet["token"])
+    assert [r["title"] for r in delta["courses"]["changed"]] == ["C1 renamed"]
+    assert _ids(delta, "feedback") == [fb.pk]
+    assert _ids(delta, "materials", "deleted") == [mid] and not delta["materials"]["changed"]
+    assert not delta["enrolments"]["changed"]
+
+
+@pytest.mark.django_db
+def test_joining_a_course_brings_its_existing_rows(world):
+    c = Client(); c.force_login(world["s"])
+    token = _sync(c)["token"]
+    Enrolment.objects.create(course=world["c2"], student=world["s"])
+    delta = _sync(c, token)
+    assert _ids(delta, "courses") == [world["c2"].pk]
+    assert _ids(delta, "materials") == [world["m2"].pk]
+
+
+@pytest.mark.django_db
+def test_unenrolment_and_course_deletion_reach_the_student(world):
+    c = Client(); c.force_login(world["s"])
+    token = _sync(c)["token"]
+    enrolment = Enrolment.objects.get(student=world["s"])
+    course_id = world["c1"].pk
+    world["c1"].delete()  # cascades to the enrolment and material
+    delta = _sync(c, token)
+    assert _ids(delta, "enrolments", "deleted") == [enrolment.pk]
+    assert _ids(delta, "courses", "deleted") == [course_id]
+    assert Tombstone.objects.filter(resource="materials", object_id=world["m1"].pk).exists()
+
+    # Other users hear nothing about it
+    other = Client(); other.force_login(User.objects.get(username="sync_o"))
+    assert not _sync(other)["courses"]["deleted"]
+
+
+@pytest.mark.django_db
+def test_sync_pages_through_large_changes(world, monkeypatch):
+    monkeypatch.setattr(sync_module, "PAGE_SIZE", 3)
+    Course.objects.bulk_create([Course(owner=world["t"], title=f"B{i}") for i in range(7)])
+    c = Client(); c.force_login(world["t"])
+    seen, token, calls = [], "", 0
+    while True:
+        body = _sync(c, token)
+        seen += _ids(body, "courses")
+        token, calls = body["token"], calls + 1
+        if not body["more"]:
+            break
+    assert len(seen) == len(set(seen)) == 9 and calls == 3
+
+
+@pytest.mark.django_db
+def test_bad_expired_and_anonymous_requests(world):
+    c = Client()
+    assert c.get("/api/v1/sync").status_code in (401, 403)
+    c.force_login(world["s"])
+    assert c.get("/api/v1/sync", {"since": "not-a-token"}).status_code == 400
+    stale = sync_module.encode_token({}, timezone.now() - timedelta(days=31))
+    assert c.get("/api/v1/sync", {"since": stale}).status_code == 410
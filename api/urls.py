@@ -19,7 +19,12 @@ from .views import (
     MaterialViewSet,
     FeedbackViewSet,
     StatusViewSet,
+    AssignmentViewSet,
+    AttemptViewSet,
+    GradeViewSet,
     search_users,
+    sync,
+    batch,
 )
 
 router = DefaultRouter()
@@ -29,6 +34,9 @@ router.register(r"api/v1/enrolments", EnrolmentViewSet, basename="enrolments")
 router.register(r"api/v1/materials", MaterialViewSet, basename="materials")
 router.register(r"api/v1/feedback", FeedbackViewSet, basename="feedback")
 router.register(r"api/v1/status", StatusViewSet, basename="status")
+router.register(r"api/v1/assignments", AssignmentViewSet, basename="assignments")
+router.register(r"api/v1/attempts", AttemptViewSet, basename="attempts")
+router.register(r"api/v1/grades", GradeViewSet, basename="grades")
 
 urlpatterns = [
     path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
@@ -44,5 +52,7 @@ urlpatterns = [
         name="redoc",
     ),
     path("api/v1/search/users", search_users, name="search-users"),
+    path("api/v1/sync", sync, name="sync"),
+    path("api/v1/batch", batch, name="batch"),
     path("", include(router.urls)),
 ]
@@ -2,16 +2,23 @@
 from __future__ import annotations
 
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from rest_framework import viewsets, mixins, status
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.decorators import action, api_view, permission_classes
-from rest_framework.permissions import AllowAny
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
 from rest_framework.response import Response
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 
 from accounts.models import UserProfile
+from activity.models import Notification
+from assignments.models import Assignment, Attempt, Grade
+from assignments.utils import compute_course_percentages, grading_error, record_marks
+from courses.access import access_for, visible_to
 from courses.models import Course, Enrolment
+from courses.enrolment import bulk_enrol, parse_identifiers_csv, size_error
 from courses.models_feedback import Feedback
 from materials.models import Material
 from activity.models import Status
@@ -19,30 +26,36 @@ from .serializers import (
     UserSerializer,
     CourseSerializer,
     EnrolmentSerializer,
+    BulkEnrolmentSerializer,
+    BulkEnrolmentResultSerializer,
     MaterialSerializer,
     FeedbackSerializer,
     StatusSerializer,
+    AssignmentSerializer,
+    AttemptSerializer,
+    GradeSerializer,
+    BulkGradeSerializer,
+    GradebookSerializer,
+    BatchSerializer,
+    BatchResultSerializer,
 )
+from .batch import run_batch
+from .conditional import ConditionalGetMixin
+from .fastpath import FastListMixin
+from .sync import changes_since
 from .permissions import IsAuthenticatedOrReadOnly, IsTeacher, IsStudent
 
 User = get_user_model()
 
 
-def _is_owner(user, course: Course) -> bool:
-    return bool(user and user.is_authenticated and course.owner_id == user.id)
-
-
-def _is_enrolled(user, course: Course) -> bool:
-    if not getattr(user, "is_authenticated", False):
-        return False
-    return Enrolment.objects.filter(course=course, student=user).exists()
-
-
 @extend_schema_view(
     list=extend_schema(tags=["Users"]),
     retrieve=extend_schema(tags=["Users"]),
 )
-class UserViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class UserViewSet(ConditionalGetMixin, FastListMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    etag_models = (User, UserProfile)
+    # Default list shape of UserSerializer, built from .values() rows
+    fast_fields = {"id": "id", "username": "username", "role": "profile__role"}
     queryset = User.objects.all().select_related("profile").order_by("username")
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -58,7 +71,17 @@ class UserViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.Gen
     partial_update=extend_schema(tags=["Courses"]),
     destroy=extend_schema(tags=["Courses"]),
 )
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(ConditionalGetMixin, FastListMixin, viewsets.ModelViewSet):
+    etag_models = (Course, User, UserProfile)
+    # Default list shape of CourseSerializer, built from .values() rows
+    fast_fields = {
+        "id": "id",
+        "title": "title",
+        "description": "description",
+        "owner": {"id": "owner_id", "username": "owner__username", "role": "owner__profile__role"},
+        "created_at": "created_at",
+        "updated_at": "updated_at",
+    }
     queryset = Course.objects.select_related("owner", "owner__profile").all()
     serializer_class = CourseSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
@@ -74,10 +97,78 @@ class CourseViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         course = self.get_object()
-        if not (_is_owner(request.user, course) or _is_enrolled(request.user, course)):
+        if not access_for(request).can_view(course):
             return Response({"detail": "Enrol to access this course."}, status=status.HTTP_403_FORBIDDEN)
         return super().retrieve(request, *args, **kwargs)
 
+    @extend_schema(tags=["Enrolments"], request=BulkEnrolmentSerializer, responses=BulkEnrolmentResultSerializer)
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="enrolments/bulk",
+        parser_classes=[JSONParser, MultiPartParser, FormParser],
+    )
+    def enrol_bulk(self, request, pk=None):
+        """Owner-only bulk enrolment from identifiers and/or a CSV file.
+
+        Idempotent: already-enrolled students are reported, not duplicated.
+        Returns a per-row result list and a status summary.
+        """
+        course = self.get_object()
+        if not access_for(request).is_owner(course):
+            raise PermissionDenied("Only the course owner can enrol students.")
+        serializer = BulkEnrolmentSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        identifiers = list(serializer.validated_data.get("identifiers") or [])
+        f = serializer.validated_data.get("file")
+        if f:
+            identifiers += parse_identifiers_csv(f.read())
+        error = size_error(identifiers)
+        if error:
+            raise ValidationError({"identifiers": [error]})
+        outcome = bulk_enrol(course, identifiers, actor=request.user)
+        return Response({"course": course.id, **outcome})
+
+    @extend_schema(tags=["Grades"], responses=GradebookSerializer)
+    @action(detail=True, methods=["get"], url_path="gradebook")
+    def gradebook(self, request, pk=None):
+        """Owner-only students x published assignments matrix with course %.
+
+        A fixed number of queries whatever the class size: the matrix is
+        built from `.values()` rows of assignments, enrolments and grades.
+        """
+        course = self.get_object()
+        if not access_for(request).is_owner(course):
+            raise PermissionDenied("Only the course owner can read the gradebook.")
+        assignments = list(
+            Assignment.objects.filter(course=course, is_published=True)
+            .order_by("title", "pk")
+            .values("id", "title", "type", "max_marks")
+        )
+        students = (
+            Enrolment.objects.filter(course=course)
+            .order_by("student__username")
+            .values("student_id", "student__username", "student__profile__student_number")
+        )
+        cells: dict[tuple[int, int], dict] = {
+            (g["student_id"], g["assignment_id"]): g
+            for g in Grade.objects.filter(course=course, assignment__is_published=True).values(
+                "student_id", "assignment_id", "achieved_marks", "max_marks", "released_at"
+            )
+        }
+        pcts = compute_course_percentages(course)
+        rows = [
+            {
+                "student": e["student_id"],
+                "username": e["student__username"],
+                "student_number": e["student__profile__student_number"],
+                "grades": [cells.get((e["student_id"], a["id"])) for a in assignments],
+                "percentage": pcts.get(e["student_id"], 0.0),
+            }
+            for e in students
+        ]
+        return Response(GradebookSerializer({"course": course.id, "assignments": assignments, "students": rows}).data)
+
 
 @extend_schema_view(
     list=extend_schema(tags=["Enrolments"]),
@@ -85,7 +176,8 @@ class CourseViewSet(viewsets.ModelViewSet):
     create=extend_schema(tags=["Enrolments"]),
     destroy=extend_schema(tags=["Enrolments"]),
 )
-class EnrolmentViewSet(viewsets.ModelViewSet):
+class EnrolmentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    etag_models = (Enrolment, User, UserProfile)
     serializer_class = EnrolmentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -118,11 +210,13 @@ class EnrolmentViewSet(viewsets.ModelViewSet):
         profile = getattr(self.request.user, "profile", None)
         if getattr(profile, "role", None) != "student":
             raise PermissionDenied("Only students can enrol.")
-        course = serializer.validated_data.get("course")
-        # Prevent duplicate enrolments with a friendly 400 instead of DB error
-        if Enrolment.objects.filter(course=course, student=self.request.user).exists():
+        # Rely on the unique (course, student) constraint rather than a
+        # pre-insert exists() query; report duplicates as a friendly 400.
+        try:
+            with transaction.atomic():
+                serializer.save(student=self.request.user)
+        except IntegrityError:
             raise ValidationError({"detail": "Already enrolled in this course."})
-        serializer.save(student=self.request.user)
 
     def destroy(self, request, *args, **kwargs):
         # Student can unenrol self; teacher owner can remove any from own course
@@ -130,7 +224,7 @@ class EnrolmentViewSet(viewsets.ModelViewSet):
         user = request.user
         if instance.student_id == user.id:
             return super().destroy(request, *args, **kwargs)
-        if _is_owner(user, instance.course):
+        if access_for(request).is_owner(instance.course):
             return super().destroy(request, *args, **kwargs)
         return Response({"detail": "Not permitted."}, status=status.HTTP_403_FORBIDDEN)
 
@@ -139,18 +233,16 @@ class EnrolmentViewSet(viewsets.ModelViewSet):
     list=extend_schema(tags=["Materials"]),
     retrieve=extend_schema(tags=["Materials"]),
 )
-class MaterialViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+class MaterialViewSet(ConditionalGetMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    # Visibility follows course ownership and enrolments
+    etag_models = (Material, Course, Enrolment)
     serializer_class = MaterialSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         # Owner or enrolled can see materials; otherwise none
-        user = self.request.user
-        qs = Material.objects.select_related("course").all()
-        if not user.is_authenticated:
-            return Material.objects.none()
         # Owners can see their course materials; students see where enrolled
-        qs = qs.filter(Q(course__owner=user) | Q(course__enrolments__student=user)).distinct()
+        qs = visible_to(Material.objects.select_related("course"), self.request.user)
         course_id = self.request.query_params.get("course")
         if course_id:
             qs = qs.filter(course_id=course_id)
@@ -165,7 +257,8 @@ class MaterialViewSet(mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets
     partial_update=extend_schema(tags=["Feedback"]),
     destroy=extend_schema(tags=["Feedback"]),
 )
-class FeedbackViewSet(viewsets.ModelViewSet):
+class FeedbackViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    etag_models = (Feedback,)
     serializer_class = FeedbackSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     ordering_fields = ["created_at", "rating"]
@@ -185,7 +278,7 @@ class FeedbackViewSet(viewsets.ModelViewSet):
             raise PermissionDenied("Authentication required.")
         if getattr(getattr(user, "profile", None), "role", None) != "student":
             raise PermissionDenied("Only students can leave feedback.")
-        if not Enrolment.objects.filter(course=course, student=user).exists():
+        if not access_for(self.request).is_enrolled(course):
             raise PermissionDenied("Enrol before leaving feedback.")
         serializer.save(student=user)
 
@@ -203,7 +296,8 @@ class FeedbackViewSet(viewsets.ModelViewSet):
     create=extend_schema(tags=["Status"]),
     destroy=extend_schema(tags=["Status"]),
 )
-class StatusViewSet(viewsets.ModelViewSet):
+class StatusViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    etag_models = (Status,)
     serializer_class = StatusSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     ordering_fields = ["created_at", "id"]
@@ -224,6 +318,144 @@ class StatusViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
+def _owned_and_enrolled(user):
+    """(owned course pks, enrolled course ids) subqueries for role-aware querysets."""
+    owned = Course.objects.filter(owner_id=user.pk).order_by().values("pk")
+    enrolled = Enrolment.objects.filter(student_id=user.pk).order_by().values("course_id")
+    return owned, enrolled
+
+
+@extend_schema_view(
+    list=extend_schema(tags=["Assignments"]),
+    retrieve=extend_schema(tags=["Assignments"]),
+)
+class AssignmentViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    etag_models = (Assignment, Course, Enrolment)
+    serializer_class = AssignmentSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    ordering_fields = ["title", "deadline", "created_at", "updated_at"]
+
+    def get_queryset(self):
+        # Owners: every assignment in their courses; students: published ones where enrolled
+        user = self.request.user
+        if not user.is_authenticated:
+            return Assignment.objects.none()
+        owned, enrolled = _owned_and_enrolled(user)
+        qs = Assignment.objects.filter(Q(course__in=owned) | Q(course__in=enrolled, is_published=True))
+        course_id = self.request.query_params.get("course")
+        if course_id:
+            qs = qs.filter(course_id=course_id)
+        return qs
+
+
+@extend_schema_view(
+    list=extend_schema(tags=["Assignments"]),
+    retrieve=extend_schema(tags=["Assignments"]),
+)
+class AttemptViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    etag_models = (Attempt,)
+    serializer_class = AttemptSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    ordering_fields = ["submitted_at", "attempt_no"]
+
+    def get_queryset(self):
+        # Students: own attempts (marks hidden until released); owners: attempts in their courses
+        user = self.request.user
+        if not user.is_authenticated:
+            return Attempt.objects.none()
+        owned, _ = _owned_and_enrolled(user)
+        qs = Attempt.objects.filter(Q(student_id=user.pk) | Q(assignment__course__in=owned))
+        params = self.request.query_params
+        if params.get("assignment"):
+            qs = qs.filter(assignment_id=params["assignment"])
+        if params.get("course"):
+            qs = qs.filter(assignment__course_id=params["course"])
+        return qs.order_by("-submitted_at")
+
+
+@extend_schema_view(
+    list=extend_schema(tags=["Grades"]),
+    retrieve=extend_schema(tags=["Grades"]),
+)
+class GradeViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
+    etag_models = (Grade,)
+    serializer_class = GradeSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    ordering_fields = ["updated_at", "achieved_marks"]
+
+    def get_queryset(self):
+        # Students: own released grades; owners: every grade in their courses
+        user = self.request.user
+        if not user.is_authenticated:
+            return Grade.objects.none()
+        owned, _ = _owned_and_enrolled(user)
+        qs = Grade.objects.filter(Q(course__in=owned) | Q(student_id=user.pk, released_at__isnull=False))
+        params = self.request.query_params
+        if params.get("course"):
+            qs = qs.filter(course_id=params["course"])
+        if params.get("assignment"):
+            qs = qs.filter(assignment_id=params["assignment"])
+        return qs.order_by("-updated_at")
+
+    @extend_schema(tags=["Grades"], request=BulkGradeSerializer, responses=GradeSerializer(many=True))
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """Owner-only: grade and release many attempts in one transaction.
+
+        Every row is checked first, with the same rules as the gradebook
+        form. If any row is rejected nothing is saved and the errors are
+        returned by row.
+        """
+        serializer = BulkGradeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data["grades"]
+        attempts = Attempt.objects.select_related("assignment", "assignment__course", "student").in_bulk(
+            [r["attempt"] for r in rows]
+        )
+        access = access_for(request)
+        errors, seen = [], set()
+        for i, row in enumerate(rows):
+            att = attempts.get(row["attempt"])
+            if att is None or not access.is_teacher_owner(att.assignment.course):
+                error = "Attempt not found."
+            elif row["attempt"] in seen:
+                error = "Attempt listed more than once."
+            else:
+                error = grading_error(att, row["marks_awarded"], row["override_reason"])
+            seen.add(row["attempt"])
+            if error:
+                errors.append({"row": i, "attempt": row["attempt"], "detail": error})
+        if errors:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            grades = []
+            for row in rows:
+                att = attempts[row["attempt"]]
+                grades.append(
+                    record_marks(
+                        att,
+                        row["marks_awarded"],
+                        grader=request.user,
+                        feedback_text=row["feedback_text"],
+                        override_reason=row["override_reason"],
+                    )
+                )
+            Notification.objects.bulk_create(
+                [
+                    Notification(
+                        user=att.student,
+                        actor=request.user,
+                        type=Notification.TYPE_GRADE,
+                        course=att.assignment.course,
+                        message=f"Grade released for {att.assignment.title}: {att.marks_awarded}/{att.assignment.max_marks}",
+                    )
+                    for att in (attempts[r["attempt"]] for r in rows)
+                ]
+            )
+        return Response(GradeSerializer(grades, many=True, context={"request": request}).data)
+
+
 @api_view(["GET"])
 @permission_classes([IsTeacher])
 @extend_schema(tags=["Search"]) 
@@ -235,3 +467,24 @@ def search_users(request):
         qs = User.objects.select_related("profile").filter(Q(username__icontains=q) | Q(email__icontains=q)).order_by("username")[:50]
     data = UserSerializer(qs, many=True).data
     return Response({"count": len(data), "results": data})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@extend_schema(
+    tags=["Sync"],
+    parameters=[OpenApiParameter("since", str, description="Token from the previous sync; omit for a full sync")],
+)
+def sync(request):
+    """Courses, enrolments, materials and feedback changed since `since` (see api/sync.py)."""
+    return Response(changes_since(request, request.query_params.get("since", "")))
+
+
+@api_view(["POST"])
+@permission_classes([AllowAny])
+@extend_schema(tags=["Batch"], request=BatchSerializer, responses=BatchResultSerializer)
+def batch(request):
+    """Run several GET sub-requests in one round trip (see api/batch.py)."""
+    serializer = BatchSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return Response({"responses": run_batch(request, serializer.validated_data["requests"])})
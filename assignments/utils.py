@@ -4,7 +4,9 @@ from typing import Dict, Any
 
 from django.utils import timezone
 from django.db import transaction
+from django.db.models import Sum, prefetch_related_objects
 
+from config.metrics import GRADE_UPSERT
 from .models import Assignment, QuizQuestion, QuizAnswerChoice, Attempt, Grade, AssignmentType
 from courses.models import Course
 from django.contrib.auth import get_user_model
@@ -23,15 +25,15 @@ def grade_quiz(assignment: Assignment, selected: dict[int, int]) -> dict[str, An
     total = len(questions)
     correct = 0
     perq: dict[int, bool] = {}
-    # Preload correct choices into a dict
+    # Preload correct choices in one query (lowest id wins if several are flagged)
     correct_map: dict[int, int] = {}
-    for q in questions:
-        correct_choice = q.choices.filter(is_correct=True).first()
-        if not correct_choice:
-            # If not defined, treat as incorrect by default
-            perq[q.id] = False
-            continue
-        correct_map[q.id] = correct_choice.id
+    rows = (
+        QuizAnswerChoice.objects.filter(question__assignment=assignment, is_correct=True)
+        .order_by("id")
+        .values_list("question_id", "id")
+    )
+    for qid, cid in rows:
+        correct_map.setdefault(qid, cid)
 
     for q in questions:
         chosen = selected.get(q.id)
@@ -58,15 +60,19 @@ def quiz_readiness(assignment: Assignment) -> dict[str, Any]:
     qs = list(assignment.questions.all())
     if not qs:
         issues.append("Quiz has no questions.")
+    # Reuses choices prefetched by the caller; otherwise loads them in one query
+    prefetch_related_objects(qs, "choices")
     for q in qs:
-        correct_count = q.choices.filter(is_correct=True).count()
+        choices = list(q.choices.all())
+        correct_count = sum(1 for c in choices if c.is_correct)
         if correct_count != 1:
             issues.append(f"Question {q.order or q.id}: must have exactly one correct answer.")
-        if q.choices.count() < 2:
+        if len(choices) < 2:
             issues.append(f"Question {q.order or q.id}: must have at least two answer choices.")
     return {"ready": len(issues) == 0, "issues": issues}
 
 
+@GRADE_UPSERT.time()
 @transaction.atomic
 def upsert_grade_for_attempt(attempt: Attempt, *, release: bool = False, override_reason: str | None = None) -> Grade:
     """Create or update the Grade record in response to an attempt.
@@ -136,6 +142,44 @@ def upsert_grade_for_attempt(attempt: Attempt, *, release: bool = False, overrid
     return grade
 
 
+def grading_error(attempt: Attempt, marks_awarded: float, override_reason: str = "") -> str | None:
+    """Why `marks_awarded` cannot be recorded for `attempt` now, or None.
+
+    Paper/Exam attempts are graded after the deadline; marks stay within
+    0..max_marks; changing an auto-graded quiz mark needs a reason.
+    """
+    a = attempt.assignment
+    if a.type in (AssignmentType.PAPER, AssignmentType.EXAM):
+        if a.deadline and timezone.now() < a.deadline:
+            return "Cannot grade before the deadline."
+    max_marks = float(a.max_marks or 100.0)
+    if marks_awarded < 0 or marks_awarded > max_marks:
+        return f"Marks must be between 0 and {max_marks}."
+    if a.type == AssignmentType.QUIZ:
+        auto_marks = round((float(attempt.score or 0.0) / 100.0) * max_marks, 2) if attempt.score is not None else None
+        if auto_marks is not None and round(marks_awarded, 2) != round(auto_marks, 2) and not override_reason.strip():
+            return "Override requires a reason."
+    return None
+
+
+def record_marks(attempt: Attempt, marks_awarded: float, *, grader, feedback_text: str = "", override_reason: str = "") -> Grade:
+    """Save a teacher's marks on `attempt`, release them and update its Grade.
+
+    Callers check `grading_error` first.
+    """
+    now = timezone.now()
+    attempt.marks_awarded = marks_awarded
+    attempt.feedback_text = feedback_text
+    attempt.override_reason = override_reason
+    attempt.graded_by = grader
+    attempt.graded_at = now
+    # Release immediately for both manual grading and overrides
+    attempt.released = True
+    attempt.released_at = now
+    attempt.save(update_fields=["marks_awarded", "feedback_text", "override_reason", "graded_by", "graded_at", "released", "released_at"])
+    return upsert_grade_for_attempt(attempt, release=True)
+
+
 def compute_course_percentage(course: Course, student) -> float:
     """Compute a student's percentage in a course from Grade records.
 
@@ -147,6 +191,30 @@ def compute_course_percentage(course: Course, student) -> float:
         return 0.0
     achieved = sum(float(a or 0.0) for a, _ in totals)
     maximum = sum(float(m or 0.0) for _, m in totals) or 0.0
+    return _percentage(achieved, maximum)
+
+
+def compute_course_percentages(course: Course, student_ids=None) -> dict[int, float]:
+    """Course percentage for many students in one grouped query.
+
+    Same rules as `compute_course_percentage`; students without grades
+    are absent from the result (callers default them to 0.0).
+    """
+    qs = Grade.objects.filter(course=course, assignment__is_published=True)
+    if student_ids is not None:
+        qs = qs.filter(student_id__in=list(student_ids))
+    rows = qs.values("student_id").annotate(achieved=Sum("achieved_marks"), maximum=Sum("max_marks")).order_by()
+    return {r["student_id"]: _percentage(float(r["achieved"] or 0.0), float(r["maximum"] or 0.0)) for r in rows}
+
+
+def grades_percentage(grades) -> float:
+    """Percentage for already-loaded Grade rows (no queries)."""
+    achieved = sum(float(g.achieved_marks or 0.0) for g in grades)
+    maximum = sum(float(g.max_marks or 0.0) for g in grades)
+    return _percentage(achieved, maximum)
+
+
+def _percentage(achieved: float, maximum: float) -> float:
     if maximum <= 0.0:
         return 0.0
     return round((achieved / maximum) * 100.0, 2)
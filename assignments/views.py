@@ -10,7 +10,8 @@ from django.conf import settings
 
 from accounts.models import Role
 from accounts.decorators import role_required
-from courses.models import Course, Enrolment
+from courses.access import access_for
+from courses.models import Course
 
 from django.db import models 
 from .models import (
@@ -22,25 +23,16 @@ from .models import (
     StudentAnswer,
 )
 from .forms import AssignmentForm, QuizQuestionForm, QuizAnswerChoiceForm, AssignmentMetaForm, GradeAttemptForm 
-from .utils import grade_quiz, quiz_readiness, upsert_grade_for_attempt
+from .utils import grade_quiz, grading_error, quiz_readiness, record_marks, upsert_grade_for_attempt
 from activity.models import Notification
-
-
-def _is_teacher_owner(user, course: Course) -> bool:
-    return bool(user.is_authenticated and getattr(getattr(user, "profile", None), "role", None) == Role.TEACHER and course.owner_id == user.id)
-
-
-def _is_enrolled(user, course: Course) -> bool:
-    if not getattr(user, "is_authenticated", False):
-        return False
-    return Enrolment.objects.filter(course=course, student=user).exists()
+from config.metrics import UPLOAD_BYTES
 
 
 @login_required
 def course_assignments(request, course_id: int): 
     course = get_object_or_404(Course, pk=course_id)
-    owner = _is_teacher_owner(request.user, course)
-    if not (owner or _is_enrolled(request.user, course)):
+    owner = access_for(request).is_teacher_owner(course)
+    if not (owner or access_for(request).is_enrolled(course)):
         raise PermissionDenied
     assignments = Assignment.objects.filter(course=course).prefetch_related("questions__choices").order_by("title") 
     now = timezone.now()
@@ -70,7 +62,7 @@ def course_assignments(request, course_id: int):
 @role_required(Role.TEACHER)
 def assignment_create(request, course_id: int):
     course = get_object_or_404(Course, pk=course_id)
-    if not _is_teacher_owner(request.user, course):
+    if not access_for(request).is_teacher_owner(course):
         raise PermissionDenied
     if request.method == "POST":
         action = (request.POST.get("action") or "").strip()
@@ -127,7 +119,7 @@ def assignment_create(request, course_id: int):
 @role_required(Role.TEACHER)
 def assignment_delete(request, pk: int):
     a = get_object_or_404(Assignment.objects.select_related("course"), pk=pk)
-    if not _is_teacher_owner(request.user, a.course):
+    if not access_for(request).is_teacher_owner(a.course):
         raise PermissionDenied
     if request.method != "POST":
         messages.error(request, "Please confirm deletion via the form.")
@@ -147,10 +139,12 @@ def quiz_manage(request, pk: int):
     if a.type != AssignmentType.QUIZ:
         messages.error(request, "Not a quiz assignment.")
         return redirect("assignments:course", course_id=a.course_id)
-    if not _is_teacher_owner(request.user, a.course):
+    if not access_for(request).is_teacher_owner(a.course):
         raise PermissionDenied
     # Lock structural editing once attempts exist; compute readiness banner
     locked = Attempt.objects.filter(assignment=a).exists()
+    # Questions and choices are loaded once and shared by the readiness check and the template
+    models.prefetch_related_objects([a], "questions__choices")
     ready_info = quiz_readiness(a) if a.type == AssignmentType.QUIZ else {"ready": True, "issues": []}
     q_form = QuizQuestionForm()
     c_form = QuizAnswerChoiceForm()
@@ -299,10 +293,10 @@ def quiz_manage(request, pk: int):
 def assignment_take(request, pk: int): 
     a = get_object_or_404(Assignment.objects.select_related("course"), pk=pk)
     # Permission: enrolled or owner
-    if not (_is_enrolled(request.user, a.course) or _is_teacher_owner(request.user, a.course)):
+    if not (access_for(request).is_enrolled(a.course) or access_for(request).is_teacher_owner(a.course)):
         raise PermissionDenied
     # Availability/deadline/attempts check (only enforced for students) 
-    owner = _is_teacher_owner(request.user, a.course) 
+    owner = access_for(request).is_teacher_owner(a.course) 
     if not owner:
         if not a.is_published:
             messages.error(request, "Assignment is not published.")
@@ -321,16 +315,17 @@ def assignment_take(request, pk: int):
         if not a.is_published: 
             messages.error(request, "Assignment is not published.") 
             return redirect("assignments:course", course_id=a.course_id) 
-        qs = a.questions.prefetch_related("choices") 
+        qs = list(a.questions.prefetch_related("choices"))
         # Validate quiz readiness: at least 1 question, each has exactly 1 correct
-        if qs.count() == 0:
+        if not qs:
             messages.error(request, "Quiz has no questions yet.")
             return redirect("assignments:course", course_id=a.course_id)
         for q in qs:
-            if q.choices.filter(is_correct=True).count() != 1:
+            choices = q.choices.all()
+            if sum(1 for c in choices if c.is_correct) != 1:
                 messages.error(request, "Quiz is not ready (each question must have exactly one correct answer).")
                 return redirect("assignments:course", course_id=a.course_id)
-            if q.choices.count() < 2:
+            if len(choices) < 2:
                 messages.error(request, "Quiz is not ready (each question must have at least two answer choices).")
                 return redirect("assignments:course", course_id=a.course_id)
         used = Attempt.objects.filter(assignment=a, student=request.user).count()
@@ -354,7 +349,7 @@ def assignment_submit(request, pk: int):
     if request.method != "POST":
         return redirect("assignments:take", pk=pk)
     a = get_object_or_404(Assignment.objects.select_related("course"), pk=pk)
-    if not _is_enrolled(request.user, a.course): 
+    if not access_for(request).is_enrolled(a.course): 
         raise PermissionDenied 
     # Enforce availability, deadline and attempts 
     if not a.is_published:
@@ -440,6 +435,7 @@ def assignment_submit(request, pk: int):
             return redirect("assignments:take", pk=a.pk)
         from .models import StudentFileSubmission
         StudentFileSubmission.objects.create(attempt=attempt, file=f)
+        UPLOAD_BYTES.labels("submission").observe(getattr(f, "size", 0) or 0)
         return redirect("assignments:feedback", attempt_id=attempt.id)
     if a.type == AssignmentType.EXAM:
         # Require at least some text for each question
@@ -461,7 +457,7 @@ def attempt_feedback(request, attempt_id: int):
     att = get_object_or_404(Attempt.objects.select_related("assignment", "student", "assignment__course"), pk=attempt_id)
     a = att.assignment
     # Permissions: student who submitted, or course owner
-    if not (att.student_id == request.user.id or _is_teacher_owner(request.user, a.course)):
+    if not (att.student_id == request.user.id or access_for(request).is_teacher_owner(a.course)):
         raise PermissionDenied
     ctx = {"attempt": att, "assignment": a}
     if a.type == AssignmentType.QUIZ:
@@ -482,7 +478,7 @@ def assignment_attempts(request, pk: int):
     - For Quiz: available for manual override of marks (optional), though quiz marks are auto-released on submit.
     """
     a = get_object_or_404(Assignment.objects.select_related("course"), pk=pk)
-    if not _is_teacher_owner(request.user, a.course):
+    if not access_for(request).is_teacher_owner(a.course):
         raise PermissionDenied
     now = timezone.now()
     if a.type in (AssignmentType.PAPER, AssignmentType.EXAM):
@@ -503,13 +499,8 @@ def assignment_attempts(request, pk: int):
 def attempt_grade(request, attempt_id: int):
     att = get_object_or_404(Attempt.objects.select_related("assignment", "student", "assignment__course"), pk=attempt_id)
     a = att.assignment
-    if not _is_teacher_owner(request.user, a.course):
+    if not access_for(request).is_teacher_owner(a.course):
         raise PermissionDenied
-    # Paper/Exam grading allowed after deadline; Quiz override allowed anytime
-    if a.type in (AssignmentType.PAPER, AssignmentType.EXAM):
-        if a.deadline and timezone.now() < a.deadline:
-            messages.error(request, "Cannot grade before the deadline.")
-            return redirect("assignments:attempts", pk=a.pk)
     if request.method != "POST":
         return redirect("assignments:attempts", pk=a.pk)
     form = GradeAttemptForm(request.POST)
@@ -519,30 +510,13 @@ def attempt_grade(request, attempt_id: int):
     marks_awarded = float(form.cleaned_data["marks_awarded"])
     feedback_text = form.cleaned_data.get("feedback_text") or ""
     override_reason = form.cleaned_data.get("override_reason") or ""
-    # Bounds check
-    max_marks = float(a.max_marks or 100.0)
-    if marks_awarded < 0 or marks_awarded > max_marks:
-        messages.error(request, f"Marks must be between 0 and {max_marks}.")
+    # Deadline, bounds and quiz override rules (shared with the API)
+    error = grading_error(att, marks_awarded, override_reason)
+    if error:
+        messages.error(request, error)
         return redirect("assignments:attempts", pk=a.pk)
-    # For quiz override, require reason if changing from auto grade
-    if a.type == AssignmentType.QUIZ:
-        auto_marks = round((float(att.score or 0.0) / 100.0) * max_marks, 2) if att.score is not None else None
-        if auto_marks is not None and round(marks_awarded, 2) != round(auto_marks, 2) and not override_reason.strip():
-            messages.error(request, "Override requires a reason.")
-            return redirect("assignments:attempts", pk=a.pk)
-
-    # Persist grading
-    att.marks_awarded = marks_awarded
-    att.feedback_text = feedback_text
-    att.override_reason = override_reason
-    att.graded_by = request.user
-    att.graded_at = timezone.now()
-    # Release immediately for both manual grading and overrides
-    att.released = True
-    att.released_at = timezone.now()
-    att.save(update_fields=["marks_awarded", "feedback_text", "override_reason", "graded_by", "graded_at", "released", "released_at"])
-
-    upsert_grade_for_attempt(att, release=True)
+
+    record_marks(att, marks_awarded, grader=request.user, feedback_text=feedback_text, override_reason=override_reason)
 
     # Notify student on release
     try:
@@ -571,7 +545,7 @@ def assignment_manage(request, pk: int):
     a = get_object_or_404(Assignment.objects.select_related("course"), pk=pk)
     if a.type == AssignmentType.QUIZ:
         return redirect("assignments:quiz-manage", pk=pk)
-    if not _is_teacher_owner(request.user, a.course):
+    if not access_for(request).is_teacher_owner(a.course):
         raise PermissionDenied
 
     locked = Attempt.objects.filter(assignment=a).exists()
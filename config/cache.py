@@ -0,0 +1,127 @@
+"""Cache-aside helpers (Stage 18).
+
+`fetch(namespace, key, compute)` returns the cached value or computes,
+stores and returns it. Each namespace has a version stored in the cache
+and passed as Django's key `version`. `bump(namespace)` therefore drops
+every key in a namespace at once without scanning the cache, and
+`forget(namespace, key)` drops a single key. Cached values may be None.
+
+Two guards stop a popular key from stampeding the database:
+
+- probabilistic early refresh ("XFetch"): each hit recomputes with a
+  probability that rises as expiry approaches, scaled by how long the
+  last computation took, so usually one request refreshes the key
+  before it expires;
+- a fill lock on cold misses: one caller computes while the others poll
+  briefly for its result, falling back to computing themselves.
+
+Hits, misses and early refreshes are counted per namespace, and fill
+times observed, in config/metrics.py.
+"""
+from __future__ import annotations
+
+import math
+import random
+import time
+from typing import Any, Callable, Iterable, TypeVar
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .metrics import CACHE_FILL, CACHE_REQUESTS
+
+T = TypeVar("T")
+
+EARLY_REFRESH_BETA = 1.0
+LOCK_TIMEOUT = 10  # seconds before an abandoned fill lock expires
+LOCK_WAIT = 2.0  # seconds other callers wait for a fill in progress
+LOCK_POLL = 0.02
+
+
+def _version_key(namespace: str) -> str:
+    return f"cache-version:{namespace}"
+
+
+def _key(namespace: str, key: str | Iterable[Any]) -> str:
+    if not isinstance(key, str):
+        key = ":".join(str(part) for part in key)
+    return f"{namespace}:{key}"
+
+
+def version(namespace: str) -> int:
+    """Current version of a namespace, created on first use.
+
+    New versions start from the clock rather than 1. If the version key
+    is evicted, the namespace then moves to a version no earlier entry
+    used, instead of reviving stale ones.
+    """
+    vkey = _version_key(namespace)
+    current = cache.get(vkey)
+    if current is None:
+        cache.add(vkey, time.time_ns() // 1000, None)
+        current = cache.get(vkey)
+    return int(current)
+
+
+def bump(namespace: str) -> None:
+    """Invalidate every key in `namespace`."""
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        version(namespace)
+
+
+def forget(namespace: str, key: str | Iterable[Any]) -> None:
+    cache.delete(_key(namespace, key), version=version(namespace))
+
+
+def _fill(namespace: str, full_key: str, ver: int, compute: Callable[[], T], timeout) -> T:
+    started = time.perf_counter()
+    value = compute()
+    delta = time.perf_counter() - started
+    CACHE_FILL.labels(namespace).observe(delta)
+    ttl = cache.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+    expires = math.inf if ttl is None else time.time() + ttl
+    cache.set(full_key, (value, delta, expires), timeout, version=ver)
+    return value
+
+
+def fetch(
+    namespace: str,
+    key: str | Iterable[Any],
+    compute: Callable[[], T],
+    timeout: float | None = DEFAULT_TIMEOUT,
+    *,
+    beta: float = EARLY_REFRESH_BETA,
+) -> T:
+    """Return the cached value for `key`, computing it on a miss.
+
+    `beta` tunes early refresh: 0 disables it, larger values refresh
+    earlier.
+    """
+    ver = version(namespace)
+    full_key = _key(namespace, key)
+    entry = cache.get(full_key, version=ver)
+    if entry is not None:
+        value, delta, expires = entry
+        # 1 - random() lies in (0, 1], so the log is finite and <= 0
+        if beta <= 0 or time.time() - delta * beta * math.log(1.0 - random.random()) < expires:
+            CACHE_REQUESTS.labels(namespace, "hit").inc()
+            return value
+        CACHE_REQUESTS.labels(namespace, "refresh").inc()
+        return _fill(namespace, full_key, ver, compute, timeout)
+
+    CACHE_REQUESTS.labels(namespace, "miss").inc()
+    lock_key = f"lock:{full_key}"
+    if cache.add(lock_key, 1, LOCK_TIMEOUT, version=ver):
+        try:
+            return _fill(namespace, full_key, ver, compute, timeout)
+        finally:
+            cache.delete(lock_key, version=ver)
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL)
+        entry = cache.get(full_key, version=ver)
+        if entry is not None:
+            return entry[0]
+    return _fill(namespace, full_key, ver, compute, timeout)
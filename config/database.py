@@ -0,0 +1,111 @@
+"""Database configuration from the environment (Stage 18).
+
+`database_config()` builds the `DATABASES["default"]` entry:
+
+- with no `DATABASE_URL` (or a `sqlite:///path` URL) it returns a tuned
+  SQLite profile. Transactions begin IMMEDIATE so writers queue on the
+  busy timeout instead of failing when a read lock is upgraded. Each new
+  connection applies the pragmas listed under the entry's `PRAGMAS` key
+  (WAL journal, busy_timeout, synchronous=NORMAL, mmap and page cache);
+- with a `postgres://` URL it returns a PostgreSQL profile that keeps
+  connections open (`DB_CONN_MAX_AGE`, health-checked) or, when
+  `DB_POOL_MAX_SIZE` is set, uses psycopg's connection pool instead.
+
+The pragmas are applied by a `connection_created` receiver connected
+when this module is imported from the settings.
+"""
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any, Mapping
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+
+_TRUE = {"1", "true", "yes", "on"}
+
+
+def _int(env: Mapping[str, str], name: str, default: int) -> int:
+    raw = env.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError as exc:
+        raise ImproperlyConfigured(f"{name} must be an integer, got {raw!r}") from exc
+
+
+def sqlite_pragmas(env: Mapping[str, str] = os.environ) -> dict[str, Any]:
+    """Pragmas applied to every new SQLite connection, in order."""
+    return {
+        "journal_mode": env.get("SQLITE_JOURNAL_MODE", "WAL"),
+        "busy_timeout": _int(env, "SQLITE_BUSY_TIMEOUT_MS", 5000),
+        "synchronous": env.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "mmap_size": _int(env, "SQLITE_MMAP_SIZE", 128 * 1024 * 1024),
+        # Negative values are KiB rather than pages: about 20 MB per connection
+        "cache_size": _int(env, "SQLITE_CACHE_SIZE", -20000),
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    }
+
+
+def _sqlite(name: str | Path, env: Mapping[str, str]) -> dict[str, Any]:
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        "CONN_MAX_AGE": _int(env, "DB_CONN_MAX_AGE", 0),
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+        "PRAGMAS": sqlite_pragmas(env),
+    }
+
+
+def _postgres(url: str, env: Mapping[str, str]) -> dict[str, Any]:
+    parts = urlsplit(url)
+    options: dict[str, Any] = dict(parse_qsl(parts.query))
+    config: dict[str, Any] = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": unquote(parts.path.lstrip("/")),
+        "USER": unquote(parts.username or ""),
+        "PASSWORD": unquote(parts.password or ""),
+        "HOST": parts.hostname or "",
+        "PORT": str(parts.port or ""),
+        "CONN_MAX_AGE": _int(env, "DB_CONN_MAX_AGE", 60),
+        "CONN_HEALTH_CHECKS": env.get("DB_CONN_HEALTH_CHECKS", "1").strip().lower() in _TRUE,
+    }
+    pool_max = _int(env, "DB_POOL_MAX_SIZE", 0)
+    if pool_max:
+        # Django's pool owns connection reuse; persistent connections must be off
+        options["pool"] = {"min_size": _int(env, "DB_POOL_MIN_SIZE", 2), "max_size": pool_max, "timeout": _int(env, "DB_POOL_TIMEOUT", 10)}
+        config["CONN_MAX_AGE"] = 0
+    config["OPTIONS"] = options
+    return config
+
+
+def database_config(base_dir: Path, env: Mapping[str, str] = os.environ, url_var: str = "DATABASE_URL") -> dict[str, Any]:
+    """Return the database entry described by `url_var` and the tuning variables."""
+    url = env.get(url_var, "").strip()
+    if not url:
+        return _sqlite(base_dir / "db.sqlite3", env)
+    scheme = urlsplit(url).scheme
+    if scheme == "sqlite":
+        path = url.split("://", 1)[1]
+        # sqlite:///relative.db is relative to the project; sqlite:////abs.db is absolute
+        path = path[1:] if path.startswith("/") else path
+        return _sqlite(Path(path) if Path(path).is_absolute() else base_dir / path, env)
+    if scheme in {"postgres", "postgresql", "pgsql"}:
+        return _postgres(url, env)
+    raise ImproperlyConfigured(f"Unsupported {url_var} scheme: {scheme!r}")
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs) -> None:
+    pragmas = connection.settings_dict.get("PRAGMAS")
+    if connection.vendor != "sqlite" or not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+connection_created.connect(apply_sqlite_pragmas, dispatch_uid="courpera.sqlite_pragmas")
@@ -0,0 +1,309 @@
+"""In-process metrics registry and Prometheus exposition (Stage 18).
+
+A small, dependency-free subset of the Prometheus client model:
+counters, gauges and histograms with optional labels, rendered in the
+text exposition format at `/metrics`. Each labelled series guards its
+values with its own lock held only for the arithmetic, so updates are
+safe from request threads and from asyncio consumers alike (nothing
+awaits while a lock is held).
+
+Metrics are per process; with several workers, scrape each one or run a
+single worker when collecting.
+"""
+from __future__ import annotations
+
+import hmac
+import math
+import threading
+import time
+from functools import wraps
+from typing import Iterable, Iterator
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+BYTES_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024**2, 5 * 1024**2, 10 * 1024**2, 25 * 1024**2)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(kwargs[n] for n in self.labelnames)
+        key = tuple(str(v) for v in values)
+        if len(key) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _default(self):
+        # Unlabelled metrics act as their own single child
+        return self.labels()
+
+    def _new_child(self):  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def _series(self) -> list[tuple[tuple[str, ...], object]]:
+        with self._lock:
+            return sorted(self._children.items())
+
+    def collect(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for key, child in self._series():
+            yield from self._lines(key, child)
+
+    def _lines(self, key, child) -> Iterator[str]:  # pragma: no cover - abstract
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        with self._lock:
+            self._children.clear()
+
+
+class _Value:
+    __slots__ = ("value", "lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self.lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self.lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        with self.lock:
+            self.value = float(value)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters only go up")
+        self._default().inc(amount)
+
+    def _lines(self, key, child):
+        yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(child.value)}"
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._default().dec(amount)
+
+    def set(self, value: float) -> None:
+        self._default().set(value)
+
+    def _lines(self, key, child):
+        yield f"{self.name}{_labels(self.labelnames, key)} {_fmt(child.value)}"
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum", "lock")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = 0
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                break
+        else:
+            i = len(self.bounds)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+
+class _Timer:
+    """Context manager and decorator observing elapsed seconds."""
+
+    def __init__(self, target):
+        self.target = target
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.target.observe(time.perf_counter() - self.start)
+        return False
+
+    def __call__(self, fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Timer(self.target):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets: Iterable[float] = DEFAULT_SECONDS_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._default().observe(value)
+
+    def time(self) -> _Timer:
+        """Time a block or decorate a function (unlabelled histograms only)."""
+        return _Timer(self._default())
+
+    def _lines(self, key, child):
+        with child.lock:
+            counts = list(child.counts)
+            total = child.sum
+        cumulative = 0
+        for bound, n in zip(list(self.buckets) + [math.inf], counts):
+            cumulative += n
+            le = 'le="%s"' % _fmt(bound)
+            yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}"
+        yield f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(total)}"
+        yield f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}"
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Duplicate metric {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def get(self, name: str) -> _Metric:
+        return self._metrics[name]
+
+    def exposition(self) -> str:
+        lines: list[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].collect())
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        """Drop every recorded series (tests)."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter("courpera_http_requests_total", "HTTP requests by view, method and status.", ("view", "method", "status"))
+)
+HTTP_LATENCY = registry.register(
+    Histogram("courpera_http_request_duration_seconds", "HTTP request latency by view.", ("view", "method"))
+)
+WS_CONNECTIONS = registry.register(
+    Gauge("courpera_ws_connections", "Open course chat WebSocket connections by room.", ("room",))
+)
+WS_MESSAGES = registry.register(
+    Counter("courpera_ws_messages_total", "Course chat messages accepted by room.", ("room",))
+)
+WS_DROPPED = registry.register(
+    Counter("courpera_ws_messages_dropped_total", "Course chat messages dropped by the rate limiter.", ("room",))
+)
+GRADE_UPSERT = registry.register(
+    Histogram("courpera_grade_upsert_duration_seconds", "Duration of upsert_grade_for_attempt.")
+)
+NOTIFICATION_FANOUT = registry.register(
+    Histogram("courpera_notification_fanout_size", "Notifications written per event.", ("type",), buckets=SIZE_BUCKETS)
+)
+UPLOAD_BYTES = registry.register(
+    Histogram("courpera_upload_bytes", "Accepted upload sizes in bytes.", ("kind",), buckets=BYTES_BUCKETS)
+)
+CACHE_REQUESTS = registry.register(
+    Counter("courpera_cache_requests_total", "Cache-aside lookups by namespace and result (hit, miss, refresh).", ("namespace", "result"))
+)
+CACHE_FILL = registry.register(
+    Histogram("courpera_cache_fill_duration_seconds", "Time spent computing values on cache misses.", ("namespace",))
+)
+PASSWORD_HASH = registry.register(
+    Histogram("courpera_password_hash_seconds", "Password hashing time queued and hashing, by operation.", ("op", "phase"))
+)
+
+
+def _authorised(request: HttpRequest) -> bool:
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token:
+        header = request.headers.get("Authorization", "")
+        if header.startswith("Bearer ") and hmac.compare_digest(header[7:].strip(), token):
+            return True
+    if settings.DEBUG:
+        return True
+    user = getattr(request, "user", None)
+    return bool(user and user.is_authenticated and user.is_staff)
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Prometheus text exposition; staff, DEBUG or `Bearer METRICS_TOKEN` only."""
+    if not _authorised(request):
+        return HttpResponseForbidden("Metrics are restricted")
+    return HttpResponse(registry.exposition(), content_type=CONTENT_TYPE)
@@ -1,7 +1,20 @@
 from __future__ import annotations
 
+import math
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
 from django.utils.deprecation import MiddlewareMixin
 
+from .metrics import HTTP_LATENCY, HTTP_REQUESTS
+from .routers import SAFE_METHODS, pin_to_primary, replicas
+
 
 class ContentSecurityPolicyMiddleware(MiddlewareMixin):
     """Add a basic Content-Security-Policy header.
@@ -34,3 +47,195 @@ class ContentSecurityPolicyMiddleware(MiddlewareMixin):
         )
         response["Content-Security-Policy"] = csp
         return response
+
+
+class ProfileStats:
+    """Rolling per-view timings kept in process memory.
+
+    Each URL name keeps its last `window` samples (total ms, query count),
+    which is enough for stable p50/p95/p99 without unbounded growth.
+    """
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, total_ms: float, queries: int) -> None:
+        with self._lock:
+            bucket = self._samples.get(name)
+            if bucket is None:
+                bucket = self._samples[name] = deque(maxlen=self.window)
+            bucket.append((total_ms, queries))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self) -> list[dict]:
+        """One row per URL name, slowest p95 first."""
+        with self._lock:
+            data = {name: list(bucket) for name, bucket in self._samples.items()}
+        rows = []
+        for name, samples in data.items():
+            times = sorted(t for t, _ in samples)
+            rows.append(
+                {
+                    "name": name,
+                    "count": len(samples),
+                    "p50": _nearest_rank(times, 50),
+                    "p95": _nearest_rank(times, 95),
+                    "p99": _nearest_rank(times, 99),
+                    "max": round(times[-1], 2),
+                    "queries": round(sum(q for _, q in samples) / len(samples), 1),
+                }
+            )
+        rows.sort(key=lambda r: r["p95"], reverse=True)
+        return rows
+
+    def slowest(self, limit: int = 10) -> list[dict]:
+        return self.summary()[:limit]
+
+
+def _nearest_rank(ordered: list[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return round(ordered[max(1, math.ceil(pct / 100.0 * len(ordered))) - 1], 2)
+
+
+profile_stats = ProfileStats()
+
+# Per-request timing state; None outside a profiled request
+_current: ContextVar[dict | None] = ContextVar("courpera_profile", default=None)
+_template_patched = False
+
+
+def _patch_template_render() -> None:
+    """Time top-level template renders (nested includes are not double counted)."""
+    global _template_patched
+    if _template_patched:
+        return
+    from django.template.base import Template
+
+    original = Template.render
+
+    def render(self, context):
+        state = _current.get()
+        if state is None:
+            return original(self, context)
+        outermost = state["tpl_depth"] == 0
+        state["tpl_depth"] += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            state["tpl_depth"] -= 1
+            if outermost:
+                state["tpl_ms"] += (time.perf_counter() - start) * 1000.0
+
+    Template.render = render
+    _template_patched = True
+
+
+class ProfilingMiddleware:
+    """Opt-in request profiling (Stage 18).
+
+    Enabled with `PROFILING_ENABLED` (env `PROFILING=1`). When disabled
+    the middleware raises MiddlewareNotUsed at startup, so Django drops it
+    from the chain and requests pay nothing. When enabled, every response
+    carries a `Server-Timing` header with database time and query count,
+    template render time, view time and total time, and per-URL-name
+    timings are kept in `profile_stats` for the Admin Mode panel.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "PROFILING_ENABLED", False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        profile_stats.window = getattr(settings, "PROFILING_WINDOW", profile_stats.window)
+        _patch_template_render()
+
+    def __call__(self, request):
+        state = {"queries": 0, "db_ms": 0.0, "tpl_ms": 0.0, "tpl_depth": 0, "view_start": None}
+        token = _current.set(state)
+
+        def timed_execute(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                state["db_ms"] += (time.perf_counter() - start) * 1000.0
+                state["queries"] += 1
+
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(timed_execute))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        end = time.perf_counter()
+        total_ms = (end - start) * 1000.0
+        view_ms = (end - state["view_start"]) * 1000.0 if state["view_start"] else 0.0
+        response["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={state["db_ms"]:.2f};desc="{state["queries"]} queries"',
+                f'tpl;dur={state["tpl_ms"]:.2f};desc="templates"',
+                f'view;dur={view_ms:.2f};desc="view"',
+                f'total;dur={total_ms:.2f};desc="total"',
+            ]
+        )
+        match = getattr(request, "resolver_match", None)
+        name = (match.view_name if match else None) or "unresolved"
+        profile_stats.record(name, total_ms, state["queries"])
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _current.get()
+        if state is not None:
+            state["view_start"] = time.perf_counter()
+        return None
+
+
+class MetricsMiddleware(MiddlewareMixin):
+    """Record request counts and latency per view (Stage 18).
+
+    Costs two clock reads and two metric updates per request; disable
+    with `METRICS_ENABLED = False` to drop it from the chain entirely.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "METRICS_ENABLED", True):
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_request(self, request):
+        request._metrics_start = time.perf_counter()
+
+    def process_response(self, request, response):
+        start = getattr(request, "_metrics_start", None)
+        if start is not None:
+            match = getattr(request, "resolver_match", None)
+            view = (match.view_name if match else None) or "unresolved"
+            HTTP_LATENCY.labels(view, request.method).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(view, request.method, response.status_code).inc()
+        return response
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """Pin a session to the primary database after it writes (Stage 18).
+
+    Only active when `DATABASE_REPLICAS` is configured; see
+    config/routers.py for how reads are routed.
+    """
+
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if request.method not in SAFE_METHODS and response.status_code < 400 and hasattr(request, "session"):
+            pin_to_primary(request)
+        return response
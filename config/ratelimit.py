@@ -0,0 +1,102 @@
+"""Cache-backed rate limiting for form endpoints (Stage 18).
+
+Counters live in the shared cache, not the session, so a throttled
+request writes nothing to the database. Each check costs one
+`get_many` plus, when allowed, one `add` and one `incr`, whatever the
+rate.
+
+Two window types are available:
+
+- fixed: one counter per window of `period` seconds;
+- sliding (default): the current counter plus the previous one, weighted
+  by how much of the previous window still overlaps the last `period`
+  seconds and rounded up. This removes the double burst a fixed window
+  allows at its edges and errs on the strict side just after one.
+
+Denied attempts are not counted, so a client that waits regains access
+as the window moves on. Identifiers (usernames, emails) are hashed
+before they become part of a key.
+"""
+from __future__ import annotations
+
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest
+
+
+@dataclass(frozen=True)
+class Rate:
+    limit: int
+    period: int  # seconds
+    sliding: bool = True
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    count: int  # attempts counted in the window, including this one when allowed
+    retry_after: int  # seconds until the next attempt may pass (0 when allowed)
+
+
+def client_ip(request: HttpRequest) -> str:
+    """Client address, honouring `RATELIMIT_TRUSTED_PROXIES` X-Forwarded-For hops."""
+    proxies = getattr(settings, "RATELIMIT_TRUSTED_PROXIES", 0)
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+    if proxies and forwarded:
+        hops = [h.strip() for h in forwarded.split(",") if h.strip()]
+        if hops:
+            return hops[-min(proxies, len(hops))]
+    return request.META.get("REMOTE_ADDR", "") or "unknown"
+
+
+def _key(scope: str, ident: str, window: int) -> str:
+    digest = hashlib.blake2s(ident.lower().encode(), digest_size=12).hexdigest()
+    return f"rl:{scope}:{digest}:{window}"
+
+
+def hit(scope: str, ident: str, rate: Rate, *, now: float | None = None) -> Decision:
+    """Count one attempt for `ident` in `scope` unless it exceeds `rate`."""
+    now = time.time() if now is None else now
+    window = int(now // rate.period)
+    current_key = _key(scope, ident, window)
+    previous_key = _key(scope, ident, window - 1)
+    counts = cache.get_many([current_key, previous_key] if rate.sliding else [current_key])
+    current = counts.get(current_key, 0)
+    weight = 0.0
+    if rate.sliding:
+        weight = 1.0 - (now - window * rate.period) / rate.period
+    estimate = current + math.ceil(counts.get(previous_key, 0) * weight)
+    if estimate >= rate.limit:
+        if current >= rate.limit or not weight:
+            # The next window starts from zero
+            wait = max(1, math.ceil((window + 1) * rate.period - now))
+        else:
+            # Until enough of the previous window has slid out for the
+            # rounded-up remainder to leave room for one more attempt
+            previous = counts[previous_key]
+            wait = max(1, math.ceil((current + previous - rate.limit + 1) / previous * rate.period - (now - window * rate.period)))
+        return Decision(False, estimate, wait)
+    cache.add(current_key, 0, rate.period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # Evicted between add and incr; start the window again
+        cache.set(current_key, 1, rate.period * 2)
+        current = 1
+    return Decision(True, current + math.ceil(counts.get(previous_key, 0) * weight), 0)
+
+
+def hit_all(checks: list[tuple[str, str, Rate]], *, now: float | None = None) -> Decision:
+    """Apply several limits (e.g. per IP and per account); stop at the first denial."""
+    decision = Decision(True, 0, 0)
+    for scope, ident, rate in checks:
+        decision = hit(scope, ident, rate, now=now)
+        if not decision.allowed:
+            return decision
+    return decision
+
@@ -0,0 +1,101 @@
+"""Primary/replica database routing (Stage 18).
+
+Writes always go to `default`. Reads go to a replica listed in
+`DATABASE_REPLICAS` only inside a read-intent scope, opened by decorating
+a read-mostly view with `@read_replica` (or with `read_intent()` in other
+code). Everything else keeps reading from the primary, so replica lag
+can only show up where it was opted into.
+
+Read-your-writes: a write inside a scope sends the rest of the scope's
+reads to the primary, and `ReplicaPinMiddleware` pins a session to the
+primary for `REPLICA_STICKY_SECONDS` after any successful unsafe request.
+"""
+from __future__ import annotations
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Iterator
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_SESSION_KEY = "_db_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+@dataclass
+class _Scope:
+    replica: str | None
+    wrote: bool = False
+
+
+_scope: ContextVar[_Scope | None] = ContextVar("db_read_scope", default=None)
+
+
+def replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", ()))
+
+
+@contextmanager
+def read_intent(allowed: bool = True) -> Iterator[str | None]:
+    """Route reads in this block to a replica; yields the alias chosen, if any."""
+    choices = replicas() if allowed else []
+    scope = _Scope(random.choice(choices) if choices else None)
+    token = _scope.set(scope)
+    try:
+        yield scope.replica
+    finally:
+        _scope.reset(token)
+
+
+def is_pinned(request) -> bool:
+    session = getattr(request, "session", None)
+    return bool(session is not None and session.get(PIN_SESSION_KEY, 0) > time.time())
+
+
+def pin_to_primary(request) -> None:
+    request.session[PIN_SESSION_KEY] = time.time() + getattr(settings, "REPLICA_STICKY_SECONDS", 5)
+
+
+def read_replica(view):
+    """Mark a view as read-mostly: safe, unpinned requests read from a replica."""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        # Resolve the session and user on the primary first: a replica
+        # that lags a fresh login would otherwise see an anonymous user
+        user = getattr(request, "user", None)
+        if user is not None:
+            user.is_authenticated
+        with read_intent(request.method in SAFE_METHODS and not is_pinned(request)):
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        scope = _scope.get()
+        if scope is not None and scope.replica and not scope.wrote:
+            return scope.replica
+        # Explicit, so objects loaded from a replica do not pull their
+        # related lookups back to it outside a read-intent scope
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        scope = _scope.get()
+        if scope is not None:
+            scope.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return False if db in replicas() else None
@@ -6,6 +6,8 @@ settings extend from this module in `dev.py` and `prod.py`.
 from pathlib import Path
 import os
 
+from config.database import database_config
+
 
 # Base directory of the project (repository root)
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
@@ -40,6 +42,7 @@ INSTALLED_APPS = [
     "ui",
     "api",
     "assignments",
+    "perf",
 ]
 
 # Optional: include sidecar if installed to serve local Swagger/Redoc assets
@@ -53,9 +56,14 @@ else:
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
     "config.middleware.ContentSecurityPolicyMiddleware",
+    # Opt-in (PROFILING=1); removed from the chain at startup when disabled
+    "config.middleware.ProfilingMiddleware",
+    "config.middleware.MetricsMiddleware",
     # WhiteNoise will be enabled in production; keep ordering stable now
     # "whitenoise.middleware.WhiteNoiseMiddleware",  # enabled in prod.py
     "django.contrib.sessions.middleware.SessionMiddleware",
+    # Only active with DATABASE_REPLICAS; must follow SessionMiddleware
+    "config.middleware.ReplicaPinMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -86,13 +94,23 @@ WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
 
 
-# Database — SQLite-first as per project philosophy
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Database — SQLite-first as per project philosophy. DATABASE_URL switches
+# to PostgreSQL; see config/database.py for the SQLite pragmas and pooling.
+DATABASES = {"default": database_config(BASE_DIR)}
+
+# Read replica (optional): read-mostly views marked @read_replica read from
+# it; see config/routers.py. Sessions stay on the primary for a few seconds
+# after they write.
+DATABASE_ROUTERS = ["config.routers.ReplicaRouter"]
+DATABASE_REPLICAS: list[str] = []
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "5"))
+if os.environ.get("DATABASE_REPLICA_URL"):
+    DATABASES["replica"] = {
+        **database_config(BASE_DIR, url_var="DATABASE_REPLICA_URL"),
+        # Tests see the primary's data through the replica alias
+        "TEST": {"MIRROR": "default"},
     }
-}
+    DATABASE_REPLICAS = ["replica"]
 
 
 # Internationalisation (Canadian English; Mountain Time zone for Calgary)
@@ -115,11 +133,18 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Django REST Framework (minimal defaults; refined later)
 REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "api.pagination.DefaultPagination",
+    # orjson when installed, else the stdlib encoder
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "PAGE_SIZE": 20,
     "DEFAULT_FILTER_BACKENDS": [
         "django_filters.rest_framework.DjangoFilterBackend",
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
+        # Runs last so it sees the final ordering
+        "api.sparse.SparseFieldsFilter",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
@@ -150,6 +175,15 @@ SPECTACULAR_SETTINGS = {
 }
 
 
+# Request profiling: Server-Timing headers and rolling per-view percentiles
+PROFILING_ENABLED = os.environ.get("PROFILING", "").strip().lower() in {"1", "true", "yes", "on"}
+PROFILING_WINDOW = int(os.environ.get("PROFILING_WINDOW", "500"))
+
+# Metrics exposition at /metrics (staff, DEBUG, or "Authorization: Bearer <token>")
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"}
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+
 # Channels — configured later; keep a placeholder for local fallback
 REDIS_URL = os.environ.get("REDIS_URL", "")
 if REDIS_URL:
@@ -164,6 +198,35 @@ else:
         "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
     }
 
+# Cache — Redis shared by every worker when REDIS_URL is set; otherwise a
+# file cache (CACHE_DIR, shared by processes on one host) or per-process
+# local memory. Helpers for cache-aside reads live in config/cache.py.
+CACHE_DIR = os.environ.get("CACHE_DIR", "")
+if REDIS_URL:
+    _cache_backend = {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+elif CACHE_DIR:
+    _cache_backend = {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": CACHE_DIR}
+else:
+    _cache_backend = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "courpera"}
+CACHES = {
+    "default": {
+        **_cache_backend,
+        "KEY_PREFIX": os.environ.get("CACHE_KEY_PREFIX", "courpera"),
+        "TIMEOUT": int(os.environ.get("CACHE_TIMEOUT", "300")),
+    }
+}
+
+# API ETags (api/conditional.py) keep per-model version counters in the
+# cache; outside DEBUG they need a shared backend (system check api.E001).
+API_ETAGS = os.environ.get("API_ETAGS", "1").strip().lower() in {"1", "true", "yes", "on"}
+
+# Sessions are read through the cache and written to the database only
+# when they change; form throttles (config/ratelimit.py) keep their
+# counters in the cache rather than the session.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+# X-Forwarded-For hops to trust when rate limiting by client IP
+RATELIMIT_TRUSTED_PROXIES = int(os.environ.get("RATELIMIT_TRUSTED_PROXIES", "0"))
+
 # Authentication redirects (used by Django auth views)
 LOGIN_URL = "/accounts/login/"
 LOGIN_REDIRECT_URL = "/accounts/home/"
@@ -182,6 +245,23 @@ AVATAR_BASE_URL = os.environ.get("AVATAR_BASE_URL", "https://api.dicebear.com/7.
 AVATAR_STYLE = os.environ.get("AVATAR_STYLE", "initials")
 AVATAR_SEED_SALT = os.environ.get("AVATAR_SEED_SALT", "courpera-salt")
 
+# Session users are loaded with their profile in one query and, for
+# AUTH_USER_CACHE_TTL seconds (0 disables), served from the cache.
+# ModelBackend stays listed so sessions that store its path stay valid.
+AUTHENTICATION_BACKENDS = [
+    "accounts.backends.ProfileModelBackend",
+    "django.contrib.auth.backends.ModelBackend",
+]
+AUTH_USER_CACHE_TTL = int(os.environ.get("AUTH_USER_CACHE_TTL", "30"))
+
+# /api/v1/sync (api/sync.py): rows changed in the last few seconds wait for
+# the next call; tombstones, and so sync tokens, last RETENTION_DAYS.
+API_SYNC_SETTLE_SECONDS = int(os.environ.get("API_SYNC_SETTLE_SECONDS", "1"))
+API_SYNC_RETENTION_DAYS = int(os.environ.get("API_SYNC_RETENTION_DAYS", "30"))
+# /api/v1/batch (api/batch.py): threads for sub-requests (1 runs them in turn;
+# SQLite always does)
+API_BATCH_WORKERS = int(os.environ.get("API_BATCH_WORKERS", "4"))
+
 # Password policy
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -192,9 +272,17 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 # Prefer Argon2 for password hashing when available.
 PASSWORD_HASHERS = [
-    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "accounts.hashers.TunedArgon2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2PasswordHasher",
     "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
     "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
     "django.contrib.auth.hashers.ScryptPasswordHasher",
 ]
+# Argon2 cost (defaults match Django's); calibrate with
+# `python manage.py calibrate_password_hasher`. Changing them re-hashes
+# each password on its owner's next login.
+ARGON2_TIME_COST = int(os.environ.get("ARGON2_TIME_COST", "2"))
+ARGON2_MEMORY_COST = int(os.environ.get("ARGON2_MEMORY_COST", "102400"))  # KiB
+ARGON2_PARALLELISM = int(os.environ.get("ARGON2_PARALLELISM", "8"))
+# Concurrent hashes per process (0: one per CPU)
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "0"))
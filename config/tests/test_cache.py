@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from config import cache as cache_aside
+from config.metrics import CACHE_REQUESTS
+
+
+def _counter():
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    return calls, compute
+
+
+def _count(namespace: str, result: str) -> float:
+    return CACHE_REQUESTS.labels(namespace, result).value
+
+
+def test_fetch_caches_values_including_none_and_counts_hits():
+    calls, compute = _counter()
+    assert cache_aside.fetch("t-basic", ("a", 1), compute) == 1
+    assert cache_aside.fetch("t-basic", ("a", 1), compute) == 1
+    assert cache_aside.fetch("t-basic", "a:2", compute) == 2
+    assert len(calls) == 2
+    assert _count("t-basic", "miss") == 2 and _count("t-basic", "hit") == 1
+
+    nones = []
+    for _ in range(3):
+        assert cache_aside.fetch("t-none", "k", lambda: nones.append(1)) is None
+    assert len(nones) == 1
+
+
+def test_bump_invalidates_a_namespace_and_forget_one_key():
+    calls, compute = _counter()
+    cache_aside.fetch("t-ver", "x", compute)
+    cache_aside.fetch("t-ver", "y", compute)
+    cache_aside.fetch("t-other", "x", compute)
+    cache_aside.bump("t-ver")
+    assert cache_aside.fetch("t-ver", "x", compute) == 4
+    assert cache_aside.fetch("t-ver", "y", compute) == 5
+    assert cache_aside.fetch("t-other", "x", compute) == 3
+    cache_aside.forget("t-ver", "x")
+    assert cache_aside.fetch("t-ver", "x", compute) == 6
+    assert cache_aside.fetch("t-ver", "y", compute) == 5
+
+
+def test_evicted_versions_do_not_revive_stale_entries():
+    calls, compute = _counter()
+    cache_aside.fetch("t-evict", "x", compute)
+    cache_aside.bump("t-evict")
+    cache_aside.fetch("t-evict", "x", compute)
+    cache.delete(cache_aside._version_key("t-evict"))
+    assert cache_aside.fetch("t-evict", "x", compute) == 3
+
+
+def test_early_refresh_recomputes_near_expiry(monkeypatch):
+    calls, counted = _counter()
+
+    def compute():
+        time.sleep(0.01)  # refresh odds scale with how long a fill takes
+        return counted()
+
+    cache_aside.fetch("t-early", "k", compute, timeout=60)
+    # Far from expiry, even the unluckiest draw is a hit
+    monkeypatch.setattr(cache_aside.random, "random", lambda: 0.999999)
+    assert cache_aside.fetch("t-early", "k", compute, timeout=60) == 1
+    # Just before expiry, a refresh is drawn and the value recomputed
+    real_time = time.time
+    monkeypatch.setattr(cache_aside.time, "time", lambda: real_time() + 59.99)
+    assert cache_aside.fetch("t-early", "k", compute, timeout=60) == 2
+    assert _count("t-early", "refresh") == 1
+    # beta=0 turns early refresh off
+    assert cache_aside.fetch("t-early", "k", compute, timeout=60, beta=0) == 2
+
+
+def test_concurrent_misses_compute_once():
+    started = threading.Barrier(8)
+    calls = []
+
+    def slow():
+        calls.append(1)
+        time.sleep(0.2)
+        return "value"
+
+    results = []
+
+    def worker():
+        started.wait()
+        results.append(cache_aside.fetch("t-stampede", "hot", slow))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_local_memory_cache_is_the_fallback():
+    assert settings.CACHES["default"]["BACKEND"].endswith("LocMemCache")
+    assert settings.CACHES["default"]["KEY_PREFIX"] == "courpera"
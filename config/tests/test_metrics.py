@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+from channels.db import database_sync_to_async
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.test import Client, override_settings
+
+from config.metrics import WS_CONNECTIONS, WS_DROPPED, WS_MESSAGES, Counter, Histogram, Registry
+from courses.models import Course
+
+
+def _value(metric, *labels) -> float:
+    return metric.labels(*labels).value
+
+
+def test_collectors_are_exact_under_thread_contention():
+    reg = Registry()
+    hits = reg.register(Counter("t_hits_total", "Hits.", ("route",)))
+    sizes = reg.register(Histogram("t_size", "Sizes.", buckets=(1, 10)))
+
+    def work():
+        for i in range(2000):
+            hits.labels("a").inc()
+            sizes.observe(i % 20)
+
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    text = reg.exposition()
+    assert 't_hits_total{route="a"} 16000' in text
+    # 0 and 1 fall in le=1; 2..10 in le=10; the rest only in +Inf (cumulative)
+    assert 't_size_bucket{le="1"} 1600' in text
+    assert 't_size_bucket{le="10"} 8800' in text
+    assert 't_size_bucket{le="+Inf"} 16000' in text
+    assert "t_size_count 16000" in text
+    assert "# TYPE t_size histogram" in text
+
+
+@pytest.mark.django_db
+@pytest.mark.security
+def test_metrics_endpoint_is_restricted():
+    assert Client().get("/metrics").status_code == 403
+    staff = User.objects.create_user(username="metrics_staff", password="pw", is_staff=True)
+    c = Client(); c.force_login(staff)
+    r = c.get("/metrics")
+    assert r.status_code == 200
+    assert r["Content-Type"].startswith("text/plain; version=0.0.4")
+    with override_settings(METRICS_TOKEN="s3cret"):
+        assert Client().get("/metrics", HTTP_AUTHORIZATION="Bearer s3cret").status_code == 200
+        assert Client().get("/metrics", HTTP_AUTHORIZATION="Bearer nope").status_code == 403
+
+
+@pytest.mark.django_db
+def test_request_latency_and_grade_upserts_are_exposed():
+    staff = User.objects.create_user(username="metrics_view", password="pw", is_staff=True)
+    c = Client(); c.force_login(staff)
+    c.get("/")
+    body = c.get("/metrics").content.decode()
+    assert 'courpera_http_requests_total{view="index",method="GET",status="200"}' in body
+    assert 'courpera_http_request_duration_seconds_bucket{view="index",method="GET",le="+Inf"}' in body
+    assert "# TYPE courpera_grade_upsert_duration_seconds histogram" in body
+
+
+@database_sync_to_async
+def _course_and_session():
+    teacher = User.objects.create_user(username="metrics_ws", password="pw")
+    teacher.profile.role = "teacher"; teacher.profile.save(update_fields=["role"])
+    course = Course.objects.create(owner=teacher, title="Metrics WS", description="")
+    client = Client(); client.force_login(teacher)
+    return course.id, client.cookies["sessionid"].value
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.ws
+async def test_ws_connections_messages_and_drops_are_counted():
+    from config.asgi import application
+
+    course_id, sessionid = await _course_and_session()
+    room = f"course_{course_id}"
+    comm = WebsocketCommunicator(application, f"/ws/chat/course/{course_id}/", headers=[(b"cookie", f"sessionid={sessionid}".encode())])
+    connected, _ = await comm.connect()
+    assert connected
+    assert _value(WS_CONNECTIONS, room) == 1
+    for i in range(7):
+        await comm.send_json_to({"message": f"m{i}"})
+    await asyncio.sleep(0.3)
+    await comm.disconnect()
+    assert _value(WS_MESSAGES, room) == 5
+    assert _value(WS_DROPPED, room) == 2
+    assert _value(WS_CONNECTIONS, room) == 0
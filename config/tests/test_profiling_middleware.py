@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import re
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from config.middleware import ProfilingMiddleware, profile_stats
+from courses.models import Course
+
+
+def _timings(header: str) -> dict[str, tuple[float, str]]:
+    out = {}
+    for part in header.split(","):
+        m = re.match(r'\s*(\w+);dur=([\d.]+);desc="([^"]*)"', part)
+        assert m, header
+        out[m.group(1)] = (float(m.group(2)), m.group(3))
+    return out
+
+
+def test_profiling_is_removed_from_the_chain_when_disabled():
+    with pytest.raises(MiddlewareNotUsed):
+        ProfilingMiddleware(lambda r: None)
+
+
+@pytest.mark.django_db
+def test_no_server_timing_header_by_default():
+    r = Client().get("/")
+    assert "Server-Timing" not in r.headers
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+@override_settings(PROFILING_ENABLED=True)
+def test_server_timing_reports_queries_and_templates_and_feeds_admin_panel():
+    profile_stats.reset()
+    teacher = User.objects.create_user(username="prof_t", password="pw", is_staff=True)
+    teacher.profile.role = "teacher"; teacher.profile.save(update_fields=["role"])
+    course = Course.objects.create(owner=teacher, title="Profiled", description="")
+    c = Client(); c.force_login(teacher)
+
+    with CaptureQueriesContext(connection) as ctx:
+        r = c.get(f"/courses/{course.id}/")
+    assert r.status_code == 200
+    timings = _timings(r.headers["Server-Timing"])
+    assert set(timings) == {"db", "tpl", "view", "total"}
+    assert timings["db"][1] == f"{len(ctx.captured_queries)} queries"
+    assert timings["tpl"][0] > 0
+    assert timings["total"][0] >= timings["view"][0] >= timings["tpl"][0]
+
+    # Staff see the slowest endpoints in the Admin Mode panel
+    r = c.get("/")
+    assert b"Slowest endpoints" in r.content
+    assert b"courses:detail" in r.content
+    row = next(s for s in profile_stats.summary() if s["name"] == "courses:detail")
+    assert row["count"] == 1 and row["p50"] <= row["p95"] <= row["p99"]
+    profile_stats.reset()
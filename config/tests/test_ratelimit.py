@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from config.ratelimit import Rate, client_ip, hit, hit_all
+
+
+def test_fixed_window_resets_at_the_boundary():
+    rate = Rate(3, 60, sliding=False)
+    assert [hit("t", "a", rate, now=120.0 + i).allowed for i in range(4)] == [True, True, True, False]
+    denied = hit("t", "a", rate, now=150.0)
+    assert not denied.allowed and denied.retry_after == 30
+    assert hit("t", "a", rate, now=180.0).allowed
+    # Other identifiers and scopes are independent
+    assert hit("t", "b", rate, now=125.0).allowed and hit("u", "a", rate, now=125.0).allowed
+
+
+def test_sliding_window_weights_the_previous_window():
+    rate = Rate(4, 60)
+    for i in range(4):
+        assert hit("s", "a", rate, now=60.0 + i).allowed
+    # A third of the way into the next window the previous one still
+    # counts for ceil(4 * 2/3) = 3 attempts
+    assert hit("s", "a", rate, now=140.0).allowed
+    denied = hit("s", "a", rate, now=140.0)
+    assert not denied.allowed and denied.count == 4
+    # Room opens once the previous window's share drops to 2 (at t=150)
+    assert denied.retry_after == 10
+    assert not hit("s", "a", rate, now=149.0).allowed
+    assert hit("s", "a", rate, now=140.0 + denied.retry_after).allowed
+    # Just after a boundary a full previous window still blocks
+    for i in range(4):
+        assert hit("s", "b", rate, now=170.0 + i).allowed
+    assert not hit("s", "b", rate, now=180.5).allowed
+
+def test_hit_all_stops_at_the_first_exhausted_limit():
+    tight, loose = Rate(1, 60, sliding=False), Rate(10, 60, sliding=False)
+    assert hit_all([("ip", "1.2.3.4", loose), ("acct", "alice", tight)], now=0).allowed
+    assert not hit_all([("ip", "1.2.3.4", loose), ("acct", "alice", tight)], now=1).allowed
+    assert hit_all([("ip", "1.2.3.4", loose), ("acct", "bob", tight)], now=2).allowed
+
+
+def test_client_ip_honours_trusted_proxies_only():
+    request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="6.6.6.6, 203.0.113.9")
+    assert client_ip(request) == "10.0.0.1"
+    with override_settings(RATELIMIT_TRUSTED_PROXIES=1):
+        assert client_ip(request) == "203.0.113.9"
+
+
+@pytest.mark.django_db
+@pytest.mark.security
+def test_login_throttle_follows_the_account_and_skips_session_writes():
+    User.objects.create_user(username="victim", password="correct")
+    for _ in range(10):
+        Client().post("/accounts/login/", {"username": "victim", "password": "wrong"})
+    # A fresh session does not reset the per-account limit
+    fresh = Client()
+    with CaptureQueriesContext(connection) as ctx:
+        r = fresh.post("/accounts/login/", {"username": "VICTIM", "password": "correct"})
+    assert b"Too many login attempts" in r.content
+    assert not any("django_session" in q["sql"] for q in ctx.captured_queries)
+    # Other accounts from the same address are unaffected
+    User.objects.create_user(username="other", password="pw")
+    assert Client().post("/accounts/login/", {"username": "other", "password": "pw"}).status_code == 302
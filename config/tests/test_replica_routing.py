@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connections, router
+from django.test import Client
+from freezegun import freeze_time
+
+from config.routers import read_intent
+from courses.models import Course
+
+pytestmark = pytest.mark.django_db(transaction=True, databases=["default", "replica"])
+
+
+@pytest.fixture(scope="module", autouse=True)
+def replica_alias(django_db_setup, tmp_path_factory):
+    # Registered after the test database exists but before each test's
+    # database setup, so the test case can list it in `databases`
+    path = tmp_path_factory.mktemp("replica") / "replica.sqlite3"
+    default = connections.settings["default"]
+    connections.settings["replica"] = {**default, "NAME": str(path), "TEST": {**default["TEST"], "NAME": str(path)}}
+    yield path
+    connections["replica"].close()
+    del connections["replica"]
+    del connections.settings["replica"]
+
+
+@pytest.fixture
+def replica(replica_alias, settings):
+    """A second SQLite file standing in for a replica of the primary.
+
+    Call the returned function to "replicate" (copy the primary into the
+    replica file); anything written afterwards exists only on the primary.
+    """
+    settings.DATABASE_REPLICAS = ["replica"]
+
+    def replicate() -> None:
+        connections["replica"].close()
+        primary = connections["default"]
+        primary.ensure_connection()
+        target = sqlite3.connect(replica_alias)
+        try:
+            primary.connection.backup(target)
+        finally:
+            target.close()
+
+    return replicate
+
+
+def _people():
+    teacher = User.objects.create_user(username="rt", password="pw")
+    teacher.profile.role = "teacher"; teacher.profile.save(update_fields=["role"])
+    student = User.objects.create_user(username="rs", password="pw")
+    student.profile.role = "student"; student.profile.save(update_fields=["role"])
+    return teacher, student
+
+
+def test_read_intent_views_read_from_the_replica(replica):
+    teacher, _ = _people()
+    course = Course.objects.create(owner=teacher, title="Original title", description="")
+    replica()
+    Course.objects.filter(pk=course.pk).update(title="Renamed title")
+
+    # The catalogue opts into replica reads and shows the lagging copy
+    body = Client().get("/courses/").content.decode()
+    assert "Original title" in body and "Renamed title" not in body
+    # Views without the annotation keep reading the primary
+    api = Client().get("/api/v1/courses/").content.decode()
+    assert "Renamed title" in api
+
+
+def test_session_sticks_to_primary_after_a_write(replica, settings):
+    settings.REPLICA_STICKY_SECONDS = 5
+    teacher, student = _people()
+    course = Course.objects.create(owner=teacher, title="Original title", description="")
+    c = Client(); c.force_login(student)
+    replica()
+    Course.objects.filter(pk=course.pk).update(title="Renamed title")
+
+    with freeze_time() as clock:
+        assert "Original title" in c.get("/courses/").content.decode()
+        assert c.post(f"/courses/{course.pk}/enrol/").status_code == 302
+        # Read-your-writes: the session now reads the primary
+        assert "Renamed title" in c.get("/courses/").content.decode()
+        clock.tick(6)
+        assert "Original title" in c.get("/courses/").content.decode()
+
+
+def test_writes_inside_a_scope_send_later_reads_to_the_primary(replica):
+    teacher, _ = _people()
+    replica()
+    with read_intent() as alias:
+        assert alias == "replica"
+        assert router.db_for_read(Course) == "replica"
+        Course.objects.create(owner=teacher, title="New", description="")
+        assert router.db_for_read(Course) == "default"
+    assert router.db_for_read(Course) == "default"
+    assert router.db_for_write(Course) == "default"
+    assert router.allow_migrate("replica", "courses") is False
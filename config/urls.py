@@ -9,6 +9,8 @@ from django.http import HttpResponse
 from django.conf import settings
 from django.conf.urls.static import static
 
+from .metrics import metrics_view
+
 
 def _favicon(request):  # inline SVG favicon to avoid 404s in tests/dev
     svg = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 16 16"><rect width="16" height="16" fill="#0056D2"/></svg>'
@@ -17,6 +19,7 @@ def _favicon(request):  # inline SVG favicon to avoid 404s in tests/dev
 
 urlpatterns = [
     path("favicon.ico", _favicon),
+    path("metrics", metrics_view, name="metrics"),
     path("admin/", admin.site.urls),
     path("accounts/", include("accounts.urls")),
     path("courses/", include("courses.urls")),
@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start every test with an empty cache.
+
+    Cached counters and throttles are keyed by primary keys, which are
+    reused once a test's transaction is rolled back; clearing the cache
+    keeps tests independent of execution order.
+    """
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path_factory):
+    """Write uploads made by tests to a temporary directory, not ./media."""
+    settings.MEDIA_ROOT = str(tmp_path_factory.mktemp("media"))
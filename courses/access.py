@@ -0,0 +1,127 @@
+"""Course access checks with a per-request memo (Stage 18).
+
+Views used to keep their own `_is_enrolled` helpers, each running an
+`Enrolment.exists()` query, and one request could check the same course
+two or three times. `access_for(request)` now returns a `CourseAccess`
+kept on the request. On first use it loads the ids of every course the
+user is enrolled in or owns, in a single query. All later checks in
+the request are set lookups.
+
+Ownership of a `Course` instance is decided from `owner_id` without a
+query. The memo lasts one request. The enrol, unenrol and bulk-enrol
+views change enrolments and then redirect or respond without checking
+access again, so none of them reads a stale memo. `forget(request)`
+drops it for code that would. Sub-requests of an API batch
+(api/batch.py) are read-only GETs and reuse their parent's memo through
+`share`.
+
+For list queries, `visible_to(queryset, user)` keeps the rows whose
+course the user owns or is enrolled in. It filters on two `IN`
+subqueries over indexed columns (course owner, enrolment student)
+instead of joining enrolments, so rows are never duplicated and need no
+DISTINCT. The database answers it with one index lookup per branch.
+"""
+from __future__ import annotations
+
+from functools import cached_property
+
+from django.db.models import IntegerField, Q, QuerySet, Value
+from django.http import HttpRequest
+
+from .models import Course, Enrolment
+
+_ATTR = "_course_access"
+_ENROLLED, _OWNED = 0, 1
+
+
+def _kind(kind: int) -> Value:
+    return Value(kind, output_field=IntegerField())
+
+
+def _course_id(course: Course | int) -> int:
+    return course if isinstance(course, int) else course.pk
+
+
+class CourseAccess:
+    """What one user may do with courses, loaded lazily and at most once."""
+
+    def __init__(self, user):
+        self.user = user
+        self.user_id = user.pk if getattr(user, "is_authenticated", False) else None
+
+    @cached_property
+    def _ids(self) -> tuple[frozenset[int], frozenset[int]]:
+        if self.user_id is None:
+            return frozenset(), frozenset()
+        enrolled = Enrolment.objects.filter(student_id=self.user_id).order_by().annotate(kind=_kind(_ENROLLED)).values_list("course_id", "kind")
+        owned = Course.objects.filter(owner_id=self.user_id).order_by().annotate(kind=_kind(_OWNED)).values_list("id", "kind")
+        ids: tuple[set[int], set[int]] = (set(), set())
+        for course_id, kind in enrolled.union(owned, all=True):
+            ids[kind].add(course_id)
+        return frozenset(ids[_ENROLLED]), frozenset(ids[_OWNED])
+
+    @property
+    def enrolled_ids(self) -> frozenset[int]:
+        return self._ids[_ENROLLED]
+
+    @property
+    def owned_ids(self) -> frozenset[int]:
+        return self._ids[_OWNED]
+
+    @property
+    def is_teacher(self) -> bool:
+        return self.user_id is not None and getattr(getattr(self.user, "profile", None), "role", None) == "teacher"
+
+    def is_owner(self, course: Course | int) -> bool:
+        if self.user_id is None:
+            return False
+        if isinstance(course, Course):
+            return course.owner_id == self.user_id
+        return course in self.owned_ids
+
+    def is_teacher_owner(self, course: Course | int) -> bool:
+        return self.is_teacher and self.is_owner(course)
+
+    def is_enrolled(self, course: Course | int) -> bool:
+        return self.user_id is not None and _course_id(course) in self.enrolled_ids
+
+    def can_view(self, course: Course | int) -> bool:
+        """Owner or enrolled student."""
+        return self.is_owner(course) or self.is_enrolled(course)
+
+
+def access_for(request: HttpRequest) -> CourseAccess:
+    """The request's `CourseAccess`, created on first use (DRF requests included)."""
+    request = getattr(request, "_request", request)
+    access = getattr(request, _ATTR, None)
+    user = request.user
+    if access is None or access.user_id != (user.pk if user.is_authenticated else None):
+        access = CourseAccess(user)
+        setattr(request, _ATTR, access)
+    return access
+
+
+def forget(request: HttpRequest) -> None:
+    """Drop the memo after changing the user's enrolments or courses."""
+    request = getattr(request, "_request", request)
+    if hasattr(request, _ATTR):
+        delattr(request, _ATTR)
+
+
+def share(parent: HttpRequest, child: HttpRequest) -> None:
+    """Let `child`, a sub-request run inside `parent`, use the parent's memo."""
+    setattr(getattr(child, "_request", child), _ATTR, access_for(parent))
+
+
+def visible_to(queryset: QuerySet, user, course_field: str = "course") -> QuerySet:
+    """Rows of `queryset` whose course (`course_field`) `user` owns or is enrolled in."""
+    if not getattr(user, "is_authenticated", False):
+        return queryset.none()
+    owned = Course.objects.filter(owner_id=user.pk).order_by().values("pk")
+    enrolled = Enrolment.objects.filter(student_id=user.pk).order_by().values("course_id")
+    return queryset.filter(Q(**{f"{course_field}__in": owned}) | Q(**{f"{course_field}__in": enrolled}))
+
+
+def visible_courses(user) -> QuerySet:
+    """Courses `user` owns or is enrolled in."""
+    return visible_to(Course.objects.all(), user, course_field="pk")
@@ -7,3 +7,7 @@ class CoursesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "courses"
 
+    def ready(self) -> None:  # pragma: no cover (import-time hook)
+        # Import signal handlers that maintain cached roster counts.
+        from . import signals  # noqa: F401
+        return super().ready()
@@ -0,0 +1,179 @@
+"""Bulk enrolment helpers (Stage 17).
+
+Teachers onboarding a cohort submit thousands of identifiers at once.
+Identifiers are resolved with a handful of set-based queries and the
+enrolments are inserted with `bulk_create(ignore_conflicts=True)`, so
+re-running the same import is harmless. The per-enrolment notification
+signal does not fire for bulk inserts; one summary notification is
+written for the whole import instead.
+"""
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, Iterable
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from accounts.models import Role
+from activity.models import Notification
+from config.metrics import NOTIFICATION_FANOUT
+from .models import Course, Enrolment
+from .roster import invalidate_roster_count
+
+# Keep IN (...) lists well below SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+MAX_IDENTIFIERS = 5000
+
+STATUS_ENROLLED = "enrolled"
+STATUS_ALREADY = "already_enrolled"
+STATUS_DUPLICATE = "duplicate"
+STATUS_NOT_FOUND = "not_found"
+STATUS_NOT_STUDENT = "not_student"
+
+# Header cells recognised when importing a CSV with a header row
+_CSV_HEADERS = {"identifier", "username", "email", "e-mail", "student_number", "student id", "student_id"}
+
+
+def _chunks(items: list, size: int = LOOKUP_CHUNK) -> Iterable[list]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def parse_identifiers_csv(data: bytes | str) -> list[str]:
+    """Extract identifiers from CSV content (one identifier per row).
+
+    The first column is used unless a header row names a known column
+    (username, email, student_number, ...). Blank cells are skipped.
+    """
+    text = data.decode("utf-8-sig", errors="replace") if isinstance(data, bytes) else data
+    rows = list(csv.reader(io.StringIO(text)))
+    if not rows:
+        return []
+    col = 0
+    header = [c.strip().lower() for c in rows[0]]
+    if any(h in _CSV_HEADERS for h in header):
+        col = next(i for i, h in enumerate(header) if h in _CSV_HEADERS)
+        rows = rows[1:]
+    out: list[str] = []
+    for row in rows:
+        if len(row) > col and row[col].strip():
+            out.append(row[col].strip())
+    return out
+
+
+def resolve_identifiers(identifiers: Iterable[str]) -> dict[str, dict[str, Any]]:
+    """Resolve usernames, e-mails or Student IDs to users in bulk.
+
+    Returns a mapping of lower-cased identifier -> user row
+    (`id`, `username`, `role`). Matching is case-insensitive and follows
+    the single-enrol precedence: username, then e-mail, then Student ID.
+    """
+    keys = sorted({(i or "").strip().lower() for i in identifiers if (i or "").strip()})
+    by_username: dict[str, dict[str, Any]] = {}
+    by_email: dict[str, dict[str, Any]] = {}
+    by_sid: dict[str, dict[str, Any]] = {}
+    for chunk in _chunks(keys):
+        rows = (
+            User.objects.annotate(
+                u_l=Lower("username"),
+                e_l=Lower("email"),
+                s_l=Lower("profile__student_number"),
+            )
+            .filter(Q(u_l__in=chunk) | Q(e_l__in=chunk) | Q(s_l__in=chunk))
+            .order_by("id")
+            .values("id", "username", "u_l", "e_l", "s_l", "profile__role")
+        )
+        for r in rows:
+            info = {"id": r["id"], "username": r["username"], "role": r["profile__role"]}
+            by_username.setdefault(r["u_l"], info)
+            if r["e_l"]:
+                by_email.setdefault(r["e_l"], info)
+            if r["s_l"]:
+                by_sid.setdefault(r["s_l"], info)
+    resolved: dict[str, dict[str, Any]] = {}
+    for k in keys:
+        hit = by_username.get(k) or by_email.get(k) or by_sid.get(k)
+        if hit:
+            resolved[k] = hit
+    return resolved
+
+
+def size_error(identifiers: list[str]) -> str | None:
+    """Message rejecting an import of more than `MAX_IDENTIFIERS` rows, or None."""
+    if len(identifiers) > MAX_IDENTIFIERS:
+        return f"Too many rows ({len(identifiers)}); import at most {MAX_IDENTIFIERS} at a time."
+    return None
+
+
+def bulk_enrol(course: Course, identifiers: list[str], *, actor=None) -> dict[str, Any]:
+    """Enrol many students into `course` and report a result per row.
+
+    The operation is idempotent: students who are already enrolled (or
+    appear twice in the input) are reported, not re-inserted. Returns
+    `{"summary": {status: count}, "results": [{row, identifier, status,
+    user_id, username}]}` with rows numbered from 1 in input order.
+    Callers reject oversized imports first (`size_error`); this raises
+    ValueError rather than dropping rows.
+    """
+    error = size_error(identifiers)
+    if error:
+        raise ValueError(error)
+    identifiers = [(i or "").strip() for i in identifiers]
+    resolved = resolve_identifiers(identifiers)
+    student_ids = sorted({u["id"] for u in resolved.values() if u["role"] == Role.STUDENT})
+    existing: set[int] = set()
+    for chunk in _chunks(student_ids):
+        existing.update(
+            Enrolment.objects.filter(course=course, student_id__in=chunk).values_list("student_id", flat=True)
+        )
+
+    results: list[dict[str, Any]] = []
+    seen: set[int] = set()
+    to_create: list[Enrolment] = []
+    for n, ident in enumerate(identifiers, start=1):
+        if not ident:
+            continue
+        user = resolved.get(ident.lower())
+        row: dict[str, Any] = {"row": n, "identifier": ident, "user_id": None, "username": None}
+        if user:
+            row.update(user_id=user["id"], username=user["username"])
+        if not user:
+            row["status"] = STATUS_NOT_FOUND
+        elif user["role"] != Role.STUDENT:
+            row["status"] = STATUS_NOT_STUDENT
+        elif user["id"] in seen:
+            row["status"] = STATUS_DUPLICATE
+        elif user["id"] in existing:
+            row["status"] = STATUS_ALREADY
+        else:
+            row["status"] = STATUS_ENROLLED
+            to_create.append(Enrolment(course=course, student_id=user["id"]))
+        if user:
+            seen.add(user["id"])
+        results.append(row)
+
+    with transaction.atomic():
+        Enrolment.objects.bulk_create(to_create, batch_size=LOOKUP_CHUNK, ignore_conflicts=True)
+        if to_create:
+            # One summary notification instead of one per enrolment
+            noun = "student" if len(to_create) == 1 else "students"
+            Notification.objects.create(
+                user_id=course.owner_id,
+                actor=actor,
+                type=Notification.TYPE_ENROLMENT,
+                course=course,
+                message=f"Bulk enrolment: {len(to_create)} {noun} added to {course.title}"[:200],
+            )
+            NOTIFICATION_FANOUT.labels(Notification.TYPE_ENROLMENT).observe(1)
+            # bulk_create skips post_save, so the roster counter is reset
+            # here, once the rows are visible to other readers
+            transaction.on_commit(lambda: invalidate_roster_count(course.id))
+
+    summary: dict[str, int] = {}
+    for row in results:
+        summary[row["status"]] = summary.get(row["status"], 0) + 1
+    return {"summary": summary, "results": results}
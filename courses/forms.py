@@ -32,3 +32,29 @@ class AddStudentForm(forms.Form):
     """
 
     query = forms.CharField(label="Username, e-mail, or Student ID", max_length=150)
+
+
+class BulkEnrolForm(forms.Form):
+    """Teacher utility form to enrol a cohort from a CSV file or pasted list.
+
+    Each row (or line) holds one username, e-mail, or Student ID.
+    """
+
+    csv_file = forms.FileField(label="CSV file", required=False)
+    identifiers = forms.CharField(
+        label="Or paste identifiers (one per line)",
+        required=False,
+        widget=forms.Textarea(attrs={"rows": 4}),
+    )
+
+    def clean_csv_file(self):
+        f = self.cleaned_data.get("csv_file")
+        if f and getattr(f, "size", 0) > 2 * 1024 * 1024:  # 2 MB is plenty for a roster
+            raise forms.ValidationError("CSV must be 2 MB or smaller.")
+        return f
+
+    def clean(self):
+        cleaned = super().clean()
+        if not cleaned.get("csv_file") and not (cleaned.get("identifiers") or "").strip():
+            raise forms.ValidationError("Upload a CSV file or paste at least one identifier.")
+        return cleaned
@@ -0,0 +1,37 @@
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill(apps, schema_editor):
+    # Existing rows have not changed since they were created
+    for name in ("Enrolment", "Feedback"):
+        apps.get_model("courses", name).objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("courses", "0003_merge_0002_course_syllabus_outcomes_0002_feedback"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="course",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.AddField(
+            model_name="enrolment",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="feedback",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -14,6 +14,7 @@ class Feedback(models.Model):
     comment = models.TextField(blank=True)
     anonymous = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ("course", "student")
@@ -0,0 +1,94 @@
+"""Course roster paging and cached roster counts (Stage 17).
+
+Large courses can hold thousands of enrolments, so the roster is served
+in keyset pages ordered by (username, user id) instead of being rendered
+inline. The roster size shown on the course page comes from a cached
+counter that is adjusted as enrolments are created and removed.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from typing import Any
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Enrolment
+
+ROSTER_PAGE_SIZE = 50
+ROSTER_MAX_PAGE_SIZE = 200
+ROSTER_COUNT_TTL = 60 * 60
+
+
+def _count_key(course_id: int) -> str:
+    return f"courses:roster_count:{course_id}"
+
+
+def roster_count(course_id: int) -> int:
+    """Return the number of enrolments for a course (cached)."""
+    key = _count_key(course_id)
+    value = cache.get(key)
+    if value is None:
+        value = Enrolment.objects.filter(course_id=course_id).count()
+        cache.set(key, value, ROSTER_COUNT_TTL)
+    return int(value)
+
+
+def adjust_roster_count(course_id: int, delta: int) -> None:
+    """Apply a delta to a cached roster count; a cache miss is left alone.
+
+    A missing key is simply recomputed on the next read, so there is no
+    need to seed it here.
+    """
+    if not delta:
+        return
+    try:
+        cache.incr(_count_key(course_id), delta)
+    except ValueError:
+        pass
+
+
+def invalidate_roster_count(course_id: int) -> None:
+    """Drop a cached roster count so the next read recounts."""
+    cache.delete(_count_key(course_id))
+
+
+def encode_cursor(username: str, user_id: int) -> str:
+    raw = json.dumps([username, user_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[str, int] | None:
+    """Decode an opaque roster cursor; return None when malformed."""
+    try:
+        pad = "=" * (-len(token) % 4)
+        username, user_id = json.loads(base64.urlsafe_b64decode(token + pad))
+        return str(username), int(user_id)
+    except Exception:
+        return None
+
+
+def roster_page(course_id: int, after: str | None = None, limit: int = ROSTER_PAGE_SIZE) -> dict[str, Any]:
+    """Return one keyset page of a course roster.
+
+    Rows are ordered by (student username, student id) and the page after
+    `after` (an opaque cursor from a previous page) is fetched with a
+    single range query, so deep pages cost the same as the first one.
+    Returns `{"enrolments": [...], "next": cursor | None}`.
+    """
+    limit = max(1, min(int(limit or ROSTER_PAGE_SIZE), ROSTER_MAX_PAGE_SIZE))
+    qs = (
+        Enrolment.objects.filter(course_id=course_id)
+        .select_related("student", "student__profile")
+        .order_by("student__username", "student_id")
+    )
+    pos = decode_cursor(after) if after else None
+    if pos:
+        username, user_id = pos
+        qs = qs.filter(Q(student__username__gt=username) | Q(student__username=username, student_id__gt=user_id))
+    rows = list(qs[: limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    nxt = encode_cursor(rows[-1].student.username, rows[-1].student_id) if has_more and rows else None
+    return {"enrolments": rows, "next": nxt}
@@ -0,0 +1,25 @@
+"""Signals keeping cached course counters in step with enrolments.
+
+Counters move only once the enrolment change commits; a rolled-back
+enrolment leaves them alone.
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Enrolment
+from .roster import adjust_roster_count
+
+
+@receiver(post_save, sender=Enrolment)
+def enrolment_created(sender, instance: Enrolment, created: bool, **kwargs):  # noqa: D401
+    """Increment the cached roster count for new enrolments."""
+    if created:
+        transaction.on_commit(lambda: adjust_roster_count(instance.course_id, 1))
+
+
+@receiver(post_delete, sender=Enrolment)
+def enrolment_deleted(sender, instance: Enrolment, **kwargs):  # noqa: D401
+    """Decrement the cached roster count when a student is removed."""
+    course_id = instance.course_id
+    transaction.on_commit(lambda: adjust_roster_count(course_id, -1))
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from activity.models import Notification
+from courses.enrolment import bulk_enrol, parse_identifiers_csv
+from courses.models import Course, Enrolment
+
+
+def _user(username, role="student", **extra):
+    u = User.objects.create_user(username=username, password="pw", **extra)
+    if role != "student":
+        u.profile.role = role; u.profile.save(update_fields=["role"])
+    return u
+
+
+@pytest.mark.django_db
+def test_bulk_enrol_api_reports_rows_and_is_idempotent():
+    t = _user("tbulk", role="teacher")
+    c = Course.objects.create(owner=t, title="Bulk", description="")
+    s1 = _user("Alice", email="alice@example.com")
+    s2 = _user("bob", email="bob@example.com")
+    Enrolment.objects.create(course=c, student=s2)
+    Notification.objects.all().delete()
+
+    client = APIClient(); assert client.login(username="tbulk", password="pw")
+    payload = {"identifiers": ["alice", "BOB@example.com", s1.profile.student_number, "ghost", "tbulk"]}
+    r = client.post(f"/api/v1/courses/{c.id}/enrolments/bulk/", payload, format="json")
+    assert r.status_code == 200
+    statuses = [row["status"] for row in r.json()["results"]]
+    assert statuses == ["enrolled", "already_enrolled", "duplicate", "not_found", "not_student"]
+    assert r.json()["summary"]["enrolled"] == 1
+    assert Enrolment.objects.filter(course=c).count() == 2
+    # One summary notification instead of one per student
+    assert Notification.objects.filter(course=c, type=Notification.TYPE_ENROLMENT).count() == 1
+
+    # Re-running the same import changes nothing
+    r2 = client.post(f"/api/v1/courses/{c.id}/enrolments/bulk/", payload, format="json")
+    assert r2.json()["summary"].get("enrolled", 0) == 0
+    assert Enrolment.objects.filter(course=c).count() == 2
+
+
+@pytest.mark.django_db
+def test_bulk_enrol_api_owner_only():
+    t = _user("tb_own", role="teacher")
+    other = _user("tb_other", role="teacher")
+    c = Course.objects.create(owner=t, title="Own", description="")
+    client = APIClient(); client.force_authenticate(user=other)
+    r = client.post(f"/api/v1/courses/{c.id}/enrolments/bulk/", {"identifiers": ["x"]}, format="json")
+    assert r.status_code == 403
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_bulk_enrol_query_count_is_independent_of_cohort_size():
+    t = _user("tb_perf", role="teacher")
+    c = Course.objects.create(owner=t, title="Perf", description="")
+    names = [f"cohort{i:03d}" for i in range(120)]
+    for n in names:
+        User.objects.create_user(username=n)
+    with CaptureQueriesContext(connection) as ctx:
+        out = bulk_enrol(c, names, actor=t)
+    assert out["summary"] == {"enrolled": 120}
+    assert len(ctx.captured_queries) <= 8
+
+
+def test_parse_identifiers_csv_uses_named_column():
+    data = b"\xef\xbb\xbfname,email\nA,a@example.com\nB,\nC,c@example.com\n"
+    assert parse_identifiers_csv(data) == ["a@example.com", "c@example.com"]
+    assert parse_identifiers_csv("alice\nbob\n\n") == ["alice", "bob"]
+
+
+@pytest.mark.django_db
+def test_course_import_students_csv_upload_renders_results():
+    t = _user("tb_html", role="teacher")
+    c = Course.objects.create(owner=t, title="HTML", description="")
+    _user("carol")
+    client = Client(); assert client.login(username="tb_html", password="pw")
+    f = SimpleUploadedFile("cohort.csv", b"username\ncarol\nnobody\n", content_type="text/csv")
+    r = client.post(f"/courses/{c.id}/import-students/", {"csv_file": f})
+    assert r.status_code == 200
+    assert b"not_found" in r.content
+    assert Enrolment.objects.filter(course=c, student__username="carol").exists()
+
+
+@pytest.mark.django_db
+def test_oversized_imports_are_rejected_not_truncated(monkeypatch):
+    from courses import enrolment
+
+    monkeypatch.setattr(enrolment, "MAX_IDENTIFIERS", 3)
+    t = _user("tb_big", role="teacher")
+    c = Course.objects.create(owner=t, title="Big", description="")
+    for n in ("s1", "s2", "s3", "s4"):
+        _user(n)
+    client = Client(); assert client.login(username="tb_big", password="pw")
+    r = client.post(f"/courses/{c.id}/import-students/", {"identifiers": "s1\ns2\ns3\ns4"}, follow=True)
+    assert "Too many rows (4); import at most 3 at a time." in r.content.decode()
+    api = APIClient(); api.force_authenticate(user=t)
+    f = SimpleUploadedFile("cohort.csv", b"s3\ns4\n", content_type="text/csv")
+    r = api.post(f"/api/v1/courses/{c.id}/enrolments/bulk/", {"identifiers": ["s1", "s2"], "file": f}, format="multipart")
+    assert r.status_code == 400 and "Too many rows" in r.json()["identifiers"][0]
+    with pytest.raises(ValueError):
+        bulk_enrol(c, ["s1", "s2", "s3", "s4"], actor=t)
+    assert not Enrolment.objects.filter(course=c).exists()
+
+
+@pytest.mark.django_db
+def test_bulk_enrol_resets_the_roster_count_after_commit(django_capture_on_commit_callbacks):
+    from courses.roster import roster_count
+
+    t = _user("tb_count", role="teacher")
+    c = Course.objects.create(owner=t, title="Count", description="")
+    _user("dan"); _user("eve")
+    assert roster_count(c.id) == 0
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        bulk_enrol(c, ["dan", "eve"], actor=t)
+        assert roster_count(c.id) == 0  # not reset before the commit
+    assert callbacks and roster_count(c.id) == 2
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from assignments.models import Assignment, AssignmentType, QuizAnswerChoice, QuizQuestion
+from courses.access import access_for, forget
+from courses.models import Course, Enrolment
+
+
+def _enrolment_queries(ctx) -> list[str]:
+    return [q["sql"] for q in ctx.captured_queries if "courses_enrolment" in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_access_memo_loads_enrolled_and_owned_ids_in_one_query():
+    teacher = User.objects.create_user(username="acc_t", password="pw")
+    teacher.profile.role = "teacher"; teacher.profile.save(update_fields=["role"])
+    owned = Course.objects.create(owner=teacher, title="Own")
+    other = Course.objects.create(owner=User.objects.create_user(username="acc_o", password="pw"), title="Other")
+    Enrolment.objects.create(course=other, student=teacher)
+
+    request = RequestFactory().get("/")
+    request.user = teacher
+    access = access_for(request)
+    with CaptureQueriesContext(connection) as ctx:
+        assert access.is_teacher_owner(owned) and not access.is_teacher_owner(other)
+        assert access.is_enrolled(other) and not access.is_enrolled(owned)
+        assert access.can_view(other.pk) and access.is_owner(owned.pk)
+        assert access_for(request) is access
+    assert len(ctx.captured_queries) == 1
+
+    forget(request)
+    assert access_for(request) is not access
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_views_run_at_most_one_permission_query_per_request():
+    teacher = User.objects.create_user(username="acc_t2", password="pw")
+    teacher.profile.role = "teacher"; teacher.profile.save(update_fields=["role"])
+    student = User.objects.create_user(username="acc_s2", password="pw")
+    course = Course.objects.create(owner=teacher, title="C")
+    Enrolment.objects.create(course=course, student=student)
+    a = Assignment.objects.create(course=course, type=AssignmentType.QUIZ, title="Q", attempts_allowed=3, is_published=True)
+    q = QuizQuestion.objects.create(assignment=a, order=1, text="1+1?")
+    QuizAnswerChoice.objects.create(question=q, order=1, text="2", is_correct=True)
+    QuizAnswerChoice.objects.create(question=q, order=2, text="3", is_correct=False)
+
+    c = Client(); c.force_login(student)
+    for url in (
+        f"/assignments/{a.pk}/take/",
+        f"/assignments/course/{course.pk}/",
+        f"/messaging/course/{course.pk}/history/",
+        f"/api/v1/courses/{course.pk}/",
+    ):
+        with CaptureQueriesContext(connection) as ctx:
+            r = c.get(url)
+        assert r.status_code == 200, url
+        assert len(_enrolment_queries(ctx)) <= 1, (url, _enrolment_queries(ctx))
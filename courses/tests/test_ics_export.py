@@ -25,9 +25,181 @@ def test_course_calendar_ics_contains_events():
     assert r["Content-Type"].startswith("text/calendar")
     cd = r.headers.get("Content-Disposition", "")
     assert f"course-{c.pk}.ics" in cd
-    body = r.content.decode("utf-8", errors="ignore")
+    body = b"".join(r.streaming_content).decode("utf-8", errors="ignore")
     assert "BEGIN:VCALENDAR" in body and "END:VCALENDAR" in body
     assert "PRODID:-//Courpera//Course Calendar//EN" in body
     # Expect at least one VEVENT with course + material title in summary
     assert "BEGIN:VEVENT" in body
     assert "SUMMARY:ICS Course: Intro" in body or "SUMMARY:ICS Course: Week 1" in body
+
+
+@pytest.mark.django_db
+def test_course_calendar_etag_304_and_assignment_events():
+    from datetime import timedelta
+    from django.utils import timezone
+    from assignments.models import Assignment
+
+    t = User.objects.create_user(username="tics2", password="pw")
+    c = Course.objects.create(owner=t, title="Feed", description="")
+    a = Assignment.objects.create(
+        course=c, type="paper", title="Essay", is_published=True,
+        available_from=timezone.now(), deadline=timezone.now() + timedelta(days=7),
+    )
+    Assignment.objects.create(course=c, type="paper", title="Draft only")
+
+    client = Client()
+    r = client.get(f"/courses/{c.pk}/calendar.ics")
+    first = b"".join(r.streaming_content)
+    body = first.decode()
+    assert f"UID:assignment-{a.pk}-open@courpera" in body
+    assert f"UID:assignment-{a.pk}-due@courpera" in body
+    assert "Draft only" not in body
+    etag = r["ETag"]
+    assert etag.startswith('"') and not r.has_header("Last-Modified")
+
+    # Unchanged content: identical bytes and a 304 on revalidation
+    assert b"".join(client.get(f"/courses/{c.pk}/calendar.ics").streaming_content) == first
+    r304 = client.get(f"/courses/{c.pk}/calendar.ics", HTTP_IF_NONE_MATCH=etag)
+    assert r304.status_code == 304 and r304.content == b""
+
+    # New content changes the validator
+    f = SimpleUploadedFile("w2.pdf", b"%PDF-1.4\n", content_type="application/pdf")
+    Material.objects.create(course=c, uploaded_by=t, title="Week 2", file=f)
+    r2 = client.get(f"/courses/{c.pk}/calendar.ics", HTTP_IF_NONE_MATCH=etag)
+    assert r2.status_code == 200 and r2["ETag"] != etag
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_my_calendar_aggregates_courses_with_fixed_queries():
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from courses.models import Enrolment
+    from courses.views_ics import feed_token
+
+    t = User.objects.create_user(username="tagg", password="pw")
+    s = User.objects.create_user(username="sagg", password="pw")
+
+    def _fetch():
+        client = Client()
+        with CaptureQueriesContext(connection) as ctx:
+            r = client.get("/courses/calendar.ics", {"token": feed_token(s)})
+            body = b"".join(r.streaming_content).decode()
+        assert r.status_code == 200
+        return body, len(ctx.captured_queries)
+
+    c = Course.objects.create(owner=t, title="Agg 0", description="")
+    Enrolment.objects.create(course=c, student=s)
+    Material.objects.create(course=c, uploaded_by=t, title="M0", file=SimpleUploadedFile("m0.pdf", b"%PDF-1.4\n"))
+    _, few = _fetch()
+    for i in range(1, 6):
+        c = Course.objects.create(owner=t, title=f"Agg {i}", description="")
+        Enrolment.objects.create(course=c, student=s)
+        Material.objects.create(course=c, uploaded_by=t, title=f"M{i}", file=SimpleUploadedFile(f"m{i}.pdf", b"%PDF-1.4\n"))
+    body, many = _fetch()
+    assert many == few
+    assert "SUMMARY:Agg 5: M5" in body
+
+    assert Client().get("/courses/calendar.ics").status_code == 403
+    assert Client().get("/courses/calendar.ics", {"token": "bogus"}).status_code == 403
+
+
+def test_ical_escape_and_fold_follow_rfc5545():
+    from courses.views_ics import _ical_escape, _ical_fold
+
+    assert _ical_escape("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+    line = "SUMMARY:" + "é" * 60
+    folded = _ical_fold(line)
+    parts = folded.split("\r\n")
+    assert all(len(p.encode("utf-8")) <= 75 for p in parts)
+    assert all(p.startswith(" ") for p in parts[1:])
+    assert "".join(p[1:] if i else p for i, p in enumerate(parts)) == line
+    assert _ical_fold("SUMMARY:short") == "SUMMARY:short"
+
+
+@pytest.mark.django_db
+def test_course_calendar_streams_many_events():
+    from django.http import StreamingHttpResponse
+
+    t = User.objects.create_user(username="tstream", password="pw")
+    c = Course.objects.create(owner=t, title="Stream, Big; Course", description="")
+    Material.objects.bulk_create(
+        [Material(course=c, uploaded_by=t, title=f"Item {i}", file=f"materials/x{i}.pdf") for i in range(1200)]
+    )
+    r = Client().get(f"/courses/{c.pk}/calendar.ics")
+    assert isinstance(r, StreamingHttpResponse)
+    body = b"".join(r.streaming_content).decode()
+    assert body.count("BEGIN:VEVENT") == 1200
+    assert "X-WR-CALNAME:Stream\\, Big\\; Course" in body
+
+
+@pytest.mark.django_db
+def test_if_modified_since_never_hides_a_deletion():
+    from django.utils.http import http_date
+
+    t = User.objects.create_user(username="tims", password="pw")
+    c = Course.objects.create(owner=t, title="Deletions", description="")
+    _, gone = (Material.objects.create(course=c, uploaded_by=t, title=n, file=f"materials/{n}.pdf") for n in ("keep", "gone"))
+    client = Client()
+    url = f"/courses/{c.pk}/calendar.ics"
+    etag = client.get(url)["ETag"]
+    gone.delete()
+    far_future = http_date(4102444800)  # 2100-01-01
+    r = client.get(url, HTTP_IF_MODIFIED_SINCE=far_future)
+    assert r.status_code == 200 and "SUMMARY:Deletions: gone" not in b"".join(r.streaming_content).decode()
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+
+@pytest.mark.django_db
+@pytest.mark.security
+def test_feed_token_is_revoked_by_a_password_change():
+    from django.core import signing
+    from courses.views_ics import FEED_TOKEN_SALT, feed_token
+
+    u = User.objects.create_user(username="leaky", password="pw")
+    token = feed_token(u)
+    assert Client().get("/courses/calendar.ics", {"token": token}).status_code == 200
+    # A token signed over the bare user id (the old format) is not accepted
+    assert Client().get("/courses/calendar.ics", {"token": signing.dumps(u.pk, salt=FEED_TOKEN_SALT)}).status_code == 403
+
+    u.set_password("new-pw"); u.save()
+    assert Client().get("/courses/calendar.ics", {"token": token}).status_code == 403
+    assert Client().get("/courses/calendar.ics", {"token": feed_token(u)}).status_code == 200
+
+
+@pytest.mark.asyncio
+@pytest.mark.django_db(transaction=True)
+async def test_feed_streams_through_the_asgi_handler_without_buffering():
+    import warnings
+
+    from channels.db import database_sync_to_async
+    from channels.testing import HttpCommunicator
+
+    from config.asgi import application
+
+    @database_sync_to_async
+    def _course():
+        t = User.objects.create_user(username="tasgi", password="pw")
+        c = Course.objects.create(owner=t, title="ASGI", description="")
+        Material.objects.bulk_create([Material(course=c, uploaded_by=t, title=f"Item {i}", file=f"materials/a{i}.pdf") for i in range(50)])
+        return c.pk
+
+    pk = await _course()
+    comm = HttpCommunicator(application, "GET", f"/courses/{pk}/calendar.ics", headers=[(b"host", b"testserver")])
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        await comm.send_input({"type": "http.request", "body": b"", "more_body": False})
+        start = await comm.receive_output(5)
+        chunks = []
+        while True:
+            message = await comm.receive_output(5)
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        await comm.wait(5)
+    assert start["status"] == 200
+    body = b"".join(chunks).decode()
+    assert body.count("BEGIN:VEVENT") == 50 and body.endswith("END:VCALENDAR\r\n")
+    # Sent line by line, not as one buffered body
+    assert len(chunks) > 50
+    assert not [w for w in caught if "StreamingHttpResponse" in str(w.message)]
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from courses.models import Course, Enrolment
+from courses.roster import roster_count
+
+
+def _setup(n_students=7):
+    t = User.objects.create_user(username="troster", password="pw")
+    t.profile.role = "teacher"; t.profile.save(update_fields=["role"])
+    c = Course.objects.create(owner=t, title="Roster", description="")
+    for i in range(n_students):
+        s = User.objects.create_user(username=f"stud{i:02d}", password="pw")
+        Enrolment.objects.create(course=c, student=s)
+    return t, c
+
+
+@pytest.mark.django_db
+def test_roster_json_pages_cover_every_student_in_order():
+    t, c = _setup(7)
+    client = Client(); assert client.login(username="troster", password="pw")
+    url = f"/courses/{c.id}/roster/?format=json&limit=3"
+    names = []
+    pages = 0
+    while url:
+        r = client.get(url)
+        assert r.status_code == 200
+        data = r.json()
+        assert data["count"] == 7
+        names += [row["username"] for row in data["results"]]
+        url = data["next"]
+        pages += 1
+    assert pages == 3
+    assert names == [f"stud{i:02d}" for i in range(7)]
+
+
+@pytest.mark.django_db
+def test_course_detail_lazy_loads_roster_and_fragment_is_owner_only():
+    t, c = _setup(3)
+    client = Client(); assert client.login(username="troster", password="pw")
+    r = client.get(f"/courses/{c.id}/")
+    assert b'data-roster-url="/courses/%d/roster/"' % c.id in r.content
+    assert b"stud00" not in r.content
+    frag = client.get(f"/courses/{c.id}/roster/")
+    assert frag.status_code == 200
+    assert b"stud00" in frag.content and b"<html" not in frag.content
+
+    stranger = Client(); assert stranger.login(username="stud00", password="pw")
+    assert stranger.get(f"/courses/{c.id}/roster/?format=json").status_code == 403
+
+
+@pytest.mark.django_db
+def test_roster_count_is_cached_and_follows_enrolment_changes(django_capture_on_commit_callbacks):
+    t, c = _setup(2)
+    assert roster_count(c.id) == 2
+    with CaptureQueriesContext(connection) as ctx:
+        assert roster_count(c.id) == 2
+    assert len(ctx.captured_queries) == 0
+    s = User.objects.create_user(username="late")
+    with django_capture_on_commit_callbacks(execute=True):
+        Enrolment.objects.create(course=c, student=s)
+        assert roster_count(c.id) == 2  # not before the commit
+    assert roster_count(c.id) == 3
+    with django_capture_on_commit_callbacks(execute=True):
+        Enrolment.objects.filter(course=c, student=s).delete()
+    assert roster_count(c.id) == 2
+
+    # A rolled-back enrolment never reaches the counter
+    with pytest.raises(RuntimeError), transaction.atomic():
+        Enrolment.objects.create(course=c, student=s)
+        raise RuntimeError
+    assert roster_count(c.id) == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_deep_roster_page_costs_the_same_as_the_first():
+    t, c = _setup(12)
+    client = Client(); assert client.login(username="troster", password="pw")
+    first = client.get(f"/courses/{c.id}/roster/?format=json&limit=2")
+    with CaptureQueriesContext(connection) as ctx_first:
+        client.get(f"/courses/{c.id}/roster/?format=json&limit=2")
+    deep_url = first.json()["next"]
+    for _ in range(3):
+        deep_url = client.get(deep_url).json()["next"]
+    with CaptureQueriesContext(connection) as ctx_deep:
+        client.get(deep_url)
+    assert len(ctx_deep.captured_queries) == len(ctx_first.captured_queries)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+
+from courses.access import visible_courses, visible_to
+from courses.models import Course, Enrolment
+from materials.models import Material
+
+
+@pytest.fixture
+def world():
+    teacher = User.objects.create_user(username="vis_t", password="pw")
+    teacher.profile.role = "teacher"; teacher.profile.save(update_fields=["role"])
+    student = User.objects.create_user(username="vis_s", password="pw")
+    others = [User.objects.create_user(username=f"vis_o{i}", password="pw") for i in range(3)]
+    own = Course.objects.create(owner=teacher, title="Own")
+    joined = Course.objects.create(owner=others[0], title="Joined")
+    hidden = Course.objects.create(owner=others[0], title="Hidden")
+    # Many enrolments on a visible course must not duplicate its materials
+    Enrolment.objects.bulk_create([Enrolment(course=joined, student=u) for u in [student, teacher, *others]])
+    for course in (own, joined, hidden):
+        Material.objects.create(course=course, uploaded_by=course.owner, title=f"M {course.title}", file="materials/x.pdf")
+    return teacher, student, own, joined, hidden
+
+
+@pytest.mark.django_db
+def test_visible_to_matches_owner_or_enrolment(world):
+    teacher, student, own, joined, hidden = world
+    assert set(visible_courses(teacher)) == {own, joined}
+    assert set(visible_courses(student)) == {joined}
+    titles = sorted(m.title for m in visible_to(Material.objects.all(), teacher))
+    assert titles == ["M Joined", "M Own"]
+
+    c = Client(); assert c.login(username="vis_t", password="pw")
+    rows = c.get("/api/v1/materials/").json()["results"]
+    assert sorted(r["title"] for r in rows) == ["M Joined", "M Own"]
+
+
+@pytest.mark.django_db
+@pytest.mark.performance
+def test_visibility_filter_uses_indexes_without_distinct(world):
+    teacher = world[0]
+    for qs in (visible_to(Material.objects.all(), teacher), visible_courses(teacher)):
+        sql = str(qs.query).upper()
+        assert "DISTINCT" not in sql and "JOIN" not in sql
+        plan = qs.explain()
+        assert "DISTINCT" not in plan.upper()
+        assert "courses_course_owner_id" in plan
+        assert "courses_enrolment_student_id" in plan
+        # No full scan of the enrolment or material tables
+        assert "SCAN courses_enrolment" not in plan and "SCAN materials_material" not in plan
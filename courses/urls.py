@@ -13,14 +13,17 @@ from .views import (
     course_feedback,
     course_remove_student,
     course_add_student,
+    course_import_students,
+    course_roster,
 )
-from .views_ics import course_calendar
+from .views_ics import course_calendar, my_calendar
 
 app_name = "courses"
 
 urlpatterns = [
     path("", course_list, name="list"),
     path("create/", course_create, name="create"),
+    path("calendar.ics", my_calendar, name="my-calendar"),
     path("<int:pk>/", course_detail, name="detail"),
     path("<int:pk>/edit/", course_edit, name="edit"),
     path("<int:pk>/syllabus/edit/", course_syllabus_edit, name="syllabus-edit"),
@@ -29,7 +32,9 @@ urlpatterns = [
     path("<int:pk>/feedback/", course_feedback, name="feedback"),
     path("<int:pk>/calendar.ics", course_calendar, name="calendar"),
     path("<int:pk>/remove/<int:user_id>/", course_remove_student, name="remove"),
+    path("<int:pk>/roster/", course_roster, name="roster"),
     path("<int:pk>/add-student/", course_add_student, name="add-student"),
+    path("<int:pk>/import-students/", course_import_students, name="import-students"),
     path("<int:pk>/gradebook/", course_gradebook, name="gradebook"),
     path("<int:pk>/gradebook.csv", course_gradebook_csv, name="gradebook-csv"),
 ]
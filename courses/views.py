@@ -4,40 +4,40 @@ from __future__ import annotations
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
-from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from config.routers import read_replica
 from accounts.decorators import role_required
 from accounts.models import Role
 from django.contrib.auth.models import User
 from django.db.models import Q, CharField, F, Value
 from django.db.models.functions import Cast, Concat, Length, Substr
 import re
-from .forms import CourseForm, AddStudentForm, SyllabusForm
+from .forms import CourseForm, AddStudentForm, SyllabusForm, BulkEnrolForm
+from .access import access_for
 from .models import Course, Enrolment
+from .enrolment import bulk_enrol, parse_identifiers_csv, resolve_identifiers, size_error
+from .roster import roster_count, roster_page
+from .views_ics import feed_token
 from .models_feedback import Feedback
 from .forms_feedback import FeedbackForm
 from assignments.models import Assignment, Attempt, Grade
-from assignments.utils import compute_course_percentage
+from assignments.utils import compute_course_percentage, compute_course_percentages
 import csv
 
 
-def _is_enrolled(user, course: Course) -> bool:
-    if not getattr(user, "is_authenticated", False):
-        return False
-    return Enrolment.objects.filter(course=course, student=user).exists()
-
-
+@read_replica
 def course_list(request: HttpRequest) -> HttpResponse:
     """Public course catalogue; actions vary by role."""
     q = (request.GET.get("q") or "").strip()
     courses = Course.objects.select_related("owner").all()
     if q:
         courses = courses.filter(Q(title__icontains=q) | Q(owner__username__icontains=q))
-    enrolments = set()
-    if request.user.is_authenticated:
-        enrolments = set(Enrolment.objects.filter(student=request.user).values_list("course_id", flat=True))
+    enrolments = access_for(request).enrolled_ids
     ctx = {"courses": courses, "enrolled_ids": enrolments, "role": getattr(getattr(request.user, "profile", None), "role", None), "q": q}
+    if request.user.is_authenticated:
+        ctx["calendar_token"] = feed_token(request.user)
     return render(request, "courses/list.html", ctx)
 
 
@@ -77,20 +77,21 @@ def course_edit(request: HttpRequest, pk: int) -> HttpResponse:
 
 
 @login_required
+@read_replica
 def course_detail(request: HttpRequest, pk: int) -> HttpResponse:
     """Course detail restricted to owner or enrolled students."""
     course = get_object_or_404(Course.objects.select_related("owner"), pk=pk)
     owner_view = course.is_owner(request.user)
-    is_enrolled = _is_enrolled(request.user, course)
+    is_enrolled = access_for(request).is_enrolled(course)
     # Allow non-enrolled students to see a limited view (title, teacher, feedback list).
     limited_view = not (owner_view or is_enrolled)
 
-    # For teachers, show roster; for students, show a concise message.
-    roster = None
+    # For teachers, show the roster size; rows are loaded lazily in pages.
+    enrolled_count = None
     add_form = None
     feedback_form = None
     if owner_view:
-        roster = Enrolment.objects.filter(course=course).select_related("student").order_by("student__username")
+        enrolled_count = roster_count(course.id)
         add_form = AddStudentForm()
     if is_enrolled:
         # Initialise form with existing feedback if present
@@ -101,7 +102,11 @@ def course_detail(request: HttpRequest, pk: int) -> HttpResponse:
         return [line.strip() for line in (s or "").splitlines() if line.strip()]
 
     # Compute assignment availability and readiness for display
-    assignments = Assignment.objects.filter(course=course, is_published=True).order_by("title")
+    assignments = (
+        Assignment.objects.filter(course=course, is_published=True)
+        .prefetch_related("questions__choices")
+        .order_by("title")
+    )
     now = __import__("datetime").datetime.now(tz=None)
     # Use Django timezone to avoid naive
     from django.utils import timezone as _tz
@@ -148,7 +153,7 @@ def course_detail(request: HttpRequest, pk: int) -> HttpResponse:
         "owner_view": owner_view,
         "is_enrolled": is_enrolled,
         "limited_view": limited_view,
-        "roster": roster,
+        "enrolled_count": enrolled_count,
         "add_form": add_form,
         "feedback_form": feedback_form,
         "feedback_list": Feedback.objects.filter(course=course).select_related("student"),
@@ -166,6 +171,41 @@ def course_detail(request: HttpRequest, pk: int) -> HttpResponse:
     return render(request, "courses/detail.html", ctx)
 
 
+@login_required
+@role_required(Role.TEACHER)
+def course_roster(request: HttpRequest, pk: int) -> HttpResponse:
+    """One keyset page of the course roster (owner only).
+
+    Returns an HTML fragment for the course page by default, or JSON when
+    `?format=json` is given or the client accepts `application/json`.
+    Pages are addressed by the opaque `after` cursor from the previous page.
+    """
+    course = get_object_or_404(Course, pk=pk)
+    if not course.is_owner(request.user):
+        raise PermissionDenied
+    try:
+        limit = int(request.GET.get("limit", 0)) or None
+    except ValueError:
+        limit = None
+    page = roster_page(course.id, after=request.GET.get("after") or None, limit=limit or 50)
+    next_url = None
+    if page["next"]:
+        next_url = f"{request.path}?after={page['next']}" + (f"&limit={limit}" if limit else "")
+    wants_json = request.GET.get("format") == "json" or "application/json" in request.headers.get("Accept", "")
+    if wants_json:
+        results = [
+            {
+                "user_id": e.student_id,
+                "username": e.student.username,
+                "student_number": getattr(getattr(e.student, "profile", None), "student_number", "") or f"S{e.student_id:07d}",
+                "enrolled_at": e.created_at.isoformat(),
+            }
+            for e in page["enrolments"]
+        ]
+        return JsonResponse({"count": roster_count(course.id), "results": results, "next": next_url and f"{next_url}&format=json"})
+    return render(request, "courses/_roster_rows.html", {"course": course, "enrolments": page["enrolments"], "next_url": next_url})
+
+
 @login_required
 @role_required(Role.TEACHER)
 def course_syllabus_edit(request: HttpRequest, pk: int) -> HttpResponse:
@@ -255,44 +295,67 @@ def course_add_student(request: HttpRequest, pk: int) -> HttpResponse:
                     .filter(profile__role=Role.STUDENT)
                     .order_by("username")[:50]
                 )
-                roster = (
-                    Enrolment.objects.filter(course=course)
-                    .select_related("student")
-                    .order_by("student__username")
-                )
                 ctx = {
                     "course": course,
                     "owner_view": True,
                     "is_enrolled": False,
-                    "roster": roster,
+                    "enrolled_count": roster_count(course.id),
                     "add_form": form,
                     "search_results": results,
                     "searched": True,
                 }
                 return render(request, "courses/detail.html", ctx)
-            # Enrol flow: exact match on username or e-mail
-            target = (
-                User.objects.select_related("profile").filter(username__iexact=q).first()
-                or User.objects.select_related("profile").filter(email__iexact=q).first()
-                or User.objects.select_related("profile").filter(profile__student_number__iexact=q).first()
-            )
+            # Enrol flow: exact match on username, e-mail or Student ID (one query)
+            target = resolve_identifiers([q]).get(q.lower())
             if not target:
                 messages.error(request, "No user found for that username or e‑mail.")
                 return redirect("courses:detail", pk=course.pk)
-            profile = getattr(target, "profile", None)
-            if not profile or profile.role != Role.STUDENT:
+            if target["role"] != Role.STUDENT:
                 messages.error(request, "User is not a student.")
                 return redirect("courses:detail", pk=course.pk)
-            obj, created = Enrolment.objects.get_or_create(course=course, student=target)
+            obj, created = Enrolment.objects.get_or_create(course=course, student_id=target["id"])
             if created:
-                messages.success(request, f"Enrolled {target.username}.")
+                messages.success(request, f"Enrolled {target['username']}.")
             else:
-                messages.error(request, f"{target.username} is already enrolled.")
+                messages.error(request, f"{target['username']} is already enrolled.")
     return redirect("courses:detail", pk=course.pk)
 
 
 @login_required
 @role_required(Role.TEACHER)
+def course_import_students(request: HttpRequest, pk: int) -> HttpResponse:
+    """Teacher enrols a cohort from a CSV upload or pasted list (owner only).
+
+    Identifiers are resolved in bulk and enrolments inserted in batches;
+    the page lists the outcome for every submitted row.
+    """
+    course = get_object_or_404(Course, pk=pk)
+    if not course.is_owner(request.user):
+        raise PermissionDenied
+    if request.method != "POST":
+        return redirect("courses:detail", pk=course.pk)
+    form = BulkEnrolForm(request.POST, request.FILES)
+    if not form.is_valid():
+        messages.error(request, "; ".join(form.non_field_errors()) or "Invalid import.")
+        return redirect("courses:detail", pk=course.pk)
+    identifiers: list[str] = []
+    f = form.cleaned_data.get("csv_file")
+    if f:
+        identifiers += parse_identifiers_csv(f.read())
+    identifiers += [line.strip() for line in (form.cleaned_data.get("identifiers") or "").splitlines() if line.strip()]
+    error = size_error(identifiers)
+    if error:
+        messages.error(request, error)
+        return redirect("courses:detail", pk=course.pk)
+    outcome = bulk_enrol(course, identifiers, actor=request.user)
+    enrolled = outcome["summary"].get("enrolled", 0)
+    messages.success(request, f"Import finished: {enrolled} enrolled.")
+    return render(request, "courses/import_results.html", {"course": course, **outcome})
+
+
+@login_required
+@role_required(Role.TEACHER)
+@read_replica
 def course_gradebook(request: HttpRequest, pk: int) -> HttpResponse:
     """Teacher gradebook view: students x assignments matrix with course %.
 
@@ -315,10 +378,9 @@ def course_gradebook(request: HttpRequest, pk: int) -> HttpResponse:
     for g in grades:
         row = grade_rows.setdefault(g.student_id, {})
         row[g.assignment_id] = g
-    # Compute course percent per student using Grades
-    per_student_pct: dict[int, float] = {}
-    for e in enrolments:
-        per_student_pct[e.student_id] = compute_course_percentage(course, e.student)
+    # Compute course percent per student using Grades (one grouped query)
+    pcts = compute_course_percentages(course)
+    per_student_pct: dict[int, float] = {e.student_id: pcts.get(e.student_id, 0.0) for e in enrolments}
     return render(
         request,
         "courses/gradebook.html",
@@ -334,6 +396,7 @@ def course_gradebook(request: HttpRequest, pk: int) -> HttpResponse:
 
 @login_required
 @role_required(Role.TEACHER)
+@read_replica
 def course_gradebook_csv(request: HttpRequest, pk: int) -> HttpResponse:
     """CSV export for gradebook: username, S-ID, each assignment X/Y, course %.
     """
@@ -351,6 +414,7 @@ def course_gradebook_csv(request: HttpRequest, pk: int) -> HttpResponse:
         .select_related("student", "assignment")
     )
     grade_map: dict[tuple[int, int], Grade] = {(g.student_id, g.assignment_id): g for g in grades}
+    pcts = compute_course_percentages(course)
 
     resp = HttpResponse(content_type="text/csv; charset=utf-8")
     resp["Content-Disposition"] = f"attachment; filename=gradebook_course_{course.id}.csv"
@@ -369,7 +433,7 @@ def course_gradebook_csv(request: HttpRequest, pk: int) -> HttpResponse:
                 row.append(f"{ach}/{mx}")
             else:
                 row.append("")
-        pct = compute_course_percentage(course, e.student)
+        pct = pcts.get(e.student_id, 0.0)
         row.append(f"{pct:.2f}")
         writer.writerow(row)
     return resp
@@ -391,7 +455,7 @@ def course_unenrol(request: HttpRequest, pk: int) -> HttpResponse:
 def course_feedback(request: HttpRequest, pk: int) -> HttpResponse:
     """Create or update feedback for a course (student-only, enrolled)."""
     course = get_object_or_404(Course, pk=pk)
-    if not Enrolment.objects.filter(course=course, student=request.user).exists():
+    if not access_for(request).is_enrolled(course):
         messages.error(request, "Please enrol before leaving feedback.")
         return redirect("courses:detail", pk=course.pk)
     if request.method == "POST":
@@ -1,48 +1,248 @@
-"""ICS export for courses (Stage 7).
+"""ICS export for courses (Stage 7, extended in Stage 17).
 
-Generates a basic iCalendar file with one event per material upload.
-This avoids adding a dedicated events model while still demonstrating
-ICS generation and consumption.
+Generates iCalendar feeds with one event per material upload plus the
+opening time and deadline of each published assignment. Feeds carry a
+strong ETag derived from the course content version, so polling
+calendar clients receive 304 Not Modified until something changes.
+There is no Last-Modified: deleting a material or unpublishing an
+assignment does not advance any timestamp, so If-Modified-Since would
+answer 304 for a changed feed. The ETag counts rows and sees both. A per-user feed aggregates every course the user owns or is
+enrolled in, using a fixed number of queries regardless of course count.
+
+Feeds are streamed: events are read with `.iterator()` and written one
+folded, escaped line at a time, so memory does not grow with the number
+of events. Under ASGI the same lines come from an async generator over
+`.aiterator()`; given a sync iterator, Django's ASGI handler would
+collect the whole feed in memory before sending it.
 """
 from __future__ import annotations
 
+import hashlib
 from datetime import datetime, timezone
-from django.http import HttpRequest, HttpResponse
+from typing import AsyncIterator, Iterable, Iterator
+
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Count, Max, QuerySet
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.crypto import constant_time_compare, salted_hmac
 
+from assignments.models import Assignment
+from materials.models import Material
+from .access import visible_courses
 from .models import Course
 
+FEED_TOKEN_SALT = "courpera.calendar-feed"
+ICAL_LINE_OCTETS = 75
+ITERATOR_CHUNK = 500
+
+# RFC 5545 TEXT escaping applied in a single pass
+_ICAL_ESCAPES = str.maketrans({"\\": "\\\\", ";": "\\;", ",": "\\,", "\n": "\\n", "\r": ""})
+
 
 def _ical_escape(s: str) -> str:
-    return s.replace(",", "\, ").replace(";", "\; ").replace("\n", "\\n")
+    return s.translate(_ICAL_ESCAPES)
 
 
-def course_calendar(request: HttpRequest, pk: int) -> HttpResponse:
-    course = get_object_or_404(Course, pk=pk)
-    now = datetime.now(timezone.utc)
-    lines = [
-        "BEGIN:VCALENDAR",
-        "VERSION:2.0",
-        "PRODID:-//Courpera//Course Calendar//EN",
-        f"X-WR-CALNAME:{_ical_escape(course.title)}",
-    ]
+def _ical_fold(line: str) -> str:
+    """Fold a content line at 75 octets (RFC 5545 section 3.1).
+
+    Continuation lines start with a single space; multi-byte UTF-8
+    characters are never split across lines.
+    """
+    if len(line.encode("utf-8")) <= ICAL_LINE_OCTETS:
+        return line
+    parts: list[str] = []
+    start = 0
+    used = 0
+    limit = ICAL_LINE_OCTETS
+    for i, ch in enumerate(line):
+        size = len(ch.encode("utf-8"))
+        if used + size > limit:
+            parts.append(line[start:i])
+            start, used = i, 0
+            limit = ICAL_LINE_OCTETS - 1  # leading space counts towards the limit
+        used += size
+    parts.append(line[start:])
+    return "\r\n ".join(parts)
+
+
+def _ical_dt(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _feed_secret(user) -> str:
+    # Derived from the password hash: changing the password revokes old feed URLs
+    return salted_hmac(FEED_TOKEN_SALT, user.get_session_auth_hash()).hexdigest()[:20]
+
+
+def feed_token(user) -> str:
+    """Signed token that lets calendar clients fetch a user's feed without a session.
+
+    It carries a per-user secret, so a leaked feed URL stops working once
+    its owner changes their password.
+    """
+    return signing.dumps([user.pk, _feed_secret(user)], salt=FEED_TOKEN_SALT)
+
+
+def _token_user(token: str):
+    """The user a feed token belongs to, or None if it is invalid or revoked."""
+    try:
+        pk, secret = signing.loads(token, salt=FEED_TOKEN_SALT)
+        user = get_user_model().objects.get(pk=pk, is_active=True)
+    except (signing.BadSignature, TypeError, ValueError, get_user_model().DoesNotExist):
+        return None
+    return user if constant_time_compare(secret, _feed_secret(user)) else None
+
+
+def _content_version(course_ids: list[int]) -> str:
+    """Return the strong ETag for the feed of `course_ids`.
+
+    Built from three aggregate queries (courses, materials, published
+    assignments). Counts are included so deletions change the ETag even
+    when the newest timestamp does not move.
+    """
+    courses = Course.objects.filter(id__in=course_ids).aggregate(n=Count("id"), ts=Max("updated_at"))
+    materials = Material.objects.filter(course_id__in=course_ids).aggregate(n=Count("id"), ts=Max("created_at"))
+    assignments = Assignment.objects.filter(course_id__in=course_ids, is_published=True).aggregate(
+        n=Count("id"), ts=Max("updated_at")
+    )
+    raw = "|".join(
+        [",".join(str(i) for i in sorted(course_ids))]
+        + [f"{agg['n']}:{agg['ts'].isoformat() if agg['ts'] else ''}" for agg in (courses, materials, assignments)]
+    )
+    return '"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def _event_lines(uid: str, stamp: datetime, start: datetime, summary: str) -> Iterator[str]:
+    yield "BEGIN:VEVENT"
+    yield f"UID:{uid}"
+    # DTSTAMP follows the item's own timestamp so identical content
+    # produces identical bytes (required for a strong ETag).
+    yield f"DTSTAMP:{_ical_dt(stamp)}"
+    yield f"DTSTART:{_ical_dt(start)}"
+    yield f"SUMMARY:{_ical_escape(summary)}"
+    yield "END:VEVENT"
+
+
+def _feed_header(calname: str) -> Iterator[str]:
+    yield "BEGIN:VCALENDAR"
+    yield "VERSION:2.0"
+    yield "PRODID:-//Courpera//Course Calendar//EN"
+    yield f"X-WR-CALNAME:{_ical_escape(calname)}"
+
+
+def _feed_querysets(ids: list[int]) -> tuple[QuerySet, QuerySet]:
     # Use materials as dated items; keep minimal fields for compatibility
-    for m in course.materials.all():
-        uid = f"material-{m.pk}@courpera"
-        dtstamp = now.strftime("%Y%m%dT%H%M%SZ")
-        dtstart = m.created_at.strftime("%Y%m%dT%H%M%SZ")
-        summary = _ical_escape(f"{course.title}: {m.title}")
-        lines += [
-            "BEGIN:VEVENT",
-            f"UID:{uid}",
-            f"DTSTAMP:{dtstamp}",
-            f"DTSTART:{dtstart}",
-            f"SUMMARY:{summary}",
-            "END:VEVENT",
-        ]
-    lines.append("END:VCALENDAR")
-    body = "\r\n".join(lines) + "\r\n"
-    resp = HttpResponse(body, content_type="text/calendar")
-    resp["Content-Disposition"] = f"attachment; filename=course-{course.pk}.ics"
+    materials = (
+        Material.objects.filter(course_id__in=ids)
+        .only("id", "course_id", "title", "created_at")
+        .order_by("created_at", "id")
+    )
+    assignments = (
+        Assignment.objects.filter(course_id__in=ids, is_published=True)
+        .only("id", "course_id", "title", "available_from", "deadline", "updated_at")
+        .order_by("id")
+    )
+    return materials, assignments
+
+
+def _material_lines(m: Material, titles: dict[int, str]) -> Iterator[str]:
+    return _event_lines(f"material-{m.pk}@courpera", m.created_at, m.created_at, f"{titles[m.course_id]}: {m.title}")
+
+
+def _assignment_lines(a: Assignment, titles: dict[int, str]) -> Iterator[str]:
+    course_title = titles[a.course_id]
+    if a.available_from:
+        yield from _event_lines(f"assignment-{a.pk}-open@courpera", a.updated_at, a.available_from, f"{course_title}: {a.title} opens")
+    if a.deadline:
+        yield from _event_lines(f"assignment-{a.pk}-due@courpera", a.updated_at, a.deadline, f"{course_title}: {a.title} due")
+
+
+def _feed_lines(calname: str, titles: dict[int, str]) -> Iterator[str]:
+    """Yield the unfolded lines of a VCALENDAR for {course_id: title} (two queries)."""
+    yield from _feed_header(calname)
+    materials, assignments = _feed_querysets(list(titles))
+    for m in materials.iterator(chunk_size=ITERATOR_CHUNK):
+        yield from _material_lines(m, titles)
+    for a in assignments.iterator(chunk_size=ITERATOR_CHUNK):
+        yield from _assignment_lines(a, titles)
+    yield "END:VCALENDAR"
+
+
+async def _afeed_lines(calname: str, titles: dict[int, str]) -> AsyncIterator[str]:
+    """`_feed_lines` for ASGI, reading rows with `aiterator()`."""
+    for line in _feed_header(calname):
+        yield line
+    materials, assignments = _feed_querysets(list(titles))
+    async for m in materials.aiterator(chunk_size=ITERATOR_CHUNK):
+        for line in _material_lines(m, titles):
+            yield line
+    async for a in assignments.aiterator(chunk_size=ITERATOR_CHUNK):
+        for line in _assignment_lines(a, titles):
+            yield line
+    yield "END:VCALENDAR"
+
+
+def _encode(line: str) -> bytes:
+    return (_ical_fold(line) + "\r\n").encode("utf-8")
+
+
+def _stream(lines: Iterable[str]) -> Iterator[bytes]:
+    for line in lines:
+        yield _encode(line)
+
+
+async def _astream(lines: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    async for line in lines:
+        yield _encode(line)
+
+
+def _feed_response(request: HttpRequest, calname: str, titles: dict[int, str], filename: str, private: bool) -> HttpResponse:
+    """Answer conditional requests with 304, otherwise stream the feed."""
+    etag = _content_version(list(titles))
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        resp = not_modified
+    else:
+        # ASGI serves only async iterators without buffering them first
+        if isinstance(request, ASGIRequest):
+            content = _astream(_afeed_lines(calname, titles))
+        else:
+            content = _stream(_feed_lines(calname, titles))
+        resp = StreamingHttpResponse(content, content_type="text/calendar")
+        resp["Content-Disposition"] = f"attachment; filename={filename}"
+    resp["ETag"] = etag
+    # Clients must revalidate, which is cheap thanks to the ETag above
+    patch_cache_control(resp, no_cache=True, **({"private": True} if private else {"public": True}))
     return resp
 
+
+def course_calendar(request: HttpRequest, pk: int) -> HttpResponse:
+    course = get_object_or_404(Course.objects.only("id", "title"), pk=pk)
+    return _feed_response(request, course.title, {course.pk: course.title}, f"course-{course.pk}.ics", private=False)
+
+
+def my_calendar(request: HttpRequest) -> HttpResponse:
+    """Aggregated feed across the user's owned and enrolled courses.
+
+    Authenticates with the session or a signed `?token=` (for calendar
+    clients that cannot log in; see `feed_token`).
+    """
+    user = request.user if request.user.is_authenticated else None
+    token = request.GET.get("token")
+    if token:
+        user = _token_user(token)
+        if user is None:
+            return HttpResponseForbidden("Invalid calendar token")
+    if user is None:
+        return HttpResponseForbidden("Authentication required")
+    titles = dict(
+        visible_courses(user)
+        .order_by("id")
+        .values_list("id", "title")
+    )
+    return _feed_response(request, f"Courpera — {user.get_username()}", titles, "courpera.ics", private=True)
@@ -0,0 +1,25 @@
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill(apps, schema_editor):
+    # Existing rows have not changed since they were uploaded
+    apps.get_model("materials", "Material").objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("materials", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="material",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, db_index=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
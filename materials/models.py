@@ -56,6 +56,7 @@ class Material(models.Model):
     size_bytes = models.PositiveIntegerField(default=0)
     mime = models.CharField(max_length=100, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ["-created_at"]
@@ -9,10 +9,14 @@ from django.shortcuts import get_object_or_404, redirect
 
 from accounts.decorators import role_required
 from accounts.models import Role
+from config.metrics import UPLOAD_BYTES
+from config.ratelimit import Rate, hit
 from courses.models import Course
 from .forms import MaterialUploadForm
 from .models import Material
 
+UPLOAD_RATE = Rate(5, 60)
+
 
 @login_required
 @role_required(Role.TEACHER)
@@ -21,29 +25,18 @@ def upload_for_course(request: HttpRequest, course_id: int) -> HttpResponse:
     if not course.is_owner(request.user):
         raise PermissionDenied
     if request.method == "POST":
-        # Naive per-session upload throttle: max 5 uploads per minute
-        try:
-            ts = request.session.get("upload_ts", [])
-            now = __import__("time").time()
-            ts = [t for t in ts if now - t < 60]
-            if len(ts) >= 5:
-                messages.error(request, "Too many uploads, please wait a minute and try again.")
-                return redirect("courses:detail", pk=course.pk)
-        except Exception:
-            ts = []
         form = MaterialUploadForm(request.POST, request.FILES)
         if form.is_valid():
+            # Max 5 uploads per minute per teacher; only accepted uploads count
+            if not hit("upload", str(request.user.pk), UPLOAD_RATE).allowed:
+                messages.error(request, "Too many uploads, please wait a minute and try again.")
+                return redirect("courses:detail", pk=course.pk)
             m = form.save(commit=False)
             m.course = course
             m.uploaded_by = request.user
             m.save()
+            UPLOAD_BYTES.labels("material").observe(m.size_bytes)
             messages.success(request, "Material uploaded.")
-            # record timestamp
-            try:
-                ts.append(now)
-                request.session["upload_ts"] = ts
-            except Exception:
-                pass
         else:
             messages.error(request, "; ".join([str(e) for e in form.errors.get("file", [])]) or "Upload failed.")
     return redirect("courses:detail", pk=course.pk)
@@ -5,7 +5,9 @@ from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 
-from courses.models import Course, Enrolment
+from config.metrics import WS_CONNECTIONS, WS_DROPPED, WS_MESSAGES
+from courses.access import CourseAccess
+from courses.models import Course
 from .models import ChatMessage
 
 
@@ -17,9 +19,7 @@ def _course_auth(user, course_id: int) -> tuple[bool, str, Course | None]:
         return False, "Course not found", None
     if not user or isinstance(user, AnonymousUser):
         return False, "Authentication required", None
-    if course.owner_id == user.id:
-        return True, "", course
-    ok = Enrolment.objects.filter(course=course, student=user).exists()
+    ok = CourseAccess(user).can_view(course)
     return (ok, "Enrol to join this room" if not ok else "", course)
 
 
@@ -43,6 +43,7 @@ class CourseChatConsumer(AsyncJsonWebsocketConsumer):
         self._rate_ts = []
         await self.channel_layer.group_add(self.room_name, self.channel_name)
         await self.accept()
+        WS_CONNECTIONS.labels(self.room_name).inc()
 
     async def receive_json(self, content, **kwargs):
         msg = (content or {}).get("message", "").strip()
@@ -55,11 +56,13 @@ class CourseChatConsumer(AsyncJsonWebsocketConsumer):
             self._rate_ts = [t for t in self._rate_ts if now - t < 5.0]
             if len(self._rate_ts) >= 5:
                 # Drop message silently to avoid feedback loops
+                WS_DROPPED.labels(self.room_name).inc()
                 return
             self._rate_ts.append(now)
         except Exception:
             pass
         await _persist_message(self.room_name, self.course, self.scope.get("user"), msg)
+        WS_MESSAGES.labels(self.room_name).inc()
         payload = {
             "type": "chat.message",
             "sender": getattr(self.scope.get("user"), "username", ""),
@@ -71,6 +74,9 @@ class CourseChatConsumer(AsyncJsonWebsocketConsumer):
         await self.send_json(event["payload"]) 
 
     async def disconnect(self, code):
+        if getattr(self, "room_name", None) is None:
+            return  # rejected before joining a room
+        WS_CONNECTIONS.labels(self.room_name).dec()
         try:
             await self.channel_layer.group_discard(self.room_name, self.channel_name)
         except Exception:
@@ -4,25 +4,18 @@ from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse, HttpRequest
 from django.shortcuts import get_object_or_404
 
-from courses.models import Course, Enrolment
+from config.routers import read_replica
+from courses.access import access_for
+from courses.models import Course
 from .models import ChatMessage
 
 
-def _is_owner(user, course: Course) -> bool:
-    return bool(user and user.is_authenticated and course.owner_id == user.id)
-
-
-def _is_enrolled(user, course: Course) -> bool:
-    if not getattr(user, "is_authenticated", False):
-        return False
-    return Enrolment.objects.filter(course=course, student=user).exists()
-
-
 @login_required
+@read_replica
 def course_history(request: HttpRequest, course_id: int) -> JsonResponse:
     """Return recent chat messages for a course (owner or enrolled only)."""
     course = get_object_or_404(Course, pk=course_id)
-    if not (_is_owner(request.user, course) or _is_enrolled(request.user, course)):
+    if not access_for(request).can_view(course):
         return JsonResponse({"detail": "Not permitted"}, status=403)
     room = f"course_{course_id}"
     items = (
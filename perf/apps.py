@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class PerfConfig(AppConfig):
+    """App configuration for load-testing tools (dataset generator, benchmarks)."""
+
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "perf"
@@ -0,0 +1,273 @@
+"""Latency benchmark runner (Stage 18).
+
+Requests a set of views repeatedly and reports p50/p95/p99 latency and
+the number of SQL queries per request. Two drivers are available:
+
+- "client": the Django test client (WSGI-style request handling);
+- "asgi": the project ASGI application (`config.asgi.application`),
+  driven in-process with hand-built HTTP scopes. Views then run on the
+  calling thread, so queries are counted the same way in both modes.
+
+Targets default to a representative set discovered from the database
+(the largest course, its owner and one enrolled student). API lists are
+also measured as revalidations: the ETag of a first response is sent
+back in `If-None-Match`, so those rows show the cost of a 304. DRF throttling
+is switched off for the run so repeated requests measure view cost
+rather than 429 responses.
+"""
+from __future__ import annotations
+
+import asyncio
+import math
+import statistics
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.views import APIView
+
+from assignments.models import Assignment, AssignmentType, Attempt
+from courses.models import Course, Enrolment
+
+MODES = ("client", "asgi")
+
+
+@dataclass
+class Target:
+    name: str
+    path: str
+    user: Any = None  # None requests anonymously
+    revalidate: bool = False  # send the ETag of a first response back
+
+    @property
+    def label(self) -> str:
+        who = getattr(self.user, "username", None) or "anon"
+        return f"{self.name}[{who}]" + (" If-None-Match" if self.revalidate else "")
+
+
+@dataclass
+class Result:
+    target: Target
+    mode: str
+    status: int = 0
+    samples: list[float] = field(default_factory=list)  # milliseconds
+    queries: int = 0
+
+    @property
+    def p50(self) -> float:
+        return percentile(self.samples, 50)
+
+    @property
+    def p95(self) -> float:
+        return percentile(self.samples, 95)
+
+    @property
+    def p99(self) -> float:
+        return percentile(self.samples, 99)
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "view": self.target.label,
+            "path": self.target.path,
+            "mode": self.mode,
+            "status": self.status,
+            "n": len(self.samples),
+            "mean_ms": round(statistics.fmean(self.samples), 3) if self.samples else 0.0,
+            "p50_ms": round(self.p50, 3),
+            "p95_ms": round(self.p95, 3),
+            "p99_ms": round(self.p99, 3),
+            "queries": self.queries,
+        }
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Nearest-rank percentile; 0.0 for an empty sample."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def default_targets() -> list[Target]:
+    """Representative views resolved against the largest course in the database."""
+    targets = [Target("index", reverse("index"))]
+    course = Course.objects.annotate(n=Count("enrolments")).order_by("-n", "id").select_related("owner").first()
+    if course is None:
+        return targets
+    teacher = course.owner
+    enrolment = Enrolment.objects.filter(course=course).select_related("student").order_by("id").first()
+    student = enrolment.student if enrolment else None
+    targets += [
+        Target("courses:detail", reverse("courses:detail", args=[course.pk]), teacher),
+        Target("courses:roster", reverse("courses:roster", args=[course.pk]), teacher),
+        Target("courses:gradebook", reverse("courses:gradebook", args=[course.pk]), teacher),
+        Target("assignments:course", reverse("assignments:course", args=[course.pk]), teacher),
+        Target("courses-list", reverse("courses-list"), teacher),
+        Target("courses-list", reverse("courses-list"), teacher, revalidate=True),
+    ]
+    if student is None:
+        return targets
+    targets += [
+        Target("courses:list", reverse("courses:list"), student),
+        Target("courses:detail", reverse("courses:detail", args=[course.pk]), student),
+        Target("activity:notifications-page", reverse("activity:notifications-page"), student),
+        Target("messaging:course-history", reverse("messaging:course-history", args=[course.pk]), student),
+        Target("enrolments-list", reverse("enrolments-list"), student),
+        Target("enrolments-list", reverse("enrolments-list"), student, revalidate=True),
+        Target("materials-list", reverse("materials-list"), student),
+        Target("materials-list", reverse("materials-list"), student, revalidate=True),
+    ]
+    quiz = Assignment.objects.filter(course=course, type=AssignmentType.QUIZ, is_published=True).order_by("id").first()
+    if quiz is not None:
+        targets.append(Target("assignments:take", reverse("assignments:take", args=[quiz.pk]), student))
+    attempt = Attempt.objects.filter(student=student, assignment__course=course).order_by("id").first()
+    if attempt is not None:
+        targets.append(Target("assignments:feedback", reverse("assignments:feedback", args=[attempt.pk]), student))
+    return targets
+
+
+@contextmanager
+def throttling_disabled() -> Iterator[None]:
+    original = APIView.get_throttles
+    APIView.get_throttles = lambda self: []
+    try:
+        yield
+    finally:
+        APIView.get_throttles = original
+
+
+class _Sessions:
+    """One logged-in test client per user, shared by both drivers."""
+
+    def __init__(self, host: str):
+        self.host = host
+        self._clients: dict[Any, Client] = {}
+
+    def client(self, user) -> Client:
+        key = getattr(user, "pk", None)
+        if key not in self._clients:
+            c = Client(HTTP_HOST=self.host)
+            if user is not None:
+                c.force_login(user)
+            self._clients[key] = c
+        return self._clients[key]
+
+    def cookie_header(self, user) -> bytes:
+        jar = self.client(user).cookies
+        return "; ".join(f"{k}={m.value}" for k, m in jar.items()).encode()
+
+
+def _timed(fn) -> tuple[float, int, int]:
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        status = fn()
+        elapsed = (time.perf_counter() - start) * 1000.0
+    return elapsed, status, len(ctx.captured_queries)
+
+
+def _client_get(client: Client, path: str, etag: str | None = None) -> int:
+    resp = client.get(path, HTTP_IF_NONE_MATCH=etag) if etag else client.get(path)
+    if resp.streaming:
+        b"".join(resp.streaming_content)
+    return resp.status_code
+
+
+async def _asgi_get(app, path: str, host: str, cookie: bytes, etag: str | None = None) -> int:
+    raw_path, _, query = path.partition("?")
+    headers = [(b"host", host.encode()), (b"cookie", cookie)]
+    if etag:
+        headers.append((b"if-none-match", etag.encode()))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": raw_path,
+        "raw_path": raw_path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": headers,
+        "client": ("127.0.0.1", 50000),
+        "server": (host, 80),
+    }
+    state = {"status": 0, "requested": False}
+    done = asyncio.Event()
+
+    async def receive():
+        if not state["requested"]:
+            state["requested"] = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Django listens for a disconnect while the view runs; only
+        # disconnect once the response has been sent in full.
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            state["status"] = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    await app(scope, receive, send)
+    return state["status"]
+
+
+def run(
+    targets: list[Target],
+    *,
+    modes: tuple[str, ...] = MODES,
+    iterations: int = 50,
+    warmup: int = 5,
+    host: str = "localhost",
+) -> list[Result]:
+    """Benchmark every target in every mode and return one Result each."""
+    sessions = _Sessions(host)
+    results: list[Result] = []
+    app = None
+    if "asgi" in modes:
+        from config.asgi import application as app
+    with throttling_disabled():
+        for target in targets:
+            etag = sessions.client(target.user).get(target.path).get("ETag") if target.revalidate else None
+            for mode in modes:
+                if mode == "client":
+                    client = sessions.client(target.user)
+                    call = lambda: _client_get(client, target.path, etag)  # noqa: E731
+                else:
+                    cookie = sessions.cookie_header(target.user)
+                    call = lambda: async_to_sync(_asgi_get)(app, target.path, host, cookie, etag)  # noqa: E731
+                result = Result(target, mode)
+                for _ in range(warmup):
+                    call()
+                for _ in range(max(1, iterations)):
+                    elapsed, result.status, result.queries = _timed(call)
+                    result.samples.append(elapsed)
+                results.append(result)
+    return results
+
+
+def format_table(results: list[Result]) -> str:
+    rows = [r.as_dict() for r in results]
+    width = max([len(r["view"]) for r in rows] + [4])
+    lines = [f"{'view':<{width}}  {'mode':<6}  status  {'p50 ms':>8}  {'p95 ms':>8}  {'p99 ms':>8}  queries"]
+    for r in rows:
+        lines.append(
+            f"{r['view']:<{width}}  {r['mode']:<6}  {r['status']:>6}  {r['p50_ms']:>8.2f}  {r['p95_ms']:>8.2f}  {r['p99_ms']:>8.2f}  {r['queries']:>7}"
+        )
+    return "\n".join(lines)
+
+
+def debug_warning() -> str | None:
+    if settings.DEBUG:
+        return "DEBUG is on: template and query debugging inflate latencies."
+    return None
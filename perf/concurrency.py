@@ -0,0 +1,97 @@
+"""Concurrent write benchmark (Stage 18).
+
+Starts several threads, each with its own database connection, that
+write the rows the busiest paths write: a chat message and a
+notification per transaction. It reports throughput and every
+"database is locked" error so the SQLite profile in config/database.py
+can be checked under contention.
+
+Rows are written to a scratch room and removed afterwards.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.db import OperationalError, connection, connections, transaction
+
+from activity.models import Notification
+from messaging.models import ChatMessage
+
+ROOM = "perf_concurrency"
+
+
+@dataclass
+class ConcurrencyResult:
+    threads: int
+    writes: int
+    committed: int = 0
+    elapsed: float = 0.0
+    errors: list[str] = field(default_factory=list)
+    pragmas: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def locked(self) -> int:
+        return sum("locked" in e for e in self.errors)
+
+    @property
+    def per_second(self) -> float:
+        return self.committed / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "threads": self.threads,
+            "writes_per_thread": self.writes,
+            "committed": self.committed,
+            "errors": len(self.errors),
+            "locked": self.locked,
+            "seconds": round(self.elapsed, 3),
+            "tx_per_second": round(self.per_second, 1),
+            "pragmas": self.pragmas,
+        }
+
+
+def current_pragmas() -> dict[str, Any]:
+    """Effective SQLite pragmas on this thread's connection ({} elsewhere)."""
+    if connection.vendor != "sqlite":
+        return {}
+    with connection.cursor() as cursor:
+        return {name: cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in ("journal_mode", "busy_timeout", "synchronous")}
+
+
+def run_writers(user, course, *, threads: int = 8, writes: int = 50) -> ConcurrencyResult:
+    """Write `threads * writes` transactions concurrently and clean up."""
+    result = ConcurrencyResult(threads=threads, writes=writes, pragmas=current_pragmas())
+    lock = threading.Lock()
+    start_line = threading.Barrier(threads)
+
+    def worker(n: int) -> None:
+        done = 0
+        try:
+            start_line.wait()
+            for i in range(writes):
+                try:
+                    with transaction.atomic():
+                        ChatMessage.objects.create(room=ROOM, course=course, sender=user, text=f"w{n}-{i}")
+                        Notification.objects.create(user=user, type=Notification.TYPE_MATERIAL, course=course, message=f"{ROOM} {n}-{i}")
+                    done += 1
+                except OperationalError as exc:
+                    with lock:
+                        result.errors.append(str(exc))
+        finally:
+            with lock:
+                result.committed += done
+            connections.close_all()
+
+    pool = [threading.Thread(target=worker, args=(n,), name=f"writer-{n}") for n in range(threads)]
+    began = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    result.elapsed = time.perf_counter() - began
+    ChatMessage.objects.filter(room=ROOM).delete()
+    Notification.objects.filter(user=user, course=course, message__startswith=ROOM).delete()
+    return result
@@ -0,0 +1,224 @@
+"""Synthetic dataset generator (Stage 18).
+
+Builds a production-shaped dataset (teachers and students with profiles,
+courses, enrolments, quizzes with questions and choices, attempts,
+grades, materials, notifications and chat messages) using bulk inserts
+only, so tens of thousands of rows are written in seconds. Output is
+deterministic for a given `seed`; every username carries `prefix` so a
+generated dataset can coexist with real data.
+
+Bulk inserts bypass model signals, so profiles are written explicitly and
+cached roster counts are invalidated at the end.
+"""
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass, fields
+from datetime import timedelta
+from typing import Callable
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import Role, UserProfile
+from activity.models import Notification
+from assignments.models import Assignment, AssignmentType, Attempt, Grade, QuizAnswerChoice, QuizQuestion
+from courses.models import Course, Enrolment
+from courses.roster import invalidate_roster_count
+from materials.models import Material
+from messaging.models import ChatMessage
+
+DEFAULT_PASSWORD = "Courpera-bench-1!"
+
+
+@dataclass
+class Scale:
+    """Row counts for one generated dataset."""
+
+    teachers: int = 10
+    students: int = 1000
+    courses: int = 20
+    courses_per_student: int = 3
+    quizzes_per_course: int = 5
+    questions_per_quiz: int = 10
+    choices_per_question: int = 4
+    attempt_rate: float = 0.6  # share of enrolled students attempting each quiz
+    materials_per_course: int = 5
+    notifications_per_user: int = 10
+    messages_per_course: int = 200
+
+    @classmethod
+    def field_names(cls) -> list[str]:
+        return [f.name for f in fields(cls)]
+
+
+PRESETS: dict[str, Scale] = {
+    "small": Scale(teachers=2, students=50, courses=4, quizzes_per_course=2, questions_per_quiz=5, messages_per_course=20),
+    "medium": Scale(),
+    "large": Scale(
+        teachers=100,
+        students=20000,
+        courses=400,
+        courses_per_student=4,
+        quizzes_per_course=8,
+        questions_per_quiz=15,
+        messages_per_course=500,
+    ),
+}
+
+
+class DatasetExists(Exception):
+    """Raised when users with the requested prefix already exist."""
+
+
+def generate(
+    scale: Scale,
+    *,
+    prefix: str = "gen",
+    seed: int = 0,
+    batch_size: int = 1000,
+    password: str = DEFAULT_PASSWORD,
+    log: Callable[[str], None] | None = None,
+) -> dict[str, int]:
+    """Generate a dataset and return the number of rows written per model."""
+    if User.objects.filter(username__startswith=f"{prefix}_").exists():
+        raise DatasetExists(f"Users with prefix '{prefix}_' already exist")
+    rng = random.Random(seed)
+    now = timezone.now()
+    counts: dict[str, int] = {}
+    say = log or (lambda msg: None)
+
+    def bulk(model, objs: list) -> list:
+        created = model.objects.bulk_create(objs, batch_size=batch_size)
+        counts[model.__name__] = counts.get(model.__name__, 0) + len(created)
+        return created
+
+    with transaction.atomic():
+        # One hash shared by every generated account keeps generation fast
+        hashed = make_password(password)
+        teachers = bulk(User, [User(username=f"{prefix}_t{i:04d}", email=f"{prefix}_t{i:04d}@example.com", password=hashed) for i in range(scale.teachers)])
+        students = bulk(User, [User(username=f"{prefix}_s{i:06d}", email=f"{prefix}_s{i:06d}@example.com", password=hashed) for i in range(scale.students)])
+        bulk(
+            UserProfile,
+            [UserProfile(user=u, role=Role.TEACHER, full_name=f"Teacher {i}", instructor_id=f"I{u.pk:07d}") for i, u in enumerate(teachers)]
+            + [UserProfile(user=u, role=Role.STUDENT, full_name=f"Student {i}", student_number=f"S{u.pk:07d}") for i, u in enumerate(students)],
+        )
+        say(f"users: {len(teachers)} teachers, {len(students)} students")
+
+        courses = bulk(
+            Course,
+            [
+                Course(owner=teachers[i % len(teachers)], title=f"{prefix.upper()} Course {i:04d}", description=f"Generated course {i}", syllabus="Week 1\nWeek 2\nWeek 3")
+                for i in range(scale.courses if teachers else 0)
+            ],
+        )
+        roster: dict[int, list[User]] = {c.pk: [] for c in courses}
+        per_student = min(scale.courses_per_student, len(courses))
+        enrolments = []
+        for s in students:
+            for c in rng.sample(courses, per_student):
+                roster[c.pk].append(s)
+                enrolments.append(Enrolment(course=c, student=s))
+        bulk(Enrolment, enrolments)
+        say(f"courses: {len(courses)}, enrolments: {len(enrolments)}")
+
+        quizzes = bulk(
+            Assignment,
+            [
+                Assignment(
+                    course=c,
+                    type=AssignmentType.QUIZ,
+                    title=f"Quiz {j + 1}",
+                    available_from=now - timedelta(days=rng.randint(1, 60)),
+                    # A mix of closed and open quizzes
+                    deadline=now + timedelta(days=rng.randint(-30, 30)),
+                    attempts_allowed=rng.choice((1, 2, 3)),
+                    is_published=True,
+                )
+                for c in courses
+                for j in range(scale.quizzes_per_course)
+            ],
+        )
+        questions = bulk(
+            QuizQuestion,
+            [QuizQuestion(assignment=a, order=k + 1, text=f"Question {k + 1} of {a.title}") for a in quizzes for k in range(scale.questions_per_quiz)],
+        )
+        choices = []
+        for q in questions:
+            right = rng.randrange(scale.choices_per_question) if scale.choices_per_question else -1
+            choices.extend(
+                QuizAnswerChoice(question=q, order=n + 1, text=f"Option {n + 1}", is_correct=n == right)
+                for n in range(scale.choices_per_question)
+            )
+        bulk(QuizAnswerChoice, choices)
+        say(f"quizzes: {len(quizzes)}, questions: {len(questions)}, choices: {len(choices)}")
+
+        attempts = []
+        for a in quizzes:
+            for s in roster[a.course_id]:
+                if rng.random() < scale.attempt_rate:
+                    score = round(rng.uniform(20.0, 100.0), 2)
+                    attempts.append(
+                        Attempt(
+                            assignment=a,
+                            student=s,
+                            attempt_no=1,
+                            submitted_at=now - timedelta(minutes=rng.randint(1, 60 * 24 * 30)),
+                            score=score,
+                            marks_awarded=round(score / 100.0 * a.max_marks, 2),
+                            released=True,
+                            released_at=now,
+                        )
+                    )
+        attempts = bulk(Attempt, attempts)
+        by_id = {a.pk: a for a in quizzes}
+        bulk(
+            Grade,
+            [
+                Grade(
+                    assignment_id=att.assignment_id,
+                    course_id=by_id[att.assignment_id].course_id,
+                    student_id=att.student_id,
+                    attempt=att,
+                    achieved_marks=att.marks_awarded,
+                    max_marks=by_id[att.assignment_id].max_marks,
+                    released_at=now,
+                )
+                for att in attempts
+            ],
+        )
+        say(f"attempts and grades: {len(attempts)}")
+
+        bulk(
+            Material,
+            [
+                Material(course=c, uploaded_by=c.owner, title=f"Lecture {k + 1}", file="materials/generated.pdf", size_bytes=1024, mime="application/pdf")
+                for c in courses
+                for k in range(scale.materials_per_course)
+            ],
+        )
+        types = [t for t, _ in Notification.TYPE_CHOICES]
+        bulk(
+            Notification,
+            [
+                Notification(user=u, type=rng.choice(types), course=rng.choice(courses) if courses else None, message=f"Update {k + 1}", read=rng.random() < 0.5)
+                for u in teachers + students
+                for k in range(scale.notifications_per_user)
+            ],
+        )
+        messages = []
+        for c in courses:
+            senders = [c.owner] + roster[c.pk]
+            messages.extend(
+                ChatMessage(room=f"course_{c.pk}", course=c, sender=rng.choice(senders), text=f"Message {k + 1}")
+                for k in range(scale.messages_per_course)
+            )
+        bulk(ChatMessage, messages)
+        say("materials, notifications and chat messages written")
+
+    # bulk_create skips the signals that maintain cached roster counts
+    for c in courses:
+        invalidate_roster_count(c.pk)
+    return counts
@@ -0,0 +1,36 @@
+"""Measure per-view latency percentiles and query counts."""
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from perf.bench import MODES, debug_warning, default_targets, format_table, run
+
+
+class Command(BaseCommand):
+    help = "Request representative views repeatedly and report p50/p95/p99 latency and queries per request."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50, help="Measured requests per view and mode")
+        parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each measurement")
+        parser.add_argument("--mode", choices=(*MODES, "both"), default="both", help="Driver: test client, ASGI app or both")
+        parser.add_argument("--only", action="append", default=[], metavar="NAME", help="Limit to route names (repeatable)")
+        parser.add_argument("--host", default="localhost", help="Host header (must be in ALLOWED_HOSTS)")
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **opts):
+        targets = default_targets()
+        if opts["only"]:
+            targets = [t for t in targets if t.name in set(opts["only"])]
+            if not targets:
+                raise CommandError("No targets match --only")
+        modes = MODES if opts["mode"] == "both" else (opts["mode"],)
+        results = run(targets, modes=modes, iterations=opts["iterations"], warmup=opts["warmup"], host=opts["host"])
+        if opts["json"]:
+            self.stdout.write(json.dumps([r.as_dict() for r in results], indent=2))
+            return
+        warning = debug_warning()
+        if warning:
+            self.stderr.write(self.style.WARNING(warning))
+        self.stdout.write(format_table(results))
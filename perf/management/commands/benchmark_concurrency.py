@@ -0,0 +1,37 @@
+"""Run concurrent writers against the configured database."""
+from __future__ import annotations
+
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.models import Course
+from perf.concurrency import ROOM, run_writers
+
+
+class Command(BaseCommand):
+    help = "Write chat messages and notifications from several threads and report throughput and lock errors."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--writes", type=int, default=100, help="Transactions per thread")
+        parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    def handle(self, *args, **opts):
+        if opts["threads"] < 1 or opts["writes"] < 1:
+            raise CommandError("--threads and --writes must be positive")
+        user, _ = get_user_model().objects.get_or_create(username=ROOM)
+        course, _ = Course.objects.get_or_create(owner=user, title="Concurrency benchmark")
+        try:
+            result = run_writers(user, course, threads=opts["threads"], writes=opts["writes"])
+        finally:
+            # Cascades to anything the run left behind
+            user.delete()
+        if opts["json"]:
+            self.stdout.write(json.dumps(result.as_dict(), indent=2))
+        else:
+            for key, value in result.as_dict().items():
+                self.stdout.write(f"{key:>18}: {value}")
+        if result.errors:
+            raise CommandError(f"{len(result.errors)} writes failed ({result.locked} lock errors): {result.errors[0]}")
@@ -0,0 +1,29 @@
+"""Compare DRF serializer and fast-path throughput for large API lists."""
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from perf.throughput import VIEWSETS, format_table, measure
+
+
+class Command(BaseCommand):
+    help = "Serialize and render the course and user lists both ways and report rows per second."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Rows per list (default: 1000)")
+        parser.add_argument("--iterations", type=int, default=5, help="Timed runs per variant; the best is reported")
+        parser.add_argument("--only", choices=sorted(VIEWSETS), action="append", default=[])
+        parser.add_argument("--json", action="store_true", help="Print results as JSON")
+
+    def handle(self, *args, **opts):
+        if opts["rows"] < 1:
+            raise CommandError("--rows must be positive")
+        results = []
+        for name in opts["only"] or sorted(VIEWSETS):
+            results += measure(name, limit=opts["rows"], iterations=opts["iterations"])
+        if opts["json"]:
+            self.stdout.write(json.dumps([r.as_dict() for r in results], indent=2))
+            return
+        self.stdout.write(format_table(results))
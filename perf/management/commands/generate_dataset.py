@@ -0,0 +1,42 @@
+"""Generate a synthetic dataset for local load testing."""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from perf.datagen import DEFAULT_PASSWORD, PRESETS, DatasetExists, Scale, generate
+
+
+class Command(BaseCommand):
+    help = "Generate users, courses, quizzes, attempts, grades, notifications and chat messages with bulk inserts."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--preset", choices=sorted(PRESETS), default="medium", help="Starting scale (default: medium)")
+        parser.add_argument("--prefix", default="gen", help="Username prefix for generated accounts")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed (same seed, same data)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password for every generated account")
+        defaults = Scale()
+        for name in Scale.field_names():
+            kind = type(getattr(defaults, name))
+            parser.add_argument(f"--{name.replace('_', '-')}", dest=name, type=kind, default=None, help=f"Override {name} from the preset")
+
+    def handle(self, *args, **opts):
+        scale = PRESETS[opts["preset"]]
+        overrides = {n: opts[n] for n in Scale.field_names() if opts.get(n) is not None}
+        if overrides:
+            scale = Scale(**{**scale.__dict__, **overrides})
+        log = (lambda msg: self.stdout.write(f"  {msg}")) if opts["verbosity"] >= 1 else None
+        try:
+            counts = generate(
+                scale,
+                prefix=opts["prefix"],
+                seed=opts["seed"],
+                batch_size=opts["batch_size"],
+                password=opts["password"],
+                log=log,
+            )
+        except DatasetExists as exc:
+            raise CommandError(f"{exc}; choose another --prefix") from exc
+        total = sum(counts.values())
+        summary = ", ".join(f"{name}={n}" for name, n in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Generated {total} rows: {summary}"))
@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from accounts.models import Role, UserProfile
+from assignments.models import Attempt, Grade, QuizAnswerChoice
+from courses.models import Course, Enrolment
+from messaging.models import ChatMessage
+from perf.bench import Target, default_targets, percentile, run
+from perf.datagen import Scale, generate
+
+TINY = Scale(teachers=2, students=12, courses=3, courses_per_student=2, quizzes_per_course=2, questions_per_quiz=3, attempt_rate=0.5, messages_per_course=5)
+
+
+@pytest.mark.django_db
+def test_generate_writes_consistent_rows_with_few_queries(django_assert_max_num_queries):
+    with django_assert_max_num_queries(25):
+        counts = generate(TINY, prefix="tiny", seed=7)
+    assert counts["User"] == 14
+    assert UserProfile.objects.filter(user__username__startswith="tiny_", role=Role.STUDENT).count() == 12
+    assert Course.objects.count() == 3
+    assert Enrolment.objects.count() == 12 * 2
+    # Every question has exactly one correct choice
+    assert QuizAnswerChoice.objects.filter(is_correct=True).count() == 3 * 2 * 3
+    assert Grade.objects.count() == Attempt.objects.count() == counts["Attempt"]
+    assert ChatMessage.objects.count() == 3 * 5
+
+
+@pytest.mark.django_db
+def test_generate_dataset_command_refuses_existing_prefix():
+    out = StringIO()
+    call_command("generate_dataset", "--preset", "small", "--students", "5", "--prefix", "cmd", stdout=out)
+    assert "Generated" in out.getvalue()
+    with pytest.raises(CommandError):
+        call_command("generate_dataset", "--preset", "small", "--prefix", "cmd", stdout=StringIO())
+
+
+def test_percentile_nearest_rank():
+    samples = [float(n) for n in range(1, 101)]
+    assert percentile(samples, 50) == 50.0
+    assert percentile(samples, 95) == 95.0
+    assert percentile(samples, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.performance
+def test_benchmark_runs_both_drivers_and_counts_queries():
+    generate(TINY, prefix="bench", seed=1)
+    targets = [t for t in default_targets() if t.name in {"courses:detail", "courses-list", "index"}]
+    assert {t.name for t in targets} == {"courses:detail", "courses-list", "index"}
+    results = run(targets, iterations=3, warmup=1)
+    assert len(results) == len(targets) * 2
+    for r in results:
+        assert r.status == (304 if r.target.revalidate else 200), r.as_dict()
+        assert len(r.samples) == 3
+        assert r.p50 <= r.p95 <= r.p99
+    by_key = {(r.target.label, r.mode): r.queries for r in results}
+    # Both drivers run the view on this thread, so they see the same queries
+    for label in {r.target.label for r in results}:
+        assert by_key[(label, "client")] == by_key[(label, "asgi")]
+    # A revalidated API list skips the page query
+    for r in results:
+        if r.target.revalidate:
+            full = Target(r.target.name, r.target.path, r.target.user).label
+            assert r.queries < by_key[(full, r.mode)]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_command_json_output():
+    generate(TINY, prefix="bjson", seed=2)
+    out = StringIO()
+    call_command("benchmark", "--iterations", "2", "--warmup", "0", "--mode", "client", "--only", "index", "--json", stdout=out)
+    rows = json.loads(out.getvalue())
+    assert rows and rows[0]["view"] == "index[anon]" and {"p50_ms", "p95_ms", "p99_ms", "queries"} <= set(rows[0])
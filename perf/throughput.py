@@ -0,0 +1,81 @@
+"""List serialization throughput benchmark (Stage 18).
+
+Compares, on the same rows, the two ways the API can produce a list
+body:
+
+- "serializer": model instances through the DRF serializer, rendered by
+  DRF's stdlib `JSONRenderer`;
+- "fastpath": `.values()` rows through the compiled `fast_fields`
+  builder (api/fastpath.py), rendered by `FastJSONRenderer`.
+
+Both bodies are decoded and compared before timing, so a speed-up never
+comes from a different payload.
+"""
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+
+from rest_framework.renderers import JSONRenderer
+
+from api.fastpath import _compiled
+from api.renderers import FastJSONRenderer, orjson
+from api.views import CourseViewSet, UserViewSet
+
+VIEWSETS = {"courses": CourseViewSet, "users": UserViewSet}
+
+
+@dataclass
+class Throughput:
+    name: str
+    variant: str
+    rows: int
+    seconds: float  # best of the iterations
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "variant": self.variant, "rows": self.rows, "ms": round(self.seconds * 1000, 3), "rows_per_s": round(self.rows_per_second)}
+
+
+def _best(fn, iterations: int) -> float:
+    best = float("inf")
+    for _ in range(max(1, iterations)):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure(name: str, *, limit: int = 1000, iterations: int = 5) -> list[Throughput]:
+    """Time both variants over the first `limit` rows of a viewset's queryset."""
+    view_class = VIEWSETS[name]
+    queryset = view_class.queryset.all()[:limit]
+    serializer_class = view_class.serializer_class
+    lookups, build = _compiled(view_class)
+
+    def via_serializer() -> bytes:
+        return JSONRenderer().render(serializer_class(list(queryset.all()), many=True).data)
+
+    def via_fastpath() -> bytes:
+        return FastJSONRenderer().render([build(row) for row in queryset.values(*lookups)])
+
+    reference = via_serializer()
+    if json.loads(reference) != json.loads(via_fastpath()):
+        raise AssertionError(f"fast path output differs from {serializer_class.__name__}")
+    rows = len(json.loads(reference))
+    fast_label = "fastpath+orjson" if orjson is not None else "fastpath"
+    return [
+        Throughput(name, "serializer", rows, _best(via_serializer, iterations)),
+        Throughput(name, fast_label, rows, _best(via_fastpath, iterations)),
+    ]
+
+
+def format_table(results: list[Throughput]) -> str:
+    lines = [f"{'list':<8}  {'variant':<16}  {'rows':>6}  {'ms':>9}  {'rows/s':>10}"]
+    for r in results:
+        lines.append(f"{r.name:<8}  {r.variant:<16}  {r.rows:>6}  {r.seconds * 1000:>9.2f}  {r.rows_per_second:>10.0f}")
+    return "\n".join(lines)
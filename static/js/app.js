@@ -189,6 +189,30 @@
     });
   }
 
+  function initRoster(){
+    var list = qs('roster-list');
+    if(!list) return;
+    function load(url, replace){
+      fetch(url, {credentials: 'same-origin', headers: {'Accept': 'text/html'}})
+        .then(function(r){ return r.ok ? r.text() : ''; })
+        .then(function(html){
+          if(replace){ list.innerHTML = ''; }
+          var more = list.querySelector('[data-roster-more]');
+          if(more){ more.remove(); }
+          list.insertAdjacentHTML('beforeend', html);
+        })
+        .catch(function(){});
+    }
+    list.addEventListener('click', function(e){
+      var btn = e.target.closest('[data-roster-next]');
+      if(!btn) return;
+      try { e.preventDefault(); } catch(_) {}
+      btn.disabled = true;
+      load(btn.getAttribute('data-roster-next'), false);
+    });
+    load(list.getAttribute('data-roster-url'), true);
+  }
+
   function initConfirms(){
     // Attach a single delegated handler to capture clicks and submit events
     document.addEventListener('click', function(e){
@@ -220,6 +244,7 @@
     initAccordion();
     initMaterials();
     initChat();
+    initRoster();
     initConfirms();
   });
 })();
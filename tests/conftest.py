@@ -18,3 +18,28 @@ def silence_django_request_logger():
     finally:
         logger.setLevel(old)
 
+
+
+# Query budget report (see test_query_budgets.py): {case: {size: queries}}
+QUERY_BUDGET_REPORT = pytest.StashKey[dict]()
+
+
+@pytest.fixture
+def query_budget_report(request):
+    return request.config.stash.setdefault(QUERY_BUDGET_REPORT, {})
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    report = config.stash.get(QUERY_BUDGET_REPORT, None)
+    if not report:
+        return
+    sizes = sorted({size for counts in report.values() for size in counts})
+    width = max(len(name) for name in report)
+    tr = terminalreporter
+    tr.section("query budgets (performance)")
+    tr.write_line(f"{'view':<{width}}  " + "  ".join(f"{s:>6}" for s in sizes) + "  status")
+    for name in sorted(report):
+        counts = report[name]
+        cells = "  ".join(f"{counts.get(s, '-'):>6}" for s in sizes)
+        flat = len(set(counts.values())) == 1
+        tr.write_line(f"{name:<{width}}  {cells}  {'constant' if flat else 'GROWS'}")
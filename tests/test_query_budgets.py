@@ -0,0 +1,330 @@
+"""Query budget regression suite (Stage 18).
+
+Seeds the same course shape at three sizes (10, 100 and 1000 students)
+and requests every named route in `config.urls` against each one. The
+number of SQL queries a view issues must not depend on the amount of
+data behind it, so each case asserts the count is identical across the
+three datasets. Counts are collected into a table printed at the end of
+the run (see `pytest_terminal_summary` in tests/conftest.py).
+
+Scaling per dataset of `n` students:
+- one course with `n` enrolments, feedback rows, notifications, status
+  updates and chat messages, plus `n // 10` extra courses;
+- `2 + n // 100` published quizzes with as many questions each, graded
+  for every student, and one attempt per student on the first quiz.
+
+Write-only routes (POST actions) are listed in `WRITE_ONLY` and skipped;
+every other named route must have a case, so new views are budgeted by
+default.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Callable
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver, reverse
+from django.utils import timezone
+
+from accounts.models import Role, UserProfile
+from activity.models import Notification, Status
+from assignments.models import (
+    Assignment,
+    AssignmentType,
+    Attempt,
+    Grade,
+    QuizAnswerChoice,
+    QuizQuestion,
+    StudentAnswer,
+)
+from courses.models import Course, Enrolment
+from courses.models_feedback import Feedback
+from materials.models import Material
+from messaging.models import ChatMessage
+
+pytestmark = [pytest.mark.django_db, pytest.mark.performance]
+
+SIZES = (10, 100, 1000)
+
+# Routes that only accept writes; a GET merely redirects or returns 405.
+WRITE_ONLY = {
+    "accounts:logout",
+    "courses:enrol",
+    "courses:unenrol",
+    "courses:feedback",
+    "courses:remove",
+    "courses:add-student",
+    "courses:import-students",
+    "materials:upload",
+    "materials:delete",
+    "assignments:delete",
+    "assignments:submit",
+    "assignments:attempt-grade",
+    "activity:post-status",
+    "activity:notifications-mark-all-read",
+    "courses-enrol-bulk",
+    "grades-bulk",
+    "batch",
+}
+
+
+def _seed(n: int) -> SimpleNamespace:
+    """Create one dataset of `n` students with bulk inserts."""
+    p = f"qb{n}_"
+    now = timezone.now()
+    teacher = User.objects.create_user(username=f"{p}teacher", password="pw")
+    teacher.profile.role = Role.TEACHER
+    teacher.profile.save(update_fields=["role", "instructor_id"])
+    students = User.objects.bulk_create(
+        [User(username=f"{p}s{i:04d}", email=f"{p}s{i:04d}@example.com", password=teacher.password) for i in range(n)]
+    )
+    # bulk_create skips the post_save signal that normally creates profiles
+    UserProfile.objects.bulk_create(
+        [UserProfile(user=u, role=Role.STUDENT, student_number=f"S{u.pk:07d}") for u in students]
+    )
+    student = students[0]
+
+    course = Course.objects.create(owner=teacher, title=f"{p}course", description="Seeded", syllabus="Week 1\nWeek 2")
+    extra = Course.objects.bulk_create(
+        [Course(owner=teacher, title=f"{p}extra{i:03d}", description="") for i in range(max(1, n // 10))]
+    )
+    Enrolment.objects.bulk_create(
+        [Enrolment(course=course, student=u) for u in students] + [Enrolment(course=c, student=student) for c in extra]
+    )
+
+    k = 2 + n // 100
+    quizzes = Assignment.objects.bulk_create(
+        [
+            Assignment(
+                course=course,
+                type=AssignmentType.QUIZ,
+                title=f"Quiz {i:02d}",
+                available_from=now - timedelta(days=1),
+                deadline=now + timedelta(days=7),
+                attempts_allowed=5,
+                is_published=True,
+            )
+            for i in range(k)
+        ]
+    )
+    paper = Assignment.objects.create(
+        course=course, type=AssignmentType.PAPER, title="Paper", deadline=now - timedelta(hours=1), is_published=True
+    )
+    questions = QuizQuestion.objects.bulk_create(
+        [QuizQuestion(assignment=a, order=j + 1, text=f"Question {j + 1}") for a in quizzes for j in range(k)]
+    )
+    QuizAnswerChoice.objects.bulk_create(
+        [QuizAnswerChoice(question=q, order=c + 1, text=f"Choice {c + 1}", is_correct=c == 0) for q in questions for c in range(4)]
+    )
+    Grade.objects.bulk_create(
+        [
+            Grade(assignment=a, course=course, student=u, achieved_marks=float(u.pk % 100), max_marks=100.0, released_at=now)
+            for a in quizzes
+            for u in students
+        ],
+        batch_size=2000,
+    )
+    Attempt.objects.bulk_create(
+        [Attempt(assignment=quizzes[0], student=u, score=50.0, marks_awarded=50.0, released=True) for u in students]
+    )
+    attempt = Attempt.objects.get(assignment=quizzes[0], student=student)
+    correct = QuizAnswerChoice.objects.filter(question__assignment=quizzes[0], is_correct=True).values_list("question_id", "id")
+    StudentAnswer.objects.bulk_create([StudentAnswer(attempt=attempt, question_id=qid, choice_id=cid) for qid, cid in correct])
+
+    materials = Material.objects.bulk_create(
+        [
+            Material(course=course, uploaded_by=teacher, title=f"Material {i}", file="materials/seed.pdf", mime="application/pdf")
+            for i in range(1 + n // 10)
+        ]
+    )
+    Feedback.objects.bulk_create([Feedback(course=course, student=u, rating=1 + u.pk % 5) for u in students])
+    Notification.objects.bulk_create(
+        [
+            Notification(user=who, actor=teacher, type=Notification.TYPE_ENROLMENT, course=course, message=f"Note {i}")
+            for who in (teacher, student)
+            for i in range(n)
+        ]
+    )
+    Status.objects.bulk_create([Status(user=student, text=f"Update {i}") for i in range(n)])
+    ChatMessage.objects.bulk_create(
+        [ChatMessage(room=f"course_{course.id}", course=course, sender=students[i % n], text=f"Hello {i}") for i in range(n)]
+    )
+    return SimpleNamespace(
+        teacher=teacher,
+        student=student,
+        course=course,
+        quiz=quizzes[0],
+        paper=paper,
+        attempt=attempt,
+        grade=Grade.objects.get(assignment=quizzes[0], student=student),
+        material=materials[0],
+        enrolment=Enrolment.objects.get(course=course, student=student),
+        feedback=Feedback.objects.get(course=course, student=student),
+        status=Status.objects.filter(user=student).first(),
+    )
+
+
+@pytest.fixture(scope="module")
+def datasets(django_db_setup, django_db_blocker):
+    """Seed every size once per module; rolled back when the module ends."""
+    with django_db_blocker.unblock():
+        atomic = transaction.atomic()
+        atomic.__enter__()
+        try:
+            yield {n: _seed(n) for n in SIZES}
+        finally:
+            transaction.set_rollback(True)
+            atomic.__exit__(None, None, None)
+
+
+@dataclass(frozen=True)
+class Case:
+    route: str
+    who: str
+    path: Callable[[SimpleNamespace], str]
+    status: int = 200
+    headers: dict = field(default_factory=dict)
+
+    @property
+    def label(self) -> str:
+        return f"{self.route}[{self.who}]"
+
+
+def _r(name: str, *attrs: str) -> Callable[[SimpleNamespace], str]:
+    """Reverse `name` with primary keys taken from dataset attributes."""
+    return lambda ds: reverse(name, args=[getattr(ds, a).pk for a in attrs])
+
+
+def _q(name: str, query: str, *attrs: str) -> Callable[[SimpleNamespace], str]:
+    return lambda ds: f"{_r(name, *attrs)(ds)}?{query}"
+
+
+CASES = [
+    # accounts
+    Case("accounts:login", "anon", _r("accounts:login")),
+    Case("accounts:register", "anon", _r("accounts:register")),
+    Case("accounts:password-change", "student", _r("accounts:password-change")),
+    Case("accounts:password-change-done", "student", _r("accounts:password-change-done")),
+    Case("accounts:password-forgot", "anon", _r("accounts:password-forgot")),
+    Case("accounts:home", "student", _r("accounts:home"), status=302),
+    Case("accounts:home-teacher", "teacher", _r("accounts:home-teacher")),
+    Case("accounts:home-student", "student", _r("accounts:home-student")),
+    Case("accounts:profile", "student", _r("accounts:profile")),
+    Case("accounts:search", "teacher", lambda ds: reverse("accounts:search") + "?q=s00"),
+    Case("accounts:avatar-proxy", "student", lambda ds: reverse("accounts:avatar-proxy", args=[ds.teacher.pk, 64])),
+    Case("accounts:grades", "student", _r("accounts:grades")),
+    # courses
+    Case("courses:list", "student", _r("courses:list")),
+    Case("courses:create", "teacher", _r("courses:create")),
+    Case("courses:my-calendar", "student", _r("courses:my-calendar")),
+    Case("courses:detail", "teacher", _r("courses:detail", "course")),
+    Case("courses:detail", "student", _r("courses:detail", "course")),
+    Case("courses:edit", "teacher", _r("courses:edit", "course")),
+    Case("courses:syllabus-edit", "teacher", _r("courses:syllabus-edit", "course")),
+    Case("courses:calendar", "anon", _r("courses:calendar", "course")),
+    Case("courses:roster", "teacher", _r("courses:roster", "course")),
+    Case("courses:gradebook", "teacher", _r("courses:gradebook", "course")),
+    Case("courses:gradebook-csv", "teacher", _r("courses:gradebook-csv", "course")),
+    # assignments
+    Case("assignments:course", "teacher", _r("assignments:course", "course")),
+    Case("assignments:course", "student", _r("assignments:course", "course")),
+    Case("assignments:create", "teacher", _r("assignments:create", "course")),
+    Case("assignments:quiz-manage", "teacher", _r("assignments:quiz-manage", "quiz")),
+    Case("assignments:manage", "teacher", _r("assignments:manage", "paper")),
+    Case("assignments:take", "student", _r("assignments:take", "quiz")),
+    Case("assignments:feedback", "student", _r("assignments:feedback", "attempt")),
+    Case("assignments:attempts", "teacher", _r("assignments:attempts", "quiz")),
+    # activity and messaging
+    Case("activity:notifications-recent", "student", _r("activity:notifications-recent")),
+    Case("activity:notifications-page", "student", _r("activity:notifications-page")),
+    Case("messaging:course-history", "student", _r("messaging:course-history", "course")),
+    # ui
+    Case("index", "anon", _r("index")),
+    Case("index", "student", _r("index")),
+    # API, docs and metrics
+    Case("metrics", "anon", _r("metrics"), status=403),
+    Case("schema", "anon", _r("schema")),
+    Case("swagger-ui", "anon", _r("swagger-ui")),
+    Case("redoc", "anon", _r("redoc")),
+    Case("search-users", "teacher", _q("search-users", "q=s00")),
+    Case("sync", "student", _r("sync")),
+    Case("sync", "teacher", _r("sync")),
+    Case("api-root", "anon", _r("api-root")),
+    Case("users-list", "teacher", _r("users-list")),
+    Case("users-detail", "teacher", _r("users-detail", "student")),
+    Case("courses-list", "anon", _r("courses-list")),
+    Case("courses-detail", "student", _r("courses-detail", "course")),
+    Case("enrolments-list", "student", _r("enrolments-list")),
+    Case("enrolments-list", "teacher", _r("enrolments-list")),
+    Case("enrolments-detail", "student", _r("enrolments-detail", "enrolment")),
+    Case("materials-list", "student", _r("materials-list")),
+    Case("materials-detail", "student", _r("materials-detail", "material")),
+    Case("feedback-list", "teacher", _r("feedback-list")),
+    Case("feedback-detail", "student", _r("feedback-detail", "feedback")),
+    Case("status-list", "student", _r("status-list")),
+    Case("status-detail", "student", _r("status-detail", "status")),
+    Case("courses-gradebook", "teacher", _r("courses-gradebook", "course")),
+    Case("assignments-list", "student", _r("assignments-list")),
+    Case("assignments-list", "teacher", _r("assignments-list")),
+    Case("assignments-detail", "student", _r("assignments-detail", "quiz")),
+    Case("attempts-list", "student", _r("attempts-list")),
+    Case("attempts-list", "teacher", _r("attempts-list")),
+    Case("attempts-detail", "teacher", _r("attempts-detail", "attempt")),
+    Case("grades-list", "student", _r("grades-list")),
+    Case("grades-list", "teacher", _r("grades-list")),
+    Case("grades-detail", "student", _r("grades-detail", "grade")),
+]
+
+
+def _route_names() -> set[str]:
+    """Every named route in config.urls, namespaced, excluding the admin site."""
+    names: set[str] = set()
+
+    def walk(patterns, ns: list[str]) -> None:
+        for p in patterns:
+            if isinstance(p, URLResolver):
+                if p.namespace == "admin":
+                    continue
+                walk(p.url_patterns, ns + [p.namespace] if p.namespace else ns)
+            elif p.name:
+                names.add(":".join(ns + [p.name]))
+
+    walk(get_resolver().url_patterns, [])
+    return names
+
+
+def _count_queries(case: Case, ds: SimpleNamespace) -> tuple[int, int]:
+    client = Client()
+    user = getattr(ds, case.who, None)
+    if user is not None:
+        client.force_login(user)
+    cache.clear()  # every size starts from the same cold cache
+    with CaptureQueriesContext(connection) as ctx:
+        resp = client.get(case.path(ds), **case.headers)
+        if resp.streaming:
+            b"".join(resp.streaming_content)
+    return resp.status_code, len(ctx)
+
+
+def test_every_named_route_has_a_budget_case():
+    covered = {c.route for c in CASES}
+    missing = _route_names() - covered - WRITE_ONLY
+    assert not missing, f"Add a query budget case for: {sorted(missing)}"
+
+
+@pytest.mark.parametrize("case", CASES, ids=lambda c: c.label)
+def test_query_count_is_constant_as_data_grows(case, datasets, query_budget_report):
+    counts: dict[int, int] = {}
+    for size, ds in datasets.items():
+        status, queries = _count_queries(case, ds)
+        assert status == case.status, f"{case.label} at size {size} returned {status}"
+        counts[size] = queries
+    query_budget_report[case.label] = counts
+    assert len(set(counts.values())) == 1, f"{case.label} query count grows with data: {counts}"
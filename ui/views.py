@@ -1,8 +1,11 @@
 import os
 import platform
+from django.conf import settings
 from django.http import HttpRequest, HttpResponse
 from django.shortcuts import render
 
+from config.middleware import profile_stats
+
 
 def _admin_mode(request: HttpRequest) -> bool:
     """Return True when Admin Mode is active.
@@ -49,7 +52,8 @@ def index(request: HttpRequest) -> HttpResponse:
 
     In Admin Mode, show environment details, versions, and convenient
     links to the interactive API documentation. When not in Admin Mode,
-    keep the page minimal and student‑facing.
+    keep the page minimal and student‑facing. When request profiling is
+    enabled, Admin Mode also lists the slowest endpoints by p95.
     """
     admin_mode = _admin_mode(request)
     ctx = {
@@ -60,5 +64,7 @@ def index(request: HttpRequest) -> HttpResponse:
         # Optional credentials for operator/grader convenience; read from env
         "admin_user": os.environ.get("ADMIN_USERNAME"),
         "admin_pass": os.environ.get("ADMIN_PASSWORD"),
+        "profiling": admin_mode and settings.PROFILING_ENABLED,
+        "slowest": profile_stats.slowest(10) if admin_mode and settings.PROFILING_ENABLED else [],
     }
     return render(request, "index.html", ctx)